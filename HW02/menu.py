@@ -1,21 +1,146 @@
 import csv  # чтение csv
 import codecs  # исправление проблем с кодировкой csv
+import hashlib  # имена файлов в кэше загрузок
+import io  # чтение ответа сервера как текста
+import json  # заголовки ответа в кэше загрузок
+import math  # округление для перцентилей
+import os
+import pickle  # разобранная таблица в кэше загрузок
+import shutil
+import tempfile  # уникальные временные файлы в кэше загрузок
+import time
+import urllib.error
+import urllib.parse  # отличаем ссылку от пути к файлу
 import urllib.request  # скачивание файлов по ссылке
+from array import array  # компактные числовые столбцы
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor  # загрузка нескольких файлов
+from itertools import groupby
+from typing import Iterable, Iterator
 
+# исходный отчет
+CORP_SUMMARY_URL = ('https://stepik.org/media/attachments/'
+                    'lesson/578270/Corp_Summary.csv')
 
-def load_csv(url: str = ('https://stepik.org/media/attachments/'
-                         'lesson/578270/Corp_Summary.csv')) -> dict:
-    """Загружает csv файл по ссылке и преобразует его в список,
-    где каждый элемент это список с фрагментами записи в отчет.
-    Этот список можно интерпретировать просто как таблицу
+# все остальное load_csv считает путем к файлу на диске
+URL_SCHEMES = ('http', 'https', 'ftp', 'file')
+
+# кэш скачанных файлов для menu()
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'hw02_menu')
+
+# типы столбцов отчета: числа хранятся в array, а повторяющиеся строки -
+# номерами в списке уникальных значений. Остальные столбцы - списки строк
+INT_COLUMNS = ('Оклад',)
+FLOAT_COLUMNS = ('Оценка',)
+CATEGORY_COLUMNS = ('Департамент', 'Отдел')
+
+
+def _open_source(source: str):
+    """открывает ссылку или локальный файл как текстовый поток
+
+    Args:
+        source (str): ссылка (http, https, ftp, file) или путь к файлу
+
+    Returns:
+        TextIO: поток строк файла
+    """
+    if urllib.parse.urlparse(source).scheme in URL_SCHEMES:
+        response = urllib.request.urlopen(source)
+        return io.TextIOWrapper(response, encoding='utf-8', newline='')
+
+    return open(source, 'r', encoding='utf-8', newline='')
+
+
+@contextmanager
+def _replace_on_close(path: str, mode: str = 'wb', **kwargs):
+    """открывает на запись временный файл с уникальным именем
+    в папке path и после записи заменяет им path. Оборванная запись
+    не портит path, а одновременные записи одного файла
+    (например, из load_tables) не пишут в один временный файл.
+    Если запись прервана исключением (или генератор, который пишет
+    файл, не дочитали), то path не меняется
+
+    Args:
+        path (str): путь к файлу
+        mode (str, optional): режим открытия. Defaults to 'wb'.
+
+    Yields:
+        file: открытый временный файл
+    """
+    file = tempfile.NamedTemporaryFile(
+        mode, dir=os.path.dirname(os.path.abspath(path)), suffix='.tmp',
+        delete=False, **kwargs)
+    try:
+        with file:
+            yield file
+        os.replace(file.name, path)
+    except BaseException:
+        if os.path.exists(file.name):
+            os.remove(file.name)
+        raise
+
+
+def _copy_lines(lines: Iterable, file) -> Iterator:
+    """отдает строки дальше, по пути записывая их в файл
+
+    Args:
+        lines (Iterable): строки
+        file (TextIO): открытый на запись файл
+
+    Yields:
+        str: те же строки
+    """
+    for line in lines:
+        file.write(line)
+        yield line
+
+
+def iter_csv(source: str = CORP_SUMMARY_URL,
+             cache_path: str = None) -> Iterator:
+    """читает csv файл с разделителем ';' по ссылке или с диска
+    и отдает записи по одной, не загружая весь файл в память.
+    Пустые строки пропускаются
+
+    Args:
+        source (str, optional): ссылка или путь к файлу.
+            Defaults to CORP_SUMMARY_URL.
+        cache_path (str, optional): если указан, то файл по пути
+            копируется сюда (например, что бы не скачивать его
+            заново). Копия появляется, только если файл прочитан
+            до конца. Defaults to None.
+
+    Yields:
+        list: запись, например ['Кузьмина Любовь Феликсовна',
+            'Разработка', 'Внутренний портал', 'Backend-инженер',
+            '4.5', '89000']. Первая запись - названия столбцов
+    """
+    with _open_source(source) as stream:
+        if cache_path is None:
+            yield from (row for row in csv.reader(stream, delimiter=';')
+                        if row)
+            return
+
+        # копия появляется только после того, как файл прочитан целиком
+        with _replace_on_close(cache_path, 'w', encoding='utf-8',
+                               newline='') as file:
+            yield from (row for row in csv.reader(_copy_lines(stream, file),
+                                                  delimiter=';')
+                        if row)
+
+
+def load_csv(url: str = CORP_SUMMARY_URL, cache_path: str = None) -> list:
+    """Загружает csv файл по ссылке (или с диска) и преобразует его
+    в список, где каждый элемент это список с фрагментами записи
+    в отчет. Этот список можно интерпретировать просто как таблицу
 
     Args:
-        url (str, optional): Ссылка на скачивание файла.
-            Defaults to ('https://stepik.org/media/attachments/'
-                        lesson/578270/Corp_Summary.csv').
+        url (str, optional): Ссылка на скачивание файла или путь к нему.
+            Defaults to CORP_SUMMARY_URL.
+        cache_path (str, optional): куда сохранить копию файла.
+            Defaults to None.
 
     Returns:
-        dict: Список формата:
+        list: Список формата:
             [['Кузьмина Любовь Феликсовна', 'Разработка',
             'Внутренний портал', 'Backend-инженер',
             '4.5', '89000'], ...]
@@ -24,17 +149,416 @@ def load_csv(url: str = ('https://stepik.org/media/attachments/'
                 ['ФИО полностью', 'Департамент', 'Отдел', 'Должность',
                 'Оценка', 'Оклад']
     """
-    response = urllib.request.urlopen(url)
-    raw_data = response.read().decode('utf-8')
+    return list(iter_csv(url, cache_path))
+
+
+class Categorical:
+    """столбец строк, где каждое значение хранится номером
+    в списке уникальных значений (dictionary encoding).
+    Подходит для столбцов с небольшим числом различных значений,
+    например департаментов и отделов
+    """
+
+    def __init__(self) -> None:
+        self.codes = array('l')  # номер значения для каждой строки
+        self.categories = []  # уникальные значения в порядке появления
+        self._index = {}  # значение - номер
+
+    def append(self, value: str) -> None:
+        """добавляет значение в конец столбца
+
+        Args:
+            value (str): значение
+        """
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def extend(self, other: 'Categorical') -> None:
+        """добавляет в конец столбца значения другого столбца,
+        перекодируя их номера (каждое уникальное значение один раз)
+
+        Args:
+            other (Categorical): столбец
+        """
+        new_codes = []
+        for value in other.categories:
+            code = self._index.get(value)
+            if code is None:
+                code = self._index[value] = len(self.categories)
+                self.categories.append(value)
+            new_codes.append(code)
+
+        self.codes.extend(map(new_codes.__getitem__, other.codes))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, i: int) -> str:
+        return self.categories[self.codes[i]]
+
+    def __iter__(self) -> Iterator:
+        return map(self.categories.__getitem__, self.codes)
+
+
+class Table:
+    """колоночная таблица: каждый столбец хранится отдельно
+    и уже приведен к своему типу (см. INT_COLUMNS, FLOAT_COLUMNS,
+    CATEGORY_COLUMNS), поэтому отчеты не разбирают строки заново
+    и не ищут столбец по списку названий
+    """
+
+    def __init__(self, header: list) -> None:
+        """создает пустую таблицу
+
+        Args:
+            header (list): названия столбцов
+        """
+        self.header = list(header)
+        # название столбца - его номер
+        self.column_index = {name: i for i, name in enumerate(self.header)}
+        self.columns = []
+        for name in self.header:
+            if name in INT_COLUMNS:
+                self.columns.append(array('q'))
+            elif name in FLOAT_COLUMNS:
+                self.columns.append(array('d'))
+            elif name in CATEGORY_COLUMNS:
+                self.columns.append(Categorical())
+            else:
+                self.columns.append([])
+
+    @classmethod
+    def from_rows(cls, rows: Iterable) -> 'Table':
+        """собирает таблицу из строк в формате load_csv
+        (первая строка - названия столбцов) за один проход.
+        Строки, в которых не хватает ячеек (например, пустая строка
+        в конце файла), пропускаются
+
+        Args:
+            rows (Iterable): строки таблицы
+
+        Raises:
+            ValueError: пустой файл или ячейка, которая не переводится
+                в тип столбца
+
+        Returns:
+            Table: колоночная таблица
+        """
+        rows = iter(rows)
+        header = next(rows, None)
+        if header is None:
+            raise ValueError('В файле нет даже названий столбцов')
+        table = cls(header)
+        n_columns = len(table.header)
+
+        # для каждого столбца функция, которая добавляет в него ячейку
+        appenders = []
+        for name, column in zip(table.header, table.columns):
+            if name in INT_COLUMNS:
+                appenders.append(lambda cell, column=column:
+                                 column.append(int(cell)))
+            elif name in FLOAT_COLUMNS:
+                appenders.append(lambda cell, column=column:
+                                 column.append(float(cell)))
+            else:
+                appenders.append(column.append)
+
+        for row in rows:
+            if len(row) < n_columns:
+                continue
+            for append, cell in zip(appenders, row):
+                append(cell)
+
+        return table
+
+    def extend(self, other: 'Table') -> None:
+        """добавляет в конец таблицы строки другой таблицы
+        с теми же столбцами
+
+        Args:
+            other (Table): таблица
+
+        Raises:
+            ValueError: у таблиц разные столбцы
+        """
+        if other.header != self.header:
+            raise ValueError('У таблиц разные столбцы: '
+                             f'{self.header} и {other.header}')
+
+        for column, other_column in zip(self.columns, other.columns):
+            column.extend(other_column)
+
+    def to_dict(self) -> dict:
+        """таблица встроенными типами (списки, array, словарь) для кэша
+        загрузок: в отличие от самой таблицы, такой pickle не зависит
+        от того, в каком модуле объявлен Table
+
+        Returns:
+            dict: {'header': [...], 'columns': [...]}, столбец
+                Categorical хранится парой (номера, уникальные значения)
+        """
+        return {'header': self.header,
+                'columns': [(column.codes, column.categories)
+                            if isinstance(column, Categorical) else column
+                            for column in self.columns]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Table':
+        """собирает таблицу из результата to_dict
+
+        Args:
+            data (dict): таблица встроенными типами
+
+        Raises:
+            ValueError: данные не подходят к столбцам таблицы
+
+        Returns:
+            Table: колоночная таблица
+        """
+        table = cls(data['header'])
+        if len(data['columns']) != len(table.columns):
+            raise ValueError('Количество столбцов не совпадает '
+                             'с названиями')
+
+        for i, (column, saved) in enumerate(zip(table.columns,
+                                                data['columns'])):
+            if isinstance(column, Categorical):
+                codes, categories = saved
+                if type(codes) is not array or codes.typecode != 'l' \
+                        or type(categories) is not list:
+                    raise ValueError(f'Неверный столбец {table.header[i]}')
+                column.codes = codes
+                column.categories = categories
+                column._index = {value: code
+                                 for code, value in enumerate(categories)}
+            elif type(saved) is not type(column) \
+                    or type(saved) is array \
+                    and saved.typecode != column.typecode:
+                raise ValueError(f'Неверный столбец {table.header[i]}')
+            else:
+                table.columns[i] = saved
+
+        return table
+
+    def __len__(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, column: str):
+        """столбец по названию
+
+        Args:
+            column (str): название столбца
+
+        Returns:
+            array | Categorical | list: столбец
+        """
+        return self.columns[self.column_index[column]]
+
+
+def _cache_files(url: str, cache_dir: str) -> tuple:
+    """пути к файлам кэша для ссылки: сам файл, заголовки ответа
+    (ETag, Last-Modified) и разобранная таблица
+
+    Args:
+        url (str): ссылка
+        cache_dir (str): папка кэша
+
+    Returns:
+        tuple: (файл, заголовки, таблица)
+    """
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    base = os.path.join(cache_dir, key)
+
+    return base + '.csv', base + '.json', base + '.table'
+
+
+def fetch_cached(url: str, cache_dir: str = CACHE_DIR) -> tuple:
+    """скачивает файл в кэш. Если файл уже есть в кэше, то сервер
+    получает условный запрос (If-None-Match / If-Modified-Since)
+    и присылает файл, только если он изменился. Если сервер
+    недоступен, то используется копия из кэша
+
+    Args:
+        url (str): ссылка
+        cache_dir (str, optional): папка кэша. Defaults to CACHE_DIR.
+
+    Raises:
+        OSError: сервер недоступен, а в кэше файла нет
+
+    Returns:
+        tuple: (путь к файлу в кэше, True, если файл скачан заново)
+    """
+    body_path, meta_path, table_path = _cache_files(url, cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+
+    meta = {}
+    if os.path.exists(body_path) and os.path.exists(meta_path):
+        with open(meta_path, 'r', encoding='utf-8') as file:
+            meta = json.load(file)
+
+    request = urllib.request.Request(url)
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+
+    try:
+        response = urllib.request.urlopen(request)
+    except urllib.error.HTTPError as error:
+        # 304 Not Modified: копия в кэше актуальна. При ошибке сервера
+        # тоже берем копию, как и без сети
+        if meta and (error.code == 304 or error.code >= 500):
+            return body_path, False
+        raise
+    except OSError:
+        # нет сети - работаем с тем, что скачано раньше
+        if meta:
+            return body_path, False
+        raise
+
+    with response:
+        with _replace_on_close(body_path) as file:
+            shutil.copyfileobj(response, file)
+        meta = {'url': url, 'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified')}
+
+    with _replace_on_close(meta_path, 'w', encoding='utf-8') as file:
+        json.dump(meta, file)
+    # таблица была разобрана из старой версии файла
+    # (ее мог уже удалить другой поток)
+    try:
+        os.remove(table_path)
+    except FileNotFoundError:
+        pass
+
+    return body_path, True
+
+
+def load_table(url: str = CORP_SUMMARY_URL, cache_path: str = None,
+               cache_dir: str = None) -> Table:
+    """загружает csv файл и сразу, по мере чтения, переводит его
+    в колоночную таблицу. Список строк целиком не создается
+
+    Args:
+        url (str, optional): Ссылка на скачивание файла или путь к нему.
+            Defaults to CORP_SUMMARY_URL.
+        cache_path (str, optional): куда сохранить копию файла.
+            Defaults to None.
+        cache_dir (str, optional): папка кэша загрузок (см.
+            fetch_cached). Если файл по http(s) не изменился, то таблица
+            не разбирается заново, а читается из кэша. None - без кэша.
+            Defaults to None.
+
+    Returns:
+        Table: колоночная таблица
+    """
+    if cache_dir is None \
+            or urllib.parse.urlparse(url).scheme not in ('http', 'https'):
+        return Table.from_rows(iter_csv(url, cache_path))
+
+    body_path, downloaded = fetch_cached(url, cache_dir)
+    table_path = _cache_files(url, cache_dir)[2]
+
+    if cache_path is not None:
+        shutil.copyfile(body_path, cache_path)
+
+    if not downloaded and os.path.exists(table_path):
+        try:
+            with open(table_path, 'rb') as file:
+                return Table.from_dict(pickle.load(file))
+        except Exception:
+            # файл от другой версии программы или испорчен: разбираем
+            # csv заново, как будто таблицы в кэше нет
+            pass
+
+    table = Table.from_rows(iter_csv(body_path))
+    with _replace_on_close(table_path) as file:
+        pickle.dump(table.to_dict(), file)
+
+    return table
+
+
+def _timed_load(source: str, cache_dir: str) -> tuple:
+    """загружает один файл для load_tables и замеряет время
+
+    Args:
+        source (str): ссылка или путь к файлу
+        cache_dir (str): папка кэша загрузок или None
+
+    Returns:
+        tuple: (таблица или None, секунды, текст ошибки или None)
+    """
+    start = time.perf_counter()
+    try:
+        table = load_table(source, cache_dir=cache_dir)
+    except (ValueError, OSError) as error:
+        return None, time.perf_counter() - start, f'{error}'
+
+    return table, time.perf_counter() - start, None
+
+
+def load_tables(sources: list, max_workers: int = 8,
+                cache_dir: str = None) -> tuple:
+    """загружает несколько файлов с одинаковыми столбцами одновременно
+    (в пуле из max_workers потоков, пока один файл скачивается,
+    другие уже разбираются) и объединяет их в одну таблицу.
+    Строки идут в порядке sources, файлы с ошибками пропускаются.
+    Повторяющиеся источники загружаются один раз, а их строки
+    добавляются столько раз, сколько они указаны
+
+    Args:
+        sources (list): ссылки или пути к файлам
+        max_workers (int, optional): сколько файлов загружать
+            одновременно. Defaults to 8.
+        cache_dir (str, optional): папка кэша загрузок (см. load_table).
+            Defaults to None.
 
-    with codecs.open('data.csv', 'w', 'utf-8') as file:
-        file.write(raw_data)
+    Raises:
+        ValueError: не получилось загрузить ни одного файла
 
-    with codecs.open('data.csv', 'r', 'utf-8') as file:
-        reader = csv.reader(file)
-        data = [''.join(row).split(';') for row in reader]
+    Returns:
+        tuple: (объединенная таблица, отчет о загрузке формата
+            [{'source': 'https://...', 'rows': 120, 'seconds': 0.31,
+              'error': None}, ...])
+    """
+    if type(max_workers) is not int or max_workers < 1:
+        raise ValueError('max_workers должен быть натуральным числом')
+
+    # одна ссылка в нескольких потоках писала бы в одни файлы кэша
+    unique_sources = list(dict.fromkeys(sources))
+    with ThreadPoolExecutor(
+            max_workers=min(max_workers,
+                            len(unique_sources) or 1)) as executor:
+        results = dict(zip(unique_sources,
+                           executor.map(_timed_load, unique_sources,
+                                        [cache_dir] * len(unique_sources))))
+
+    merged = None
+    report = []
+    for source in sources:
+        table, seconds, error = results[source]
+        if table is not None:
+            try:
+                # таблица источника может понадобиться еще раз,
+                # поэтому строки копируются в отдельную таблицу
+                if merged is None:
+                    merged = Table(table.header)
+                merged.extend(table)
+            except ValueError as extend_error:
+                table, error = None, f'{extend_error}'
+        report.append({'source': source,
+                       'rows': None if table is None else len(table),
+                       'seconds': seconds, 'error': error})
 
-    return data
+    if merged is None:
+        raise ValueError('Не удалось загрузить ни одного файла: ' +
+                         '; '.join(f'{item["source"]}: {item["error"]}'
+                                   for item in report))
+
+    return merged, report
 
 
 def print_table(data: list) -> None:
@@ -75,47 +599,132 @@ def get_all_rows(data: list, column: str) -> list:
     """возвращает все строки исходной таблицы с данными для конкретного столбца
 
     Args:
-        data (list): исходная таблица с данными
+        data (list | Table): исходная таблица с данными
         column (str): название столбца
 
     Returns:
         list: список, в котором находятся строки для
-            определенного столбца таблицы
+            определенного столбца таблицы (для Table - значения
+            в типе столбца). Строки, в которых не хватает ячеек,
+            пропускаются, как и в Table.from_rows
     """
-    return [data[i][data[0].index(column)] for i in range(len(data[1:]))][1:]
+    if isinstance(data, Table):
+        return list(data[column])
+
+    indx = data[0].index(column)
+    n_columns = len(data[0])
+
+    return [row[indx] for row in data[1:] if len(row) >= n_columns]
 
 
 def get_hierarchy(data: list) -> list:
     """возвращает департамент и все отделы, которые входят в него
 
     Args:
-        data (list): исходная таблица
+        data (list | Table): исходная таблица
 
     Returns:
         list: возвращает новую таблицу в формате:
             [['Название Департамента', 'Отдел1, Отдел2, ...'], ...]
         Названия столбцов для первой таблицы: ['Департамент', 'Отделы']
     """
-    all_departments = get_all_rows(data, 'Департамент')
-    all_teams = get_all_rows(data, 'Отдел')
+    if isinstance(data, Table):
+        # уникальные пары ищутся по номерам, строки нужны только для них
+        departments = data['Департамент']
+        teams = data['Отдел']
+        dep_teams = sorted(
+            (departments.categories[dep], teams.categories[team])
+            for dep, team in set(zip(departments.codes, teams.codes)))
+    else:
+        all_departments = get_all_rows(data, 'Департамент')
+        all_teams = get_all_rows(data, 'Отдел')
+        dep_teams = sorted(set(zip(all_departments, all_teams)))
 
-    dep_teams = sorted(set(zip(all_departments, all_teams)))
     hierarchy = [['Департамент', 'Отделы']]
 
-    for department in sorted(set(dep for dep, _ in dep_teams)):
-        teams = ', '.join(
-            team for dep_, team in dep_teams if dep_ == department)
-        hierarchy.append([department, teams])
+    # пары отсортированы, поэтому отделы департамента идут подряд
+    for department, pairs in groupby(dep_teams, key=lambda pair: pair[0]):
+        hierarchy.append([department, ', '.join(team for _, team in pairs)])
 
     return hierarchy
 
 
-def get_departments_summary(data: list) -> list:
+def percentile(values: list, q: float) -> float:
+    """считает перцентиль с линейной интерполяцией между
+    соседними значениями (как numpy.percentile по умолчанию)
+
+    Args:
+        values (list): отсортированные по возрастанию значения
+        q (float): перцентиль от 0 до 100, 50 - медиана
+
+    Returns:
+        float: значение перцентиля
+    """
+    position = (len(values) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def aggregate(keys: Iterable, values: Iterable,
+              percentiles: tuple = ()) -> dict:
+    """считает статистики значений по группам за один проход:
+    численность, минимум, максимум и среднее, а по желанию
+    еще и перцентили (для них значения группы приходится запоминать)
+
+    Args:
+        keys (Iterable): группа для каждой строки (например, департамент)
+        values (Iterable): числовое значение для каждой строки
+            (например, оклад)
+        percentiles (tuple, optional): какие перцентили посчитать,
+            например (50, 90). Defaults to ().
+
+    Returns:
+        dict: словарь формата:
+            {'Разработка': {'count': 10, 'min': 50000, 'max': 120000,
+                            'mean': 87000.5, 'p50': 88000.0}, ...}
+    """
+    # для каждой группы [численность, минимум, максимум, сумма]
+    groups = {}
+    group_values = {}
+
+    for key, value in zip(keys, values):
+        stats = groups.get(key)
+        if stats is None:
+            groups[key] = [1, value, value, value]
+            group_values[key] = []
+        else:
+            stats[0] += 1
+            if value < stats[1]:
+                stats[1] = value
+            if value > stats[2]:
+                stats[2] = value
+            stats[3] += value
+        if percentiles:
+            group_values[key].append(value)
+
+    result = {}
+    for key, (count, minimum, maximum, total) in groups.items():
+        result[key] = {'count': count, 'min': minimum, 'max': maximum,
+                       'mean': total / count}
+        if percentiles:
+            ordered = sorted(group_values[key])
+            for q in percentiles:
+                result[key][f'p{q}'] = percentile(ordered, q)
+
+    return result
+
+
+def get_departments_summary(data: list,
+                            column: str = 'Департамент') -> list:
     """Возвращает сводный отчет по департаментам,
         основываясь на исходной таблице
 
     Args:
-        data (list): исходная таблица
+        data (list | Table): исходная таблица
+        column (str, optional): столбец, по которому группируются
+            сотрудники. Defaults to 'Департамент'.
 
     Returns:
         list: Новая таблица со столбцами:
@@ -123,28 +732,33 @@ def get_departments_summary(data: list) -> list:
                'Минимальная з/п', 'Максимальная з/п', 'Средняя з/п']
             Строками таблицы будут являться расчитанные показатели
     """
+    if isinstance(data, Table):
+        keys = data[column]
+        if isinstance(keys, Categorical):
+            # группируем по номерам, а названия подставляем в конце
+            groups = aggregate(keys.codes, data['Оклад'])
+            groups = {keys.categories[code]: stats
+                      for code, stats in groups.items()}
+        else:
+            groups = aggregate(keys, data['Оклад'])
+    else:
+        # переводим все зарплаты в числовой формат для подсчета статистик
+        wages = map(int, get_all_rows(data, 'Оклад'))
+        groups = aggregate(get_all_rows(data, column), wages)
 
-    unique_departments = sorted(set(get_all_rows(data, 'Департамент')))
-    # переводим все зарплаты в числовой формат для подсчета статистик
-    wages = list(map(int, get_all_rows(data, 'Оклад')))
-    summary = [['Департамент', 'Численность',
+    summary = [[column, 'Численность',
                'Минимальная з/п', 'Максимальная з/п', 'Средняя з/п']]
 
-    for department in unique_departments:
-        # индексы строк для работников из каждого департамента
-        indices = [i for i, x in enumerate(
-            get_all_rows(data, 'Департамент')) if x == department]
-        # зарплаты работников из каждого департамента
-        wages_by_department = [wages[i]
-                               for i, x in enumerate(wages) if i in indices]
+    for department in sorted(groups):
+        stats = groups[department]
         summary.append(
             [
                 department,
-                get_all_rows(data, 'Департамент').count(department),
-                min(wages_by_department),
-                max(wages_by_department),
+                stats['count'],
+                stats['min'],
+                stats['max'],
                 # округляем з/п, потому что важны только целые числа...
-                round(sum(wages_by_department) / len(wages_by_department))
+                round(stats['mean'])
             ]
         )
     return summary
@@ -155,7 +769,7 @@ def save_summary_as_csv(data: list, filename: str) -> None:
     сохраняет сводный отчет как csv файл
 
     Args:
-        data (list): исходная таблица
+        data (list | Table): исходная таблица
         filename (str): название файла, под которым сохранится отчет
     """
     with codecs.open(filename, 'w', 'utf-8') as file:
@@ -177,20 +791,22 @@ def menu() -> None:
         print('1. Использовать исходный файл "Corp_Summary.csv".')
         print(('2. Скачать другой csv файл с'
                ' такой же структурой отчета по ссылке.'))
-        print('3. Завершить программу.')
+        print(('3. Скачать и объединить несколько csv файлов с'
+               ' такой же структурой отчета.'))
+        print('4. Завершить программу.')
 
         inp = input('Введите номер пункта меню: ')
 
         if inp == '1':
-            data = load_csv()
+            data = load_table(cache_dir=CACHE_DIR)
             print('\nФайл успешно скачан и обработан.')
             break
         elif inp == '2':
             print('\nВведите ссылку на скачивание csv файла.')
             response = input('URL: ')
             try:
-                data = load_csv(response)
-            except ValueError:
+                data = load_table(response, cache_dir=CACHE_DIR)
+            except (ValueError, OSError):
                 print(('\nВы ввели неправильную ссылку. Попробуйте еще раз '
                       'либо выберите исходный файл.'))
                 continue
@@ -198,6 +814,21 @@ def menu() -> None:
                 print('\nФайл успешно скачан и обработан.')
                 break
         elif inp == '3':
+            print('\nВведите ссылки или пути к csv файлам через пробел.')
+            sources = input('Файлы: ').split()
+            try:
+                data, report = load_tables(sources, cache_dir=CACHE_DIR)
+            except ValueError as error:
+                print(f'\n{error}. Попробуйте еще раз.')
+                continue
+            for item in report:
+                status = (f'строк: {item["rows"]}' if item['error'] is None
+                          else f'ошибка: {item["error"]}')
+                print(f'{item["source"]} - {item["seconds"]:.2f} с, '
+                      f'{status}')
+            print(f'\nФайлы объединены, всего строк: {len(data)}.')
+            break
+        elif inp == '4':
             return None
         else:
             print('\nВы ввели некорректное число. Попробуйте еще раз.')
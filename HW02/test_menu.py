@@ -0,0 +1,417 @@
+import functools
+import http.server
+import pickle
+import random
+import threading
+from array import array
+from menu import (Categorical, Table, aggregate, fetch_cached, get_all_rows,
+                  get_departments_summary, get_hierarchy, iter_csv,
+                  load_csv, load_table, load_tables)
+import pytest
+
+
+HEADER = ['ФИО полностью', 'Департамент', 'Отдел', 'Должность',
+          'Оценка', 'Оклад']
+
+
+def make_data(n_rows, seed=0):
+    rnd = random.Random(seed)
+    teams = {'Разработка': ['Backend', 'Frontend', 'Мобильная'],
+             'Маркетинг': ['Реклама', 'SMM'],
+             'Бухгалтерия': ['Расчеты']}
+    data = [HEADER]
+    for i in range(n_rows):
+        department = rnd.choice(sorted(teams))
+        data.append([f'Сотрудник {i}', department,
+                     rnd.choice(teams[department]), 'Инженер',
+                     str(rnd.choice([3.5, 4, 4.5, 5])),
+                     str(rnd.randrange(30000, 200000, 500))])
+    # в конце скачанного файла пустая строка
+    data.append([''])
+    return data
+
+
+def legacy_summary(data):
+    unique_departments = sorted(set(get_all_rows(data, 'Департамент')))
+    wages = list(map(int, get_all_rows(data, 'Оклад')))
+    summary = [['Департамент', 'Численность',
+               'Минимальная з/п', 'Максимальная з/п', 'Средняя з/п']]
+    for department in unique_departments:
+        indices = [i for i, x in enumerate(
+            get_all_rows(data, 'Департамент')) if x == department]
+        wages_by_department = [wages[i]
+                               for i, x in enumerate(wages) if i in indices]
+        summary.append([department,
+                        get_all_rows(data, 'Департамент').count(department),
+                        min(wages_by_department), max(wages_by_department),
+                        round(sum(wages_by_department)
+                              / len(wages_by_department))])
+    return summary
+
+
+@pytest.mark.parametrize('n_rows', [1, 5, 300])
+def test_summary_matches_legacy(n_rows):
+    data = make_data(n_rows)
+    assert get_departments_summary(data) == legacy_summary(data)
+
+
+def test_summary_by_other_column():
+    data = make_data(50)
+    summary = get_departments_summary(data, 'Отдел')
+    assert summary[0][0] == 'Отдел'
+    teams = get_all_rows(data, 'Отдел')
+    assert [row[0] for row in summary[1:]] == sorted(set(teams))
+    assert sum(row[1] for row in summary[1:]) == len(teams)
+
+
+def test_aggregate_percentiles():
+    result = aggregate(['a', 'b', 'a', 'a', 'a'], [4, 10, 1, 3, 2],
+                       percentiles=(50, 25, 100))
+    assert result == {
+        'a': {'count': 4, 'min': 1, 'max': 4, 'mean': 2.5,
+              'p50': 2.5, 'p25': 1.75, 'p100': 4},
+        'b': {'count': 1, 'min': 10, 'max': 10, 'mean': 10.0,
+              'p50': 10, 'p25': 10, 'p100': 10},
+    }
+
+
+def legacy_hierarchy(data):
+    all_departments = get_all_rows(data, 'Департамент')
+    all_teams = get_all_rows(data, 'Отдел')
+    dep_teams = sorted(set(zip(all_departments, all_teams)))
+    hierarchy = [['Департамент', 'Отделы']]
+    for department in sorted(set(dep for dep, _ in dep_teams)):
+        teams = ', '.join(
+            team for dep_, team in dep_teams if dep_ == department)
+        hierarchy.append([department, teams])
+    return hierarchy
+
+
+@pytest.mark.parametrize('n_rows', [1, 5, 300])
+def test_table_reports_match_legacy(n_rows):
+    data = make_data(n_rows)
+    table = Table.from_rows(data)
+    assert len(table) == n_rows
+    assert get_departments_summary(table) == legacy_summary(data)
+    assert get_hierarchy(table) == legacy_hierarchy(data)
+    assert get_hierarchy(data) == legacy_hierarchy(data)
+    assert get_departments_summary(table, 'Отдел') == \
+        get_departments_summary(data, 'Отдел')
+    assert get_departments_summary(table, 'Должность') == \
+        get_departments_summary(data, 'Должность')
+
+
+def test_table_columns():
+    data = make_data(20)
+    table = Table.from_rows(data)
+    assert table.column_index['Оклад'] == 5
+    assert table['Оклад'] == array('q', map(int, get_all_rows(data,
+                                                              'Оклад')))
+    assert table['Оценка'].typecode == 'd'
+    departments = table['Департамент']
+    assert isinstance(departments, Categorical)
+    assert len(departments.categories) <= 3
+    assert list(departments) == get_all_rows(data, 'Департамент')
+    assert get_all_rows(table, 'ФИО полностью') == \
+        get_all_rows(data, 'ФИО полностью')
+
+
+def write_csv(path, data):
+    text = '\n'.join(';'.join(row) for row in data) + '\n\n'
+    path.write_text(text, encoding='utf-8')
+    return text
+
+
+def test_iter_csv_local_file_and_url(tmp_path):
+    data = make_data(30)[:-1]
+    path = tmp_path / 'report.csv'
+    write_csv(path, data)
+
+    assert load_csv(str(path)) == data
+    assert load_csv(path.as_uri()) == data
+
+    rows = iter_csv(str(path))
+    assert next(rows) == HEADER
+    rows.close()
+
+
+def test_iter_csv_cache_copy(tmp_path):
+    data = make_data(5)[:-1]
+    path = tmp_path / 'report.csv'
+    text = write_csv(path, data)
+    cache_path = tmp_path / 'copy.csv'
+
+    table = load_table(path.as_uri(), cache_path=str(cache_path))
+    assert len(table) == 5
+    assert cache_path.read_text(encoding='utf-8') == text
+    assert get_departments_summary(table) == \
+        get_departments_summary(make_data(5))
+
+
+def test_iter_csv_cache_copy_incomplete(tmp_path):
+    data = make_data(5)[:-1]
+    path = tmp_path / 'report.csv'
+    write_csv(path, data)
+    cache_path = tmp_path / 'copy.csv'
+
+    # чтение остановлено на середине: копии нет
+    rows = iter_csv(str(path), cache_path=str(cache_path))
+    assert next(rows) == HEADER
+    rows.close()
+    assert not cache_path.exists()
+
+    # ошибка разбора: копии тоже нет
+    data[3][-1] = 'не число'
+    write_csv(path, data)
+    with pytest.raises(ValueError):
+        load_table(str(path), cache_path=str(cache_path))
+    assert not cache_path.exists()
+    assert list(tmp_path.glob('*.tmp')) == []
+
+
+def test_iter_csv_quoted_cells(tmp_path):
+    path = tmp_path / 'report.csv'
+    path.write_text('a;b\n"x;y";"Иванов, Иван"\n', encoding='utf-8')
+    assert load_csv(str(path)) == [['a', 'b'], ['x;y', 'Иванов, Иван']]
+
+
+def test_get_all_rows_keeps_last_record():
+    data = make_data(3)
+    assert get_all_rows(data[:-1], 'Оклад') == get_all_rows(data, 'Оклад')
+    assert len(get_all_rows(data, 'Оклад')) == 3
+
+
+class ReportHandler(http.server.BaseHTTPRequestHandler):
+    """отдает server.body с ETag и отвечает 304 на If-None-Match"""
+
+    def do_GET(self):
+        self.server.requests.append(self.headers.get('If-None-Match'))
+        etag = '"%d"' % hash(self.server.body)
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = self.server.body.encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def report_server():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             ReportHandler)
+    server.body = '\n'.join(';'.join(row) for row in make_data(10)[:-1])
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_cache_revalidation(tmp_path, report_server, monkeypatch):
+    url = f'http://127.0.0.1:{report_server.server_port}/report.csv'
+    cache_dir = str(tmp_path / 'cache')
+    expected = get_departments_summary(make_data(10))
+
+    table = load_table(url, cache_dir=cache_dir)
+    assert get_departments_summary(table) == expected
+    assert report_server.requests == [None]
+
+    # файл не изменился: условный запрос, 304 и таблица из кэша
+    monkeypatch.setattr(Table, 'from_rows', None)
+    table = load_table(url, cache_dir=cache_dir)
+    assert get_departments_summary(table) == expected
+    assert report_server.requests[1] is not None
+    monkeypatch.undo()
+
+    # файл изменился: скачивается и разбирается заново
+    report_server.body = '\n'.join(';'.join(row)
+                                   for row in make_data(4, seed=1)[:-1])
+    table = load_table(url, cache_dir=cache_dir)
+    assert len(table) == 4
+
+
+@pytest.mark.parametrize('content', [
+    b'not a pickle',
+    # pickle из python menu.py ссылается на __main__.Table
+    b'c__main__\nTable\n)\x81.',
+    pickle.dumps({'header': ['a'], 'columns': []}),
+])
+def test_http_cache_broken_table(tmp_path, report_server, content):
+    url = f'http://127.0.0.1:{report_server.server_port}/report.csv'
+    cache_dir = tmp_path / 'cache'
+    load_table(url, cache_dir=str(cache_dir))
+    table_path, = cache_dir.glob('*.table')
+    table_path.write_bytes(content)
+
+    # таблица разбирается из скачанного файла заново
+    table = load_table(url, cache_dir=str(cache_dir))
+    assert get_departments_summary(table) == \
+        get_departments_summary(make_data(10))
+    assert report_server.requests[1] is not None
+    cached = Table.from_dict(pickle.loads(table_path.read_bytes()))
+    assert get_hierarchy(cached) == get_hierarchy(table)
+
+
+def test_http_cache_offline(tmp_path, report_server):
+    url = f'http://127.0.0.1:{report_server.server_port}/report.csv'
+    cache_dir = str(tmp_path / 'cache')
+    load_table(url, cache_dir=cache_dir)
+    report_server.shutdown()
+    report_server.server_close()
+
+    assert len(load_table(url, cache_dir=cache_dir)) == 10
+    with pytest.raises(OSError):
+        load_table(url, cache_dir=str(tmp_path / 'empty'))
+
+
+def test_http_cache_last_modified(tmp_path):
+    # http.server.SimpleHTTPRequestHandler отдает Last-Modified
+    # и отвечает 304 на If-Modified-Since
+    write_csv(tmp_path / 'report.csv', make_data(3)[:-1])
+    handler = functools.partial(QuietFileHandler, directory=str(tmp_path))
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f'http://127.0.0.1:{server.server_port}/report.csv'
+        cache_dir = str(tmp_path / 'cache')
+        assert fetch_cached(url, cache_dir)[1] is True
+        path, downloaded = fetch_cached(url, cache_dir)
+        assert downloaded is False
+        assert load_csv(path) == make_data(3)[:-1]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class QuietFileHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def test_table_extend_remaps_categories():
+    first, second = make_data(30), make_data(20, seed=1)
+    table = Table.from_rows(first)
+    table.extend(Table.from_rows(second))
+    union = first[:-1] + second[1:]
+
+    assert len(table) == 50
+    assert list(table['Отдел']) == get_all_rows(union, 'Отдел')
+    assert get_departments_summary(table) == legacy_summary(union)
+    assert get_hierarchy(table) == legacy_hierarchy(union)
+
+    other = Table.from_rows([HEADER[:-1]])
+    with pytest.raises(ValueError):
+        table.extend(other)
+
+
+def test_load_tables_merges_and_reports(tmp_path):
+    parts = [make_data(n, seed=n) for n in [5, 12, 7]]
+    sources = []
+    for i, data in enumerate(parts):
+        write_csv(tmp_path / f'report{i}.csv', data[:-1])
+        sources.append(str(tmp_path / f'report{i}.csv'))
+    write_csv(tmp_path / 'other.csv', [HEADER[:-1], ['a'] * 5])
+    sources[1:1] = [str(tmp_path / 'missing.csv'),
+                    str(tmp_path / 'other.csv')]
+
+    table, report = load_tables(sources, max_workers=2)
+    union = [HEADER] + [row for data in parts for row in data[1:-1]]
+
+    assert get_all_rows(table, 'ФИО полностью') == \
+        get_all_rows(union, 'ФИО полностью')
+    assert get_departments_summary(table) == legacy_summary(union)
+    assert get_hierarchy(table) == legacy_hierarchy(union)
+    assert [item['source'] for item in report] == sources
+    assert [item['rows'] for item in report] == [5, None, None, 12, 7]
+    assert [item['error'] is None for item in report] == \
+        [True, False, False, True, True]
+    assert all(item['seconds'] >= 0 for item in report)
+
+    with pytest.raises(ValueError):
+        load_tables([str(tmp_path / 'missing.csv')])
+    with pytest.raises(ValueError):
+        load_tables(sources, max_workers=0)
+
+
+class ConcurrentReportHandler(ReportHandler):
+    """отвечает только когда server.barrier соберет все запросы,
+    и запоминает, сколько запросов обрабатывалось одновременно"""
+
+    def do_GET(self):
+        with self.server.lock:
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active,
+                                         self.server.active)
+        try:
+            # при загрузке по очереди барьер не соберется и сломается
+            self.server.barrier.wait()
+            super().do_GET()
+        finally:
+            with self.server.lock:
+                self.server.active -= 1
+
+
+def test_load_tables_concurrent():
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0),
+                                             ConcurrentReportHandler)
+    server.body = '\n'.join(';'.join(row) for row in make_data(10)[:-1])
+    server.requests = []
+    server.lock = threading.Lock()
+    server.active = server.max_active = 0
+    server.barrier = threading.Barrier(4, timeout=10)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        sources = [f'http://127.0.0.1:{server.server_port}/{i}.csv'
+                   for i in range(4)]
+        table, report = load_tables(sources, max_workers=4)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert len(table) == 40
+    assert [item['error'] for item in report] == [None] * 4
+    assert server.max_active == 4
+
+
+def test_load_tables_duplicate_sources(tmp_path, report_server):
+    url = f'http://127.0.0.1:{report_server.server_port}/report.csv'
+    cache_dir = tmp_path / 'cache'
+
+    table, report = load_tables([url, url, url], cache_dir=str(cache_dir))
+    assert len(table) == 30
+    assert [item['rows'] for item in report] == [10, 10, 10]
+    # повторяющаяся ссылка скачивается один раз
+    assert report_server.requests == [None]
+    assert not list(cache_dir.glob('*.tmp'))
+
+
+def test_fetch_cached_concurrent(tmp_path, report_server):
+    url = f'http://127.0.0.1:{report_server.server_port}/report.csv'
+    cache_dir = tmp_path / 'cache'
+    errors = []
+
+    def load():
+        try:
+            assert len(load_table(url, cache_dir=str(cache_dir))) == 10
+        except Exception as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert not list(cache_dir.glob('*.tmp'))
+    assert len(load_table(url, cache_dir=str(cache_dir))) == 10
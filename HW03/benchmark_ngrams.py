@@ -0,0 +1,102 @@
+"""
+Время и пиковая память на один текст для униграмм, биграмм и триграмм.
+Для сравнения приводится наивный вариант, который склеивает каждую
+n-грамму в строку и ищет ее в словаре.
+
+Запуск:
+    python benchmark_ngrams.py
+"""
+import random
+import time
+import tracemalloc
+from typing import Callable, Iterator
+
+from class_vectorizer import CountVectorizer
+
+
+def make_zipf_corpus(vocabulary_size: int = 20000, n_texts: int = 2000,
+                     text_length: int = 100, seed: int = 0) -> list:
+    """
+    Корпус, в котором частоты слов распределены по закону Ципфа,
+    как в естественных текстах
+
+    Args:
+        vocabulary_size (int, optional): Количество различных слов.
+            Defaults to 20000.
+        n_texts (int, optional): Количество текстов. Defaults to 2000.
+        text_length (int, optional): Количество слов в тексте.
+            Defaults to 100.
+        seed (int, optional): Зерно генератора. Defaults to 0.
+
+    Returns:
+        list: Список текстов
+    """
+    rnd = random.Random(seed)
+    words = [f'w{i}' for i in range(vocabulary_size)]
+    weights = [1 / rank for rank in range(1, vocabulary_size + 1)]
+
+    return [' '.join(rnd.choices(words, weights=weights, k=text_length))
+            for _ in range(n_texts)]
+
+
+def naive_rows(vectorizer: CountVectorizer, corpus: list) -> Iterator:
+    """
+    Строки document-term matrix, где каждая n-грамма склеивается в строку
+    """
+    min_n, max_n = vectorizer.ngram_range
+
+    for text in corpus:
+        words = vectorizer._tokenize(text)
+        text_count = {}
+        for n in range(min_n, max_n + 1):
+            for i in range(len(words) - n + 1):
+                indx = vectorizer.vocabulary.get(' '.join(words[i:i + n]))
+                if indx is not None:
+                    text_count[indx] = text_count.get(indx, 0) + 1
+        yield vectorizer._make_row(text_count)
+
+
+def measure(rows: Callable, *args) -> tuple:
+    """
+    Время, за которое генератор строк проходит корпус, и пиковый объем
+    памяти, занятой во время обработки одного текста (строки
+    не накапливаются)
+
+    Returns:
+        tuple: (секунды, байты)
+    """
+    # первый проход заодно прогревает free list'ы кортежей и строк,
+    # иначе tracemalloc считает их заполнение памятью на текст
+    start = time.perf_counter()
+    for _ in rows(*args):
+        pass
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in rows(*args):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return seconds, peak
+
+
+if __name__ == '__main__':
+    corpus = make_zipf_corpus()
+    n_texts = len(corpus)
+    print(f'Текстов: {n_texts}, слов в тексте: 100')
+    print(f'{"n-граммы":>8} | {"признаков":>9} | {"мкс/текст":>9} | '
+          f'{"КБ/текст":>8} | {"наивно мкс":>10} | {"наивно КБ":>9}')
+
+    for ngram_range in [(1, 1), (1, 2), (1, 3)]:
+        vectorizer = CountVectorizer(sparse=True, ngram_range=ngram_range)
+        vectorizer.fit(corpus)
+
+        seconds, peak = measure(vectorizer.transform_iter, corpus)
+        naive_seconds, naive_peak = measure(naive_rows, vectorizer, corpus)
+
+        print(f'{str(ngram_range):>8} | {len(vectorizer.feature_names):>9} | '
+              f'{seconds / n_texts * 1e6:>9.1f} | '
+              f'{peak / 1024:>8.2f} | '
+              f'{naive_seconds / n_texts * 1e6:>10.1f} | '
+              f'{naive_peak / 1024:>9.2f}')
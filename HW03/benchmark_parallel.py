@@ -0,0 +1,29 @@
+"""
+Пропускная способность CountVectorizer.fit и transform
+в зависимости от количества процессов (n_jobs) на синтетическом корпусе.
+
+Запуск:
+    python benchmark_parallel.py
+"""
+import os
+
+from benchmark_transform import make_corpus, measure
+from class_vectorizer import CountVectorizer
+
+
+if __name__ == '__main__':
+    corpus = make_corpus(vocabulary_size=20000, n_texts=20000,
+                         text_length=100)
+    n_cores = os.cpu_count() or 1
+    print(f'Ядер процессора: {n_cores}, текстов: {len(corpus)}')
+    print(f'{"n_jobs":>6} | {"fit, текстов/с":>15} | '
+          f'{"transform, текстов/с":>21}')
+
+    n_jobs_list = sorted({1, 2, 4, 8, n_cores})
+    for n_jobs in n_jobs_list:
+        vectorizer = CountVectorizer(sparse=True, n_jobs=n_jobs)
+        fit_time = measure(vectorizer.fit, corpus)
+        transform_time = measure(vectorizer.transform, corpus)
+
+        print(f'{n_jobs:>6} | {len(corpus) / fit_time:>15.0f} | '
+              f'{len(corpus) / transform_time:>21.0f}')
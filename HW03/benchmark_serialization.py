@@ -0,0 +1,58 @@
+"""
+Время save и load для словаря из миллиона слов в сравнении с pickle.
+load отображает файл в память, поэтому его время не зависит
+от размера словаря.
+
+Запуск:
+    python benchmark_serialization.py
+"""
+import os
+import pickle
+import tempfile
+
+from benchmark_transform import make_corpus, measure
+from class_vectorizer import CountVectorizer
+
+
+if __name__ == '__main__':
+    corpus = make_corpus(vocabulary_size=1_000_000, n_texts=1000,
+                         text_length=100)
+    vectorizer = CountVectorizer(sparse=True)
+    vectorizer.fit(corpus)
+    print(f'Слов в словаре: {len(vectorizer.feature_names)}')
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'model.bin')
+        pickle_path = os.path.join(directory, 'model.pickle')
+
+        save_time = measure(vectorizer.save, path)
+        load_time = measure(CountVectorizer.load, path)
+
+        with open(pickle_path, 'wb') as file:
+            pickle.dump(vectorizer, file)
+
+        def load_pickle():
+            with open(pickle_path, 'rb') as file:
+                return pickle.load(file)
+
+        pickle_time = measure(load_pickle)
+
+        loaded = CountVectorizer.load(path)
+        expected = vectorizer.transform(corpus)
+        result = loaded.transform(corpus)
+        assert result.indices == expected.indices
+        assert result.data == expected.data
+        # первый текст содержит весь словарь, без него корпус похож
+        # на обычный поток запросов
+        texts = corpus[1:]
+        transform_time = measure(vectorizer.transform, texts)
+        loaded_transform_time = measure(loaded.transform, texts)
+
+        print(f'Размер файла: {os.path.getsize(path) / 2 ** 20:.1f} МБ, '
+              f'pickle: {os.path.getsize(pickle_path) / 2 ** 20:.1f} МБ')
+        print(f'save: {save_time * 1000:.0f} мс')
+        print(f'load: {load_time * 1000:.2f} мс, '
+              f'pickle.load: {pickle_time * 1000:.0f} мс')
+        print(f'transform {len(texts)} текстов: '
+              f'{transform_time * 1000:.0f} мс, после load: '
+              f'{loaded_transform_time * 1000:.0f} мс')
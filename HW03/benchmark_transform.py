@@ -0,0 +1,95 @@
+"""
+Сравнение скорости CountVectorizer.transform со старой реализацией,
+которая для каждого текста вызывала words.count для каждого слова словаря.
+
+Запуск:
+    python benchmark_transform.py
+"""
+import random
+import time
+
+from class_vectorizer import CountVectorizer
+
+
+def make_corpus(vocabulary_size: int, n_texts: int = 200,
+                text_length: int = 50, seed: int = 0) -> list:
+    """
+    Генерирует синтетический корпус из случайных слов
+
+    Args:
+        vocabulary_size (int): Количество различных слов
+        n_texts (int, optional): Количество текстов. Defaults to 200.
+        text_length (int, optional): Количество слов в тексте.
+            Defaults to 50.
+        seed (int, optional): Зерно генератора. Defaults to 0.
+
+    Returns:
+        list: Список текстов
+    """
+    rnd = random.Random(seed)
+    words = [f'w{i}' for i in range(vocabulary_size)]
+    # первый текст содержит весь словарь, что бы размер словаря
+    # точно был равен vocabulary_size
+    corpus = [' '.join(words)]
+    corpus.extend(' '.join(rnd.choices(words, k=text_length))
+                  for _ in range(n_texts - 1))
+
+    return corpus
+
+
+def legacy_transform(vectorizer: CountVectorizer, corpus: list) -> list:
+    """
+    Старая реализация transform: O(токены * словарь) на каждый текст
+
+    Args:
+        vectorizer (CountVectorizer): Обученный векторайзер
+        corpus (list): Список текстов
+
+    Returns:
+        list: Document-term matrix
+    """
+    matrix = []
+
+    for text in corpus:
+        words = vectorizer._tokenize(text)
+        matrix.append([words.count(word)
+                       for word in vectorizer.feature_names])
+
+    return matrix
+
+
+def measure(func, *args) -> float:
+    """
+    Время работы функции в секундах (лучшее из трех запусков)
+    """
+    timings = []
+
+    for _ in range(3):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+if __name__ == '__main__':
+    print(f'{"словарь":>8} | {"старый":>9} | {"новый":>9} | '
+          f'{"sparse":>9} | {"ускорение":>9}')
+
+    for vocabulary_size in [100, 1000, 5000, 20000]:
+        corpus = make_corpus(vocabulary_size)
+        vectorizer = CountVectorizer()
+        vectorizer.fit(corpus)
+        sparse_vectorizer = CountVectorizer(sparse=True)
+        sparse_vectorizer.fit(corpus)
+
+        assert vectorizer.transform(corpus) == \
+            legacy_transform(vectorizer, corpus)
+
+        legacy_time = measure(legacy_transform, vectorizer, corpus)
+        new_time = measure(vectorizer.transform, corpus)
+        sparse_time = measure(sparse_vectorizer.transform, corpus)
+
+        print(f'{vocabulary_size:>8} | {legacy_time:>8.3f}s | '
+              f'{new_time:>8.3f}s | {sparse_time:>8.3f}s | '
+              f'{legacy_time / new_time:>8.1f}x')
@@ -1,3 +1,479 @@
+import bisect
+import heapq
+import json
+import math
+import mmap
+import os
+import re
+import sys
+import zlib
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate, islice
+from typing import Iterable, Iterator
+
+
+# все, что не буква и не цифра: \W для str совпадает с "not isalnum()",
+# кроме '_', который приходится добавлять отдельно
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# файл со стоп словами английского языка лежит рядом с модулем
+STOP_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'stopwords.txt')
+
+# сколько текстов отправляется в один процесс за раз при n_jobs > 1
+PARALLEL_CHUNK_SIZE = 1000
+
+# dtype счетчиков - typecode для array
+COUNT_DTYPES = {'uint8': 'B', 'uint16': 'H', 'uint32': 'I', 'int64': 'q'}
+
+# первые байты файла, сохраненного через save
+MODEL_MAGIC = b'VECMODEL'
+
+# статистика кэша счетчиков слов, как у functools.lru_cache
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize',
+                                     'currsize'])
+
+# векторайзер, с которым работает процесс-воркер при n_jobs > 1.
+# Передается один раз при запуске процесса, а не с каждым куском корпуса
+_worker_vectorizer = None
+
+
+@lru_cache(maxsize=None)
+def _load_stop_words(path: str = STOP_WORDS_PATH) -> frozenset:
+    """
+    Читает файл со стоп словами (по слову в строке).
+    Результат кэшируется, поэтому файл читается один раз за процесс,
+    сколько бы векторайзеров ни создавалось
+
+    Args:
+        path (str, optional): Путь к файлу. Defaults to STOP_WORDS_PATH.
+
+    Returns:
+        frozenset: Множество стоп слов
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return frozenset(word for word in (line.strip() for line in file)
+                         if word)
+
+
+def _init_worker(vectorizer) -> None:
+    """
+    Запоминает векторайзер в процессе-воркере
+    """
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+
+def _fit_chunk(texts: list) -> tuple:
+    """
+    Частичный словарь куска корпуса: слова (или n-граммы)
+    в порядке первого появления вместе с их частотами
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        tuple: (количество текстов, Counter слово - в скольких текстах
+        встречается, Counter слово - сколько раз встречается).
+        Для n-грамм вместо слов кортежи слов
+    """
+    vectorizer = _worker_vectorizer
+    document_counts = Counter()
+    term_counts = Counter()
+
+    for text in texts:
+        text_count = Counter(vectorizer._terms(vectorizer._tokenize(text)))
+        document_counts.update(text_count.keys())
+        term_counts.update(text_count)
+
+    return len(texts), document_counts, term_counts
+
+
+def _count_chunk(texts: list) -> list:
+    """
+    Счетчики слов (или n-грамм) для каждого текста куска корпуса.
+    Слова в каждом счетчике идут в порядке первого появления в тексте
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        list: Список Counter слово - количество
+    """
+    vectorizer = _worker_vectorizer
+
+    return [Counter(vectorizer._terms(vectorizer._tokenize(text)))
+            for text in texts]
+
+
+def _transform_chunk(texts: list) -> list:
+    """
+    Строки document-term matrix для куска корпуса по готовому словарю
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        list: Строки в формате CountVectorizer._make_row
+    """
+    vectorizer = _worker_vectorizer
+
+    return [vectorizer._make_row(vectorizer._count_words(
+        vectorizer._tokenize(text), vectorizer.vocabulary)) for text in texts]
+
+
+class CSRMatrix:
+    """
+    Разреженная document-term matrix в формате CSR
+    (compressed sparse row). Хранятся только ненулевые элементы,
+    поэтому память растет с количеством ненулевых ячеек,
+    а не с произведением числа текстов на размер словаря.
+
+    Attributes:
+        indptr (array): Границы строк: элементы строки i лежат
+            в indices[indptr[i]:indptr[i + 1]]
+        indices (array): Номера столбцов ненулевых элементов
+        data (array): Значения ненулевых элементов
+        n_cols (int): Количество столбцов матрицы
+    """
+
+    def __init__(self, n_cols: int = 0, typecode: str = 'q') -> None:
+        """
+        Инициализация пустой матрицы
+
+        Args:
+            n_cols (int, optional): Количество столбцов. Defaults to 0.
+            typecode (str, optional): typecode для array с данными
+                ('q' для счетчиков, 'd' для весов). Defaults to 'q'.
+        """
+        self.indptr = array('q', [0])
+        self.indices = array('l')
+        self.data = array(typecode)
+        self.n_cols = n_cols
+
+    @property
+    def shape(self) -> tuple:
+        """
+        Размер матрицы
+
+        Returns:
+            tuple: (количество строк, количество столбцов)
+        """
+        return len(self.indptr) - 1, self.n_cols
+
+    @property
+    def nnz(self) -> int:
+        """
+        Количество ненулевых элементов
+
+        Returns:
+            int: Количество хранимых элементов
+        """
+        return len(self.data)
+
+    def append_row(self, indices, data) -> None:
+        """
+        Добавляет в конец матрицы строку
+
+        Args:
+            indices (iterable): Номера столбцов по возрастанию
+            data (iterable): Значения в этих столбцах
+        """
+        self.indices.extend(indices)
+        self.data.extend(data)
+        self.indptr.append(len(self.data))
+
+    def getrow(self, i: int) -> tuple:
+        """
+        Возвращает строку матрицы в разреженном виде
+
+        Args:
+            i (int): Номер строки
+
+        Returns:
+            tuple: (номера столбцов, значения)
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+
+        return self.indices[start:end], self.data[start:end]
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.getrow(i)
+
+    def toarray(self) -> list:
+        """
+        Переводит матрицу в обычный список списков
+
+        Returns:
+            list: Плотная матрица
+        """
+        matrix = []
+
+        for indices, data in self:
+            row = [0] * self.n_cols
+            for col, value in zip(indices, data):
+                row[col] = value
+            matrix.append(row)
+
+        return matrix
+
+
+def _write_model(path: str, header: dict, sections: dict) -> None:
+    """
+    Записывает модель в файл: MODEL_MAGIC, длина заголовка (8 байт),
+    заголовок в JSON и секции-массивы подряд. Каждая секция начинается
+    с адреса, кратного 8 байтам, что бы ее можно было читать как массив
+    чисел прямо из mmap
+
+    Args:
+        path (str): Путь к файлу
+        header (dict): Параметры модели, которые можно записать в JSON
+        sections (dict): Название секции - array
+    """
+    layout = {}
+    offset = 0
+    for name, values in sections.items():
+        layout[name] = [values.typecode, offset, len(values)]
+        size = len(values) * values.itemsize
+        offset += size + -size % 8
+
+    header = dict(header, byteorder=sys.byteorder, sections=layout)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+
+    with open(path, 'wb') as file:
+        file.write(MODEL_MAGIC)
+        file.write(len(header_bytes).to_bytes(8, 'little'))
+        file.write(header_bytes)
+        for values in sections.values():
+            values.tofile(file)
+            file.write(bytes(-len(values) * values.itemsize % 8))
+
+
+class _ModelFile:
+    """
+    Файл модели, отображенный в память через mmap. Секции отдаются как
+    memoryview без копирования, поэтому процессы, загрузившие одну и ту
+    же модель, читают одни и те же страницы из page cache
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Открывает файл и читает заголовок
+
+        Args:
+            path (str): Путь к файлу, записанному через _write_model
+
+        Raises:
+            ValueError: Файл не является сохраненной моделью
+        """
+        self.path = os.fspath(path)
+
+        with open(self.path, 'rb') as file:
+            if file.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f'{self.path} не является файлом модели')
+            header_size = int.from_bytes(file.read(8), 'little')
+            self.header = json.loads(file.read(header_size))
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError('Модель сохранена на машине с другим '
+                             'порядком байт')
+
+        self._start = len(MODEL_MAGIC) + 8 + header_size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.header['sections']
+
+    def section(self, name: str) -> memoryview:
+        """
+        Секция файла без копирования
+
+        Args:
+            name (str): Название секции
+
+        Returns:
+            memoryview: Массив с тем же typecode, что и при записи
+        """
+        typecode, offset, length = self.header['sections'][name]
+        start = self._start + offset
+        end = start + length * array(typecode).itemsize
+
+        return memoryview(self._mmap)[start:end].cast(typecode)
+
+    def __reduce__(self):
+        # mmap нельзя передать в другой процесс, поэтому там файл
+        # открывается заново (и попадает на те же страницы page cache)
+        return _ModelFile, (self.path,)
+
+
+def _index_sections(name: str, keys: Iterable, encode) -> dict:
+    """
+    Секции для _MappedIndex: ключи подряд в одном блоке байт,
+    границы ключей и хэш-таблица с открытой адресацией,
+    в которой хранятся номера ключей + 1 (0 - пустая ячейка)
+
+    Args:
+        name (str): Префикс названий секций
+        keys (Iterable): Ключи в порядке номеров
+        encode (callable): Перевод ключа в bytes
+
+    Returns:
+        dict: Название секции - array
+    """
+    encoded = [encode(key) for key in keys]
+
+    # таблица заполнена не больше чем наполовину, поэтому
+    # цепочки проб короткие, а пустая ячейка всегда найдется
+    size = 1
+    while size < 2 * len(encoded):
+        size *= 2
+    mask = size - 1
+    table = array('q', bytes(8 * size))
+    for indx, key in enumerate(encoded, 1):
+        slot = zlib.crc32(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = indx
+
+    blob = array('B')
+    for key in encoded:
+        blob.frombytes(key)
+
+    return {name + '.offsets': array('q', accumulate(map(len, encoded),
+                                                     initial=0)),
+            name + '.blob': blob,
+            name + '.table': table}
+
+
+class _MappedIndex(Mapping):
+    """
+    Словарь строка - номер, который читается прямо из файла модели
+    и не создает объектов для всех ключей при загрузке.
+    Поиск идет по хэш-таблице из _index_sections
+    """
+
+    def __init__(self, model_file: _ModelFile, name: str) -> None:
+        """
+        Инициализация
+
+        Args:
+            model_file (_ModelFile): Открытый файл модели
+            name (str): Префикс названий секций
+        """
+        self._model_file = model_file
+        self._name = name
+        self._offsets = model_file.section(name + '.offsets')
+        self._blob = model_file.section(name + '.blob')
+        self._table = model_file.section(name + '.table')
+
+    @staticmethod
+    def encode(key: str) -> bytes:
+        """
+        Ключ в том виде, в котором он хранится в файле
+        """
+        if type(key) is not str:
+            raise TypeError
+        return key.encode('utf-8', 'surrogatepass')
+
+    @staticmethod
+    def decode(key: memoryview) -> str:
+        """
+        Обратное к encode
+        """
+        return str(key, 'utf-8', 'surrogatepass')
+
+    def key_at(self, indx: int):
+        """
+        Ключ с номером indx
+        """
+        return self.decode(self._blob[self._offsets[indx]:
+                                      self._offsets[indx + 1]])
+
+    def get(self, key, default=None):
+        """
+        Номер ключа за одно вычисление crc32 и несколько сравнений
+        байт, без создания строк из файла
+        """
+        try:
+            encoded = self.encode(key)
+        except TypeError:
+            return default
+
+        table = self._table
+        offsets = self._offsets
+        mask = len(table) - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            indx = table[slot]
+            if not indx:
+                return default
+            indx -= 1
+            if self._blob[offsets[indx]:offsets[indx + 1]] == encoded:
+                return indx
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, key) -> int:
+        indx = self.get(key)
+        if indx is None:
+            raise KeyError(key)
+        return indx
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self) -> Iterator:
+        return map(self.key_at, range(len(self)))
+
+    def __reduce__(self):
+        return type(self), (self._model_file, self._name)
+
+
+class _MappedNgramIndex(_MappedIndex):
+    """
+    _MappedIndex, где ключи - кортежи номеров слов n-граммы
+    """
+
+    @staticmethod
+    def encode(key: tuple) -> bytes:
+        # кортеж с None (слово не из словаря) дает TypeError
+        return array('q', key).tobytes()
+
+    @staticmethod
+    def decode(key: memoryview) -> tuple:
+        return tuple(key.cast('q'))
+
+
+class _MappedKeys(Sequence):
+    """
+    Список ключей _MappedIndex по номерам (feature_names загруженной
+    модели). Строки создаются только при обращении к ним
+    """
+
+    def __init__(self, index: _MappedIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._index.key_at(indx)
+                    for indx in range(len(self))[i]]
+        return self._index.key_at(range(len(self))[i])
+
+
 class CountVectorizer:
     """
     Упрощенная версия класса CountVectorizer из sklearn,
@@ -6,7 +482,11 @@ class CountVectorizer:
     """
 
     def __init__(self, lowercase: bool = True, stop_words: list = None,
-                 sort: str = 'original') -> None:
+                 sort: str = 'original', sparse: bool = False,
+                 n_jobs: int = 1, token_pattern: str = None,
+                 tokenizer=None, ngram_range: tuple = (1, 1),
+                 min_df=1, max_df=1.0, max_features: int = None,
+                 cache_size: int = None, dtype: str = None) -> None:
         """
         Инициализация класса
 
@@ -14,8 +494,9 @@ class CountVectorizer:
             lowercase (bool, optional): Нужно ли преобразовывать
             тексты в нижний регистр. Defaults to True.
 
-            stop_words (list, optional): Список стоп слов или 'english' для
-            стоп слов английского языка. Defaults to None.
+            stop_words (list, optional): Список (или множество) стоп слов
+            или 'english' для стоп слов английского языка. Стоп слова
+            сравниваются с уже очищенными токенами. Defaults to None.
 
             sort (str, optional): Порядок добавления слов в
             document-term matrix.
@@ -24,10 +505,63 @@ class CountVectorizer:
             'alphabetical' для добавления в алфавитном порядке. Defaults
             to 'original'
 
+            sparse (bool, optional): Возвращать ли document-term matrix
+            в виде CSRMatrix вместо списка списков. Defaults to False.
+
+            n_jobs (int, optional): Количество процессов для fit и
+            transform. -1 для всех ядер процессора. Defaults to 1.
+
+            token_pattern (str, optional): Регулярное выражение, все
+            совпадения с которым в тексте считаются токенами. Если не
+            указано, то текст делится по пробелам, а из слов удаляются
+            все символы, кроме букв и цифр. Defaults to None.
+
+            tokenizer (callable, optional): Своя функция, которая делит
+            текст на список токенов. Важнее, чем token_pattern.
+            При n_jobs > 1 должна быть picklable. Defaults to None.
+
+            ngram_range (tuple, optional): Минимальная и максимальная
+            длина n-грамм, например (1, 2) для слов и пар слов.
+            Defaults to (1, 1).
+
+            min_df (int | float, optional): Слова, которые встречаются
+            меньше чем в min_df текстах (или в меньшей доле текстов, если
+            передано дробное число), не попадают в словарь. Defaults to 1.
+
+            max_df (int | float, optional): Слова, которые встречаются
+            больше чем в max_df текстах (или в большей доле текстов, если
+            передано дробное число), не попадают в словарь.
+            Defaults to 1.0.
+
+            max_features (int, optional): Оставить в словаре только
+            max_features самых частых по всему корпусу слов.
+            Defaults to None.
+
+            cache_size (int, optional): Сколько последних различных
+            текстов помнит transform вместе с их счетчиками слов, что бы
+            не токенизировать повторяющиеся тексты заново (LRU кэш).
+            Работает при n_jobs=1 и очищается, когда меняется словарь.
+            None - без кэша. Defaults to None.
+
+            dtype (str, optional): Тип счетчиков: 'uint8', 'uint16',
+            'uint32' или 'int64'. Строки матрицы (и данные CSRMatrix)
+            хранятся в array с 1, 2, 4 или 8 байтами на ячейку.
+            None - строки плотной матрицы это списки int, а CSRMatrix
+            хранит 'int64'. Defaults to None.
+
         Raises:
             ValueError: Неправильный тип данных для lowercase
             ValueError: Неправильный тип данных для stop_words
             ValueError: Неправильный тип данных для sort
+            ValueError: Неправильный тип данных для sparse
+            ValueError: Неправильное значение n_jobs
+            ValueError: Неправильный тип данных для token_pattern
+            ValueError: Неправильный тип данных для tokenizer
+            ValueError: Неправильное значение ngram_range
+            ValueError: Неправильное значение min_df или max_df
+            ValueError: Неправильное значение max_features
+            ValueError: Неправильное значение cache_size
+            ValueError: Неправильное значение dtype
         """
         # Проверка на тип lowercase
         if type(lowercase) is not bool:
@@ -40,17 +574,13 @@ class CountVectorizer:
             # Если выбрано 'english', то используется файлик со стоп словами
             # из английского языка
             if stop_words == 'english':
-                self.stop_words = []
-                with open('HW03\\stopwords.txt', 'r') as file:
-                    for line in file:
-                        word = line.strip()
-                        self.stop_words.append(word)
+                self.stop_words = _load_stop_words()
 
             # Если передан список, то смотрим что б элементами списка были
-            # строки
-            elif type(stop_words) is list \
+            # строки. Храним как frozenset, что бы проверка была за O(1)
+            elif type(stop_words) in (list, tuple, set, frozenset) \
                     and all(isinstance(word, str) for word in stop_words):
-                self.stop_words = stop_words
+                self.stop_words = frozenset(stop_words)
             # иначе ошибка
             else:
                 raise ValueError('Неправильный формат stop_words')
@@ -69,21 +599,110 @@ class CountVectorizer:
             raise ValueError('sort должен быть либо "original",\
                              либо "alphabetical"')
 
-    def _remove_non_alnum(self, word: str) -> str:
-        """
-        Удаляет из слова все символы, которые не буквы и не числа.
-        Начинается с '_' потому что функция для внутреннего пользования
+        # Проверка на тип sparse
+        if type(sparse) is not bool:
+            raise ValueError('Параметр sparse должен быть True или False')
 
-        Args:
-            word (str): Слово
+        self.sparse = sparse
 
-        Returns:
-            str: Слово только с числами или буквами
-        """
-        # для каждого слова убираем символы, которые не alnum
-        new_word = ''.join(symbol for symbol in word if symbol.isalnum())
+        # Проверка n_jobs
+        if type(n_jobs) is not int or (n_jobs < 1 and n_jobs != -1):
+            raise ValueError('n_jobs должен быть натуральным числом или -1')
+
+        self.n_jobs = n_jobs
+
+        # Проверка token_pattern, регулярку компилируем один раз
+        if token_pattern is None:
+            self.token_pattern = None
+        elif type(token_pattern) is str:
+            self.token_pattern = re.compile(token_pattern)
+        else:
+            raise ValueError('token_pattern должен быть строкой')
+
+        # Проверка tokenizer
+        if tokenizer is not None and not callable(tokenizer):
+            raise ValueError('tokenizer должен быть функцией')
+
+        self.tokenizer = tokenizer
+
+        # Проверка ngram_range
+        if type(ngram_range) is not tuple or len(ngram_range) != 2 \
+                or not all(type(n) is int for n in ngram_range) \
+                or not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError('ngram_range должен быть кортежем (min_n, max_n),'
+                             ' где 1 <= min_n <= max_n')
+
+        self.ngram_range = ngram_range
+
+        # для n-грамм: номер каждого слова и словарь, где ключ - кортеж
+        # номеров слов n-граммы, значение - индекс в document-term matrix.
+        # Так при подсчете не создаются строки для каждой n-граммы
+        self._token_ids = {}
+        self._ngram_index = {}
+
+        # Проверка min_df и max_df: целое число - количество текстов,
+        # дробное - доля текстов
+        for name, value in [('min_df', min_df), ('max_df', max_df)]:
+            if not (type(value) is int and value >= 0
+                    or type(value) is float and 0.0 <= value <= 1.0):
+                raise ValueError(f'{name} должен быть целым числом >= 0 '
+                                 'или дробным числом от 0 до 1')
+
+        self.min_df = min_df
+        self.max_df = max_df
+
+        # Проверка max_features
+        if max_features is not None \
+                and (type(max_features) is not int or max_features < 1):
+            raise ValueError('max_features должен быть натуральным числом')
+
+        self.max_features = max_features
+
+        # для отбора слов при fit нужны частоты: в скольких текстах
+        # встречается слово и сколько раз всего, по номерам столбцов.
+        # Тип важен: max_df=1 - не больше одного текста, а 1.0 - все
+        # тексты, min_df=1 - хотя бы один текст, а 1.0 - все тексты
+        self._pruning = not (type(min_df) is int and min_df == 1) \
+            or not (type(max_df) is float and max_df == 1.0) \
+            or max_features is not None
+        self._document_counts = array('q')
+        self._term_counts = array('q')
+        self._n_documents = 0
 
-        return new_word
+        # слова, которые были в корпусе, но не попали в словарь
+        # из-за min_df, max_df или max_features
+        self.stop_words_ = set()
+        # их частоты, что бы следующий fit отбирал по частотам за все
+        # время обучения: слово - (кортеж номеров слов n-граммы или None,
+        # в скольких текстах встречается, сколько раз всего)
+        self._pruned_counts = {}
+
+        # Проверка cache_size
+        if cache_size is not None \
+                and (type(cache_size) is not int or cache_size < 1):
+            raise ValueError('cache_size должен быть натуральным числом '
+                             'или None')
+
+        self.cache_size = cache_size
+
+        # Проверка dtype
+        if dtype is not None and dtype not in COUNT_DTYPES:
+            raise ValueError('dtype должен быть одним из '
+                             f'{", ".join(COUNT_DTYPES)} или None')
+
+        self.dtype = dtype
+        self._typecode = COUNT_DTYPES.get(dtype)
+
+        # текст - счетчик его слов, от давно использованных к недавним
+        self._cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # слова по алфавиту и номера их столбцов для поиска по префиксу,
+        # строятся при первом поиске
+        self._prefix_index = None
+
+        self.fitted = False  # флажок, что был вызван fit
 
     def _tokenize(self, text: str) -> list:
         """
@@ -103,104 +722,1080 @@ class CountVectorizer:
         if self.lowercase:
             text = text.lower()
 
+        # токенизатор, выбранный пользователем
+        if self.tokenizer is not None or self.token_pattern is not None:
+            if self.tokenizer is not None:
+                words = self.tokenizer(text)
+            else:
+                words = self.token_pattern.findall(text)
+
+            if self.stop_words:
+                words = [word for word in words
+                         if word not in self.stop_words]
+
+            return words
+
         # делим слова по пробелам
         words = text.split()
-        # в зависимости от наличия списка стоп слов убираем non alphanumeric
-        # условие any(...) нужно для того, что бы отсеять случаи, когда есть
-        # слово, состоящее только из non alphanumeric символов
+        # из каждого слова одной заранее скомпилированной регуляркой
+        # убираем non alphanumeric. Если от слова ничего не осталось, значит
+        # оно состояло только из non alphanumeric символов и отбрасывается.
+        # Стоп слова проверяются уже после очистки, что бы 'the,' тоже
+        # считалось стоп словом
+        remove_non_alnum = NON_ALNUM_RE.sub
         if self.stop_words:
-            words = [self._remove_non_alnum(word) for word in words if word
-                     not in self.stop_words and any(c.isalnum() for c in word)]
+            stop_words = self.stop_words
+            words = [token for word in words
+                     if (token := remove_non_alnum('', word))
+                     and token not in stop_words]
         else:
-            words = [self._remove_non_alnum(word) for word in words if
-                     any(c.isalnum() for c in word)]
+            words = [token for word in words
+                     if (token := remove_non_alnum('', word))]
 
         return words
 
-    def fit(self, corpus: list) -> None:
+    def _count_words(self, words: list, vocabulary: dict) -> dict:
         """
-        Создает список всех слов из корпуса, а так же
-        считает их количество
+        Считает слова текста за один проход по списку токенов.
+        Слова, которых нет в словаре, пропускаются
 
         Args:
-            corpus (list): Список текстов
+            words (list): Список токенов
+            vocabulary (dict): Словарь слово - номер столбца
+
+        Returns:
+            dict: Номер столбца - количество слова в тексте
         """
-        # для каждого текста будем токенизировать слова
-        for text in corpus:
-            words = self._tokenize(text)
-            # для каждого нового слова будем добавлять его в словарик
-            # и добавлять в список всех слов
-            for word in words:
-                if word not in self.vocabulary:
-                    self.vocabulary[word] = len(self.vocabulary)
-                    self.feature_names.append(word)
+        text_count = {}
 
-        # учитываем сортировку
-        if self.sort == 'alphabetical':
-            self.feature_names = sorted(self.feature_names)
+        if self.ngram_range != (1, 1):
+            # слова, которых не было при обучении, получают номер None,
+            # и n-граммы с ними не найдутся в словаре
+            ids = [self._token_ids.get(word) for word in words]
+            ngram_index = self._ngram_index
+            min_n, max_n = self.ngram_range
+            for n in range(min_n, max_n + 1):
+                for key in zip(*(ids[k:] for k in range(n))):
+                    indx = ngram_index.get(key)
+                    if indx is not None:
+                        text_count[indx] = text_count.get(indx, 0) + 1
 
-        # указываем флажок для фит
-        self.fitted = True
+            return text_count
 
-    def transform(self, corpus: list) -> list:
+        for word in words:
+            indx = vocabulary.get(word)
+            if indx is not None:
+                text_count[indx] = text_count.get(indx, 0) + 1
+
+        return text_count
+
+    def _ngram_keys(self, tokens: list) -> Iterator:
         """
-        Преобразования корпуса текстов в document-term matrix
+        Все n-граммы текста скользящим окном по списку токенов,
+        без склеивания слов в строки
+
+        Args:
+            tokens (list): Токены текста (слова или их номера)
+
+        Yields:
+            tuple: Кортеж из n подряд идущих токенов
+        """
+        min_n, max_n = self.ngram_range
+
+        for n in range(min_n, max_n + 1):
+            yield from zip(*(tokens[k:] for k in range(n)))
+
+    def _terms(self, words: list) -> list:
+        """
+        Признаки текста в том виде, в котором их можно передать
+        между процессами: сами слова или кортежи слов для n-грамм
 
         Args:
-            corpus (list): Список текстов
+            words (list): Список токенов
 
         Returns:
-            list: Document-term matrix
+            list: Слова или кортежи слов
         """
-        # трансформ можно применить только после фит
-        if not self.fitted:
-            raise RuntimeError('Метод transform можно вызывать только после \
-                               вызова метода fit.')
+        if self.ngram_range == (1, 1):
+            return words
 
-        matrix = []  # document-term matrix
+        return list(self._ngram_keys(words))
 
-        # для каждого текста в корпусе будем токенизировать его и
-        # добавлять счетчик
-        for text in corpus:
-            words = self._tokenize(text)
-            text_count = [words.count(word) for word in self.feature_names]
-            matrix.append(text_count)
+    def _add_ngram(self, key: tuple, words: list) -> None:
+        """
+        Добавляет n-грамму в словарь, если ее там еще нет
 
-        return matrix
+        Args:
+            key (tuple): Кортеж номеров слов n-граммы
+            words (list): Слова n-граммы
+        """
+        if key not in self._ngram_index:
+            indx = len(self.feature_names)
+            # строка создается только один раз, для названия признака
+            word = ' '.join(words)
+            self._ngram_index[key] = indx
+            self.vocabulary[word] = indx
+            self.feature_names.append(word)
+
+    def _add_terms(self, terms: Iterable) -> None:
+        """
+        Добавляет в словарь признаки, полученные из _terms
+
+        Args:
+            terms (Iterable): Слова или кортежи слов
+        """
+        if self.ngram_range == (1, 1):
+            self._update_vocabulary(terms)
+            return
 
-    def fit_transform(self, corpus: list) -> list:
+        token_ids = self._token_ids
+        for term in terms:
+            key = tuple(token_ids.setdefault(word, len(token_ids))
+                        for word in term)
+            self._add_ngram(key, term)
+
+    def _term_column(self, term) -> int:
         """
-        Одновременный fit и transform
+        Номер столбца признака, полученного из _terms
 
         Args:
-            corpus (list): Список текстов
+            term (str | tuple): Слово или кортеж слов
 
         Returns:
-            list: Document-term matrix
+            int: Номер столбца
         """
+        if self.ngram_range == (1, 1):
+            return self.vocabulary[term]
 
-        self.fit(corpus)
+        return self._ngram_index[tuple(self._token_ids[word]
+                                       for word in term)]
 
-        return self.transform(corpus)
+    def _build_index(self) -> None:
+        """
+        Перестраивает self.vocabulary так, что бы индекс каждого слова
+        совпадал с его позицией в self.feature_names.
+        Словарь обновляется на месте, поэтому все, кто хранит на него
+        ссылку, видят одинаковые номера столбцов.
+        Частоты для отбора слов переставляются вместе со столбцами
+        """
+        index = {word: i for i, word in enumerate(self.feature_names)}
 
-    def get_feature_names(self) -> list:
+        # у n-грамм номера столбцов хранятся еще и по кортежам номеров слов
+        if self._ngram_index:
+            new_indices = [0] * len(index)
+            for word, indx in self.vocabulary.items():
+                new_indices[indx] = index[word]
+            for key, indx in self._ngram_index.items():
+                self._ngram_index[key] = new_indices[indx]
+
+        if self._document_counts:
+            # старый номер столбца для каждого нового
+            old_indices = [self.vocabulary[word]
+                           for word in self.feature_names]
+            self._document_counts = array(
+                'q', map(self._document_counts.__getitem__, old_indices))
+            self._term_counts = array(
+                'q', map(self._term_counts.__getitem__, old_indices))
+
+        self.vocabulary.clear()
+        self.vocabulary.update(index)
+
+    def _map_chunks(self, func, corpus: Iterable) -> Iterator:
         """
-        Получение всех слов в текстах корпуса текстов
+        Делит корпус на куски по PARALLEL_CHUNK_SIZE текстов и применяет
+        к ним func в пуле процессов. Результаты отдаются в порядке кусков,
+        а в обработке одновременно не больше 2 * n_jobs кусков
 
-        Returns:
-            list: Список всех слов корпуса текстов
+        Args:
+            func (callable): Функция-воркер от списка текстов
+            corpus (Iterable): Тексты корпуса
+
+        Yields:
+            Any: Результат func для очередного куска
         """
+        n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        corpus = iter(corpus)
 
-        return self.feature_names
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            pending = deque()
+            while True:
+                texts = list(islice(corpus, PARALLEL_CHUNK_SIZE))
+                if not texts:
+                    break
+                pending.append(executor.submit(func, texts))
+                if len(pending) >= 2 * n_jobs:
+                    yield pending.popleft().result()
 
+            while pending:
+                yield pending.popleft().result()
 
-if __name__ == '__main__':
-    corpus = [
-        'Crock Pot Pasta Never boil pasta again',
-        'Pasta Pomodoro Fresh ingredients Parmesan to taste'
+    def _update_vocabulary(self, words: list) -> None:
+        """
+        Добавляет новые слова текста в словарь и в список всех слов
+
+        Args:
+            words (list): Список токенов
+        """
+        if self.ngram_range != (1, 1):
+            token_ids = self._token_ids
+            ids = [token_ids.setdefault(word, len(token_ids))
+                   for word in words]
+            min_n, max_n = self.ngram_range
+            for n in range(min_n, max_n + 1):
+                for i, key in enumerate(zip(*(ids[k:] for k in range(n)))):
+                    if key not in self._ngram_index:
+                        self._add_ngram(key, words[i:i + n])
+            return
+
+        for word in words:
+            if word not in self.vocabulary:
+                self.vocabulary[word] = len(self.vocabulary)
+                self.feature_names.append(word)
+
+    def _update_counts(self, text_count: dict, n_documents: int = 1,
+                       document_count: dict = None) -> None:
+        """
+        Добавляет частоты текста (или куска корпуса) к частотам
+        слов, по которым потом отбирается словарь
+
+        Args:
+            text_count (dict): Номер столбца - сколько раз встречается
+            n_documents (int, optional): Сколько текстов учтено в
+            text_count. Defaults to 1.
+            document_count (dict, optional): Номер столбца - в скольких
+            текстах встречается. Если не передан, то каждое слово
+            встречается в одном тексте. Defaults to None.
+        """
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+
+        # массивы растут вместе со словарем
+        missing = len(self.feature_names) - len(document_counts)
+        if missing > 0:
+            document_counts.extend([0] * missing)
+            term_counts.extend([0] * missing)
+
+        for indx, count in text_count.items():
+            term_counts[indx] += count
+            if document_count is None:
+                document_counts[indx] += 1
+            else:
+                document_counts[indx] += document_count[indx]
+
+        self._n_documents += n_documents
+
+    def _prune(self) -> None:
+        """
+        Убирает из словаря слова по min_df, max_df и max_features.
+        Отбор идет за один проход по частотам, а max_features самых
+        частых слов выбираются через кучу, без сортировки всего словаря.
+        Слова, убранные прошлым отбором, сначала возвращаются в словарь
+        со своими частотами и отбираются заново.
+        Убранные слова попадают в stop_words_
+        """
+        self._restore_pruned()
+
+        n_documents = self._n_documents
+        min_count = self.min_df if type(self.min_df) is int \
+            else math.ceil(self.min_df * n_documents)
+        max_count = self.max_df if type(self.max_df) is int \
+            else math.floor(self.max_df * n_documents)
+        if max_count < min_count:
+            raise ValueError('При таких min_df и max_df в словаре '
+                             'не останется слов')
+
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+        kept = (indx for indx in range(len(self.feature_names))
+                if min_count <= document_counts[indx] <= max_count)
+
+        if self.max_features is not None:
+            # при равной частоте остаются слова, встреченные раньше
+            kept = sorted(heapq.nlargest(self.max_features, kept,
+                                         key=term_counts.__getitem__))
+        else:
+            kept = list(kept)
+
+        self.stop_words_.clear()
+        if len(kept) == len(self.feature_names):
+            return
+
+        new_indices = {indx: i for i, indx in enumerate(kept)}
+        pruned_keys = {}
+        for key, indx in list(self._ngram_index.items()):
+            if indx in new_indices:
+                self._ngram_index[key] = new_indices[indx]
+            else:
+                pruned_keys[indx] = key
+                del self._ngram_index[key]
+
+        for indx, word in enumerate(self.feature_names):
+            if indx not in new_indices:
+                self._pruned_counts[word] = (pruned_keys.get(indx),
+                                             document_counts[indx],
+                                             term_counts[indx])
+        self.stop_words_.update(self._pruned_counts)
+
+        self.feature_names[:] = [self.feature_names[indx] for indx in kept]
+        self._document_counts = array('q', (document_counts[indx]
+                                            for indx in kept))
+        self._term_counts = array('q', (term_counts[indx] for indx in kept))
+
+        self.vocabulary.clear()
+        self.vocabulary.update((word, i) for i, word in
+                               enumerate(self.feature_names))
+
+    def _restore_pruned(self) -> None:
+        """
+        Возвращает в конец словаря слова, убранные прошлым отбором,
+        и добавляет их частоты (к столбцу слова, если оно снова
+        встретилось в корпусе)
+        """
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+
+        missing = len(self.feature_names) - len(document_counts)
+        if missing > 0:
+            document_counts.extend([0] * missing)
+            term_counts.extend([0] * missing)
+
+        for word, (key, document_count, term_count) in \
+                self._pruned_counts.items():
+            indx = self.vocabulary.get(word)
+            if indx is None:
+                indx = len(self.feature_names)
+                if key is not None:
+                    self._ngram_index[key] = indx
+                self.vocabulary[word] = indx
+                self.feature_names.append(word)
+                document_counts.append(0)
+                term_counts.append(0)
+            document_counts[indx] += document_count
+            term_counts[indx] += term_count
+
+        self._pruned_counts.clear()
+
+    def _finish_fit(self) -> None:
+        """
+        Завершает обучение: отбирает слова, учитывает сортировку
+        и ставит флажок fitted
+        """
+        if self._pruning:
+            self._prune()
+
+        # учитываем сортировку
+        if self.sort == 'alphabetical':
+            # сортируем на месте, что бы ссылки на feature_names
+            # (например, в TfidfTransformer) оставались актуальными
+            self.feature_names.sort()
+            self._build_index()
+
+        # указываем флажок для фит
+        self.fitted = True
+
+    def _new_matrix(self) -> list:
+        """
+        Создает пустую document-term matrix нужного формата
+
+        Returns:
+            list: Пустой список или пустая CSRMatrix, если sparse=True
+        """
+        if self.sparse:
+            return CSRMatrix(n_cols=len(self.feature_names),
+                             typecode=self._typecode or 'q')
+
+        return []
+
+    def _make_row(self, text_count: dict):
+        """
+        Превращает счетчик слов текста в строку document-term matrix
+
+        Args:
+            text_count (dict): Номер столбца - количество слова в тексте
+
+        Raises:
+            OverflowError: Счетчик не помещается в dtype
+
+        Returns:
+            list | tuple: Список счетчиков по всем столбцам (array,
+            если задан dtype) или, если sparse=True, пара
+            (номера столбцов, счетчики)
+        """
+        typecode = self._typecode
+
+        try:
+            if self.sparse:
+                # в разреженную матрицу кладем только ненулевые счетчики
+                indices = sorted(text_count)
+                counts = [text_count[i] for i in indices]
+                if typecode is not None:
+                    counts = array(typecode, counts)
+                return indices, counts
+
+            if typecode is None:
+                row = [0] * len(self.feature_names)
+            else:
+                row = array(typecode, bytes(len(self.feature_names)
+                                            * array(typecode).itemsize))
+            for i, count in text_count.items():
+                row[i] = count
+        except OverflowError:
+            raise OverflowError(f'Счетчик слова в тексте не помещается '
+                                f'в dtype={self.dtype}') from None
+
+        return row
+
+    def _append_row(self, matrix: list, row) -> None:
+        """
+        Добавляет строку, полученную из _make_row, в матрицу
+        """
+        if self.sparse:
+            matrix.append_row(*row)
+        else:
+            matrix.append(row)
+
+    def _add_corpus(self, corpus: Iterable) -> None:
+        """
+        Добавляет в словарь новые слова корпуса (в конец, не трогая
+        номера уже известных слов) и, если нужно, их частоты
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+        self._materialize()
+        self._vocabulary_changed()
+
+        # для каждого текста будем токенизировать слова
+        # и добавлять новые слова в словарик и в список всех слов
+        if self.n_jobs == 1:
+            for text in corpus:
+                words = self._tokenize(text)
+                self._update_vocabulary(words)
+                # частоты считаются в том же проходе по корпусу
+                if self._pruning:
+                    self._update_counts(
+                        self._count_words(words, self.vocabulary))
+        else:
+            # частичные словари кусков объединяются в порядке кусков,
+            # поэтому порядок слов такой же, как при n_jobs=1
+            for n_texts, document_counts, term_counts in \
+                    self._map_chunks(_fit_chunk, corpus):
+                self._add_terms(document_counts)
+                if self._pruning:
+                    self._update_counts(
+                        {self._term_column(term): count
+                         for term, count in term_counts.items()},
+                        n_documents=n_texts,
+                        document_count={
+                            self._term_column(term): count
+                            for term, count in document_counts.items()})
+
+    def fit(self, corpus: Iterable) -> None:
+        """
+        Создает список всех слов из корпуса, а так же
+        считает их количество.
+        Корпус читается за один проход, поэтому можно передать
+        генератор или открытый файл, в котором каждая строка - это текст
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+        self._add_corpus(corpus)
+        self._finish_fit()
+
+    def partial_fit(self, corpus: Iterable) -> None:
+        """
+        Дообучение на новой порции текстов: новые слова добавляются
+        в конец словаря, а номера столбцов уже известных слов
+        не меняются, поэтому старые document-term matrix остаются
+        верными (в них просто меньше столбцов).
+        Поэтому при partial_fit не применяются sort='alphabetical',
+        min_df, max_df и max_features: они переставили бы или убрали
+        столбцы. Частоты для них копятся, и их учтет следующий fit
+
+        Args:
+            corpus (Iterable): Новые тексты
+        """
+        self._add_corpus(corpus)
+        self.fitted = True
+
+    def _iter_rows(self, corpus: Iterable) -> Iterator:
+        """
+        Строки document-term matrix для каждого текста корпуса
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Yields:
+            list | tuple: Строка в формате _make_row
+        """
+        if self.n_jobs != 1:
+            for rows in self._map_chunks(_transform_chunk, corpus):
+                yield from rows
+            return
+
+        # для каждого текста в корпусе будем токенизировать его и
+        # добавлять счетчик
+        if self.cache_size is None:
+            for text in corpus:
+                text_count = self._count_words(self._tokenize(text),
+                                               self.vocabulary)
+                yield self._make_row(text_count)
+            return
+
+        for text in corpus:
+            yield self._make_row(self._cached_count(text))
+
+    def _cached_count(self, text: str) -> dict:
+        """
+        Счетчик слов текста из LRU кэша, а если его там нет, то
+        посчитанный заново и положенный в кэш. Если кэш переполнен,
+        то из него убирается текст, который дольше всех не встречался
+
+        Args:
+            text (str): Текст
+
+        Returns:
+            dict: Номер столбца - количество слова в тексте
+        """
+        cache = self._cache
+        text_count = cache.get(text)
+
+        if text_count is not None:
+            cache.move_to_end(text)
+            self._cache_hits += 1
+            return text_count
+
+        self._cache_misses += 1
+        text_count = self._count_words(self._tokenize(text), self.vocabulary)
+        cache[text] = text_count
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        return text_count
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Статистика кэша transform
+
+        Returns:
+            CacheInfo: Попадания, промахи, cache_size и сколько
+            текстов сейчас в кэше
+        """
+        return CacheInfo(self._cache_hits, self._cache_misses,
+                         self.cache_size, len(self._cache))
+
+    def cache_clear(self) -> None:
+        """
+        Очищает кэш transform и его статистику
+        """
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _vocabulary_changed(self) -> None:
+        """
+        Сбрасывает все, что посчитано по старому словарю:
+        кэш transform и индекс для поиска по префиксу
+        """
+        self.cache_clear()
+        self._prefix_index = None
+
+    def __getstate__(self) -> dict:
+        # кэш и индекс по префиксам не передаются в процессы-воркеры
+        # и не сохраняются в pickle
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_prefix_index'] = None
+
+        return state
+
+    def transform_iter(self, corpus: Iterable,
+                       chunk_size: int = None) -> Iterator:
+        """
+        Лениво преобразует корпус в document-term matrix.
+        В памяти одновременно находится только один текст или один кусок
+        из chunk_size текстов
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+            chunk_size (int, optional): Если указан, то отдаются куски
+            матрицы по chunk_size строк в том же формате, что и у
+            transform. Иначе отдаются отдельные строки: список счетчиков
+            или пара (номера столбцов, счетчики), если sparse=True.
+            Defaults to None.
+
+        Raises:
+            RuntimeError: Метод вызван до fit
+            ValueError: Неправильное значение chunk_size
+
+        Yields:
+            list | tuple | CSRMatrix: Строка или кусок document-term matrix
+        """
+        # трансформ можно применить только после фит
+        if not self.fitted:
+            raise RuntimeError('Метод transform можно вызывать только после \
+                               вызова метода fit.')
+
+        if chunk_size is not None \
+                and (type(chunk_size) is not int or chunk_size < 1):
+            raise ValueError('chunk_size должен быть натуральным числом')
+
+        chunk = self._new_matrix()
+
+        for row in self._iter_rows(corpus):
+            if chunk_size is None:
+                yield row
+                continue
+
+            self._append_row(chunk, row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = self._new_matrix()
+
+        if chunk_size is not None and len(chunk):
+            yield chunk
+
+    def transform(self, corpus: Iterable) -> list:
+        """
+        Преобразования корпуса текстов в document-term matrix
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Document-term matrix (CSRMatrix, если sparse=True)
+        """
+        # трансформ можно применить только после фит
+        if not self.fitted:
+            raise RuntimeError('Метод transform можно вызывать только после \
+                               вызова метода fit.')
+
+        matrix = self._new_matrix()  # document-term matrix
+
+        # строки берутся не из transform_iter: у TfidfVectorizer
+        # он отдает уже веса, а не счетчики
+        for row in self._iter_rows(corpus):
+            self._append_row(matrix, row)
+
+        return matrix
+
+    def _collect_counts(self, corpus: Iterable) -> list:
+        """
+        Пополняет словарь, как _add_corpus, и запоминает счетчик слов
+        каждого текста. Номера столбцов идут в порядке появления слов
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Номер столбца - количество слова, для каждого текста
+        """
+        self._materialize()
+        self._vocabulary_changed()
+
+        counts = []
+        if self.n_jobs == 1:
+            for text in corpus:
+                words = self._tokenize(text)
+                self._update_vocabulary(words)
+                counts.append(self._count_words(words, self.vocabulary))
+                if self._pruning:
+                    self._update_counts(counts[-1])
+        else:
+            # токенизация идет в процессах, а словарь пополняется здесь
+            # в порядке текстов, как и при n_jobs=1
+            for term_counts in self._map_chunks(_count_chunk, corpus):
+                for term_count in term_counts:
+                    self._add_terms(term_count)
+                    counts.append({self._term_column(term): count
+                                   for term, count in term_count.items()})
+                    if self._pruning:
+                        self._update_counts(counts[-1])
+
+        return counts
+
+    def fit_transform(self, corpus: Iterable) -> list:
+        """
+        Одновременный fit и transform.
+        Каждый текст токенизируется один раз, поэтому корпус
+        может быть генератором
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Document-term matrix (CSRMatrix, если sparse=True)
+        """
+        # пока словарь строится, номера столбцов идут в порядке
+        # появления слов, поэтому запоминаем счетчики по этим номерам
+        counts = self._collect_counts(corpus)
+
+        original_order = list(self.feature_names)
+        self._finish_fit()
+
+        # после отбора слов и сортировки номера столбцов могли поменяться,
+        # а у убранных слов столбца больше нет
+        if self.sort == 'alphabetical' or self._pruning:
+            new_indices = [self.vocabulary.get(word)
+                           for word in original_order]
+            counts = [{new_indices[i]: count for i, count in
+                       text_count.items() if new_indices[i] is not None}
+                      for text_count in counts]
+
+        matrix = self._new_matrix()  # document-term matrix
+
+        for text_count in counts:
+            self._append_row(matrix, self._make_row(text_count))
+
+        return matrix
+
+    def get_feature_names(self) -> list:
+        """
+        Получение всех слов в текстах корпуса текстов
+
+        Returns:
+            list: Список всех слов корпуса текстов
+        """
+
+        return self.feature_names
+
+    def get_feature_names_by_prefix(self, prefix: str) -> list:
+        """
+        Все слова словаря, которые начинаются с prefix, по алфавиту.
+        При первом вызове слова сортируются один раз, дальше поиск
+        идет бинарным поиском за O(log(размер словаря) + ответ)
+
+        Args:
+            prefix (str): Начало слова
+
+        Returns:
+            list: Пары (слово, номер столбца)
+        """
+        if self._prefix_index is None:
+            feature_names = self.get_feature_names()
+            # при sort='alphabetical' словарь уже почти отсортирован
+            # (кроме слов из partial_fit), и сортировка идет за O(n)
+            columns = array('l', sorted(range(len(feature_names)),
+                                        key=feature_names.__getitem__))
+            self._prefix_index = ([feature_names[indx] for indx in columns],
+                                  columns)
+
+        words, columns = self._prefix_index
+        start = bisect.bisect_left(words, prefix)
+        end = start
+        while end < len(words) and words[end].startswith(prefix):
+            end += 1
+
+        return list(zip(words[start:end], columns[start:end]))
+
+    def _params(self) -> dict:
+        """
+        Параметры __init__, по которым load заново создает векторайзер
+
+        Raises:
+            ValueError: Задан свой tokenizer, его нельзя записать в файл
+
+        Returns:
+            dict: Параметры, которые можно записать в JSON
+        """
+        if self.tokenizer is not None:
+            raise ValueError('Векторайзер со своим tokenizer нельзя '
+                             'сохранить')
+
+        return {
+            'lowercase': self.lowercase,
+            'stop_words': None if self.stop_words is None
+            else sorted(self.stop_words),
+            'sort': self.sort,
+            'sparse': self.sparse,
+            'n_jobs': self.n_jobs,
+            'token_pattern': None if self.token_pattern is None
+            else self.token_pattern.pattern,
+            'ngram_range': self.ngram_range,
+            'min_df': self.min_df,
+            'max_df': self.max_df,
+            'max_features': self.max_features,
+            'cache_size': self.cache_size,
+            'dtype': self.dtype,
+        }
+
+    def _header(self) -> dict:
+        """
+        Заголовок файла модели для _write_model
+
+        Returns:
+            dict: Класс, параметры и обученное состояние, которое
+            можно записать в JSON
+        """
+        return {'class': type(self).__name__, 'params': self._params(),
+                'fitted': self.fitted, 'n_documents': self._n_documents}
+
+    def _sections(self) -> dict:
+        """
+        Обученное состояние в виде массивов для _write_model
+
+        Returns:
+            dict: Название секции - array
+        """
+        sections = _index_sections('vocabulary', self.feature_names,
+                                   _MappedIndex.encode)
+
+        if self._ngram_index:
+            # у n-грамм номера столбцов ищутся по кортежам номеров слов
+            sections.update(_index_sections(
+                'token_ids', self._token_ids, _MappedIndex.encode))
+            ngram_keys = [None] * len(self._ngram_index)
+            for key, indx in self._ngram_index.items():
+                ngram_keys[indx] = key
+            sections.update(_index_sections(
+                'ngram_index', ngram_keys, _MappedNgramIndex.encode))
+
+        if self._pruning:
+            sections['document_counts'] = array('q', self._document_counts)
+            sections['term_counts'] = array('q', self._term_counts)
+
+        return sections
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет векторайзер в бинарный файл. Словарь хранится так,
+        что load отображает его в память через mmap, а не читает:
+        загрузка занимает миллисекунды при любом размере словаря,
+        а процессы, загрузившие один файл, делят одну копию в page cache.
+        stop_words_ и частоты убранных слов не сохраняются, поэтому
+        fit после load отбирает слова только по частотам словаря
+
+        Args:
+            path (str): Путь к файлу
+        """
+        _write_model(path, self._header(), self._sections())
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Загружает векторайзер, сохраненный через save.
+        Файл нельзя менять или удалять, пока векторайзер используется
+
+        Args:
+            path (str): Путь к файлу
+
+        Raises:
+            ValueError: В файле векторайзер другого класса
+
+        Returns:
+            CountVectorizer: Векторайзер, готовый к transform
+        """
+        model_file = _ModelFile(path)
+        header = model_file.header
+        if header['class'] != cls.__name__:
+            raise ValueError(f'В файле сохранен {header["class"]}, '
+                             f'а не {cls.__name__}')
+
+        params = header['params']
+        # JSON не отличает кортеж от списка
+        if 'ngram_range' in params:
+            params['ngram_range'] = tuple(params['ngram_range'])
+
+        vectorizer = cls(**params)
+        vectorizer._load_state(model_file)
+
+        return vectorizer
+
+    def _load_state(self, model_file: _ModelFile) -> None:
+        """
+        Подставляет обученное состояние из файла модели.
+        Словари остаются в файле, копий не создается
+
+        Args:
+            model_file (_ModelFile): Открытый файл модели
+        """
+        self.vocabulary = _MappedIndex(model_file, 'vocabulary')
+        self.feature_names = _MappedKeys(self.vocabulary)
+
+        if 'token_ids.table' in model_file:
+            self._token_ids = _MappedIndex(model_file, 'token_ids')
+            self._ngram_index = _MappedNgramIndex(model_file, 'ngram_index')
+
+        # частоты нужны только для обучения, их копируем одним блоком
+        if 'document_counts' in model_file:
+            self._document_counts.frombytes(
+                model_file.section('document_counts').cast('B'))
+            self._term_counts.frombytes(
+                model_file.section('term_counts').cast('B'))
+
+        self._n_documents = model_file.header['n_documents']
+        self.fitted = model_file.header['fitted']
+
+    def _materialize(self) -> None:
+        """
+        Копирует словари из файла модели в обычные dict и list,
+        что бы их можно было дополнять. Нужно перед fit загруженного
+        векторайзера
+        """
+        if isinstance(self.vocabulary, dict):
+            return
+
+        self.vocabulary = dict(self.vocabulary)
+        self.feature_names = list(self.feature_names)
+        self._token_ids = dict(self._token_ids)
+        self._ngram_index = dict(self._ngram_index)
+
+
+class HashingVectorizer(CountVectorizer):
+    """
+    Векторайзер без словаря: номер столбца слова - это стабильный хэш
+    слова по модулю n_features. Ничего не запоминает, поэтому transform
+    можно вызывать без fit, память не растет с корпусом, а разные процессы
+    получают одинаковые столбцы. Всегда возвращает CSRMatrix
+    """
+
+    def __init__(self, n_features: int = 2 ** 20,
+                 alternate_sign: bool = True, lowercase: bool = True,
+                 stop_words: list = None, n_jobs: int = 1,
+                 token_pattern: str = None, tokenizer=None,
+                 cache_size: int = None) -> None:
+        """
+        Инициализация класса
+
+        Args:
+            n_features (int, optional): Количество столбцов матрицы.
+            Defaults to 2 ** 20.
+
+            alternate_sign (bool, optional): Добавлять ли к счетчику знак,
+            зависящий от хэша, что бы коллизии в среднем гасили друг друга.
+            Defaults to True.
+
+            Остальные параметры такие же, как у CountVectorizer
+
+        Raises:
+            ValueError: Неправильное значение n_features
+            ValueError: Неправильный тип данных для alternate_sign
+        """
+        super().__init__(lowercase=lowercase, stop_words=stop_words,
+                         sparse=True, n_jobs=n_jobs,
+                         token_pattern=token_pattern, tokenizer=tokenizer,
+                         cache_size=cache_size)
+
+        if type(n_features) is not int or not 1 <= n_features <= 2 ** 31:
+            raise ValueError('n_features должен быть натуральным числом '
+                             'не больше 2 ** 31')
+
+        self.n_features = n_features
+
+        if type(alternate_sign) is not bool:
+            raise ValueError('Параметр alternate_sign должен быть True '
+                             'или False')
+
+        self.alternate_sign = alternate_sign
+
+        # обучать нечего, transform доступен сразу
+        self.fitted = True
+
+    def _count_words(self, words: list, vocabulary: dict) -> dict:
+        """
+        Считает слова текста по столбцам-хэшам.
+        vocabulary не используется и нужен для совместимости
+        с CountVectorizer
+
+        Args:
+            words (list): Список токенов
+            vocabulary (dict): Не используется
+
+        Returns:
+            dict: Номер столбца - (знаковое) количество слов в нем
+        """
+        text_count = {}
+        n_features = self.n_features
+
+        for word in words:
+            # crc32 в отличие от hash() не зависит от PYTHONHASHSEED
+            word_hash = zlib.crc32(word.encode('utf-8'))
+            indx = word_hash % n_features
+            if self.alternate_sign and word_hash & 0x80000000:
+                text_count[indx] = text_count.get(indx, 0) - 1
+            else:
+                text_count[indx] = text_count.get(indx, 0) + 1
+
+        # при alternate_sign коллизии могут дать ноль, его не храним
+        if self.alternate_sign:
+            text_count = {indx: count for indx, count in text_count.items()
+                          if count}
+
+        return text_count
+
+    def _new_matrix(self) -> CSRMatrix:
+        """
+        Создает пустую CSRMatrix на n_features столбцов
+        """
+        return CSRMatrix(n_cols=self.n_features)
+
+    def _params(self) -> dict:
+        """
+        Параметры __init__, по которым load заново создает векторайзер
+        """
+        params = super()._params()
+
+        return {'n_features': self.n_features,
+                'alternate_sign': self.alternate_sign,
+                **{name: params[name] for name in
+                   ['lowercase', 'stop_words', 'n_jobs', 'token_pattern',
+                    'cache_size']}}
+
+    def fit(self, corpus: Iterable) -> None:
+        """
+        Ничего не делает: у HashingVectorizer нет словаря
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+
+    def partial_fit(self, corpus: Iterable) -> None:
+        """
+        Ничего не делает: у HashingVectorizer нет словаря
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+
+    def fit_transform(self, corpus: Iterable) -> CSRMatrix:
+        """
+        То же, что и transform
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            CSRMatrix: Document-term matrix
+        """
+        return self.transform(corpus)
+
+    def get_feature_names(self) -> list:
+        """
+        У HashingVectorizer нет словаря, поэтому и названий столбцов нет
+
+        Raises:
+            RuntimeError: Всегда
+        """
+        raise RuntimeError('HashingVectorizer не хранит слова, '
+                           'названий столбцов нет')
+
+
+if __name__ == '__main__':
+    corpus = [
+        'Crock Pot Pasta Never boil pasta again',
+        'Pasta Pomodoro Fresh ingredients Parmesan to taste'
     ]
     vectorizer = CountVectorizer(lowercase=True, stop_words=None,
                                  sort='original')
     count_matrix = vectorizer.fit_transform(corpus)
     print(vectorizer.get_feature_names())
     print(count_matrix)
+
+    sparse_vectorizer = CountVectorizer(sparse=True)
+    print(sparse_vectorizer.fit_transform(corpus).toarray())
+
+    hashing_vectorizer = HashingVectorizer(n_features=16)
+    print(hashing_vectorizer.transform(corpus).toarray())
@@ -0,0 +1,625 @@
+from class_vectorizer import CountVectorizer, CSRMatrix, HashingVectorizer
+import class_vectorizer
+import pytest
+
+
+CORPUS = [
+    'Crock Pot Pasta Never boil pasta again',
+    'Pasta Pomodoro Fresh ingredients Parmesan to taste'
+]
+
+
+def test_fit_transform_dense():
+    vectorizer = CountVectorizer()
+    expected = [[1, 1, 2, 1, 1, 1, 0, 0, 0, 0, 0, 0],
+                [0, 0, 1, 0, 0, 0, 1, 1, 1, 1, 1, 1]]
+    assert vectorizer.fit_transform(CORPUS) == expected
+    assert vectorizer.get_feature_names() == [
+        'crock', 'pot', 'pasta', 'never', 'boil', 'again', 'pomodoro',
+        'fresh', 'ingredients', 'parmesan', 'to', 'taste']
+
+
+def test_fit_transform_sparse():
+    matrix = CountVectorizer(sparse=True).fit_transform(CORPUS)
+    assert isinstance(matrix, CSRMatrix)
+    assert matrix.shape == (2, 12)
+    assert matrix.nnz == 13
+    assert list(matrix.indptr) == [0, 6, 13]
+    assert matrix.toarray() == CountVectorizer().fit_transform(CORPUS)
+
+
+def test_sparse_empty_document():
+    vectorizer = CountVectorizer(sparse=True)
+    vectorizer.fit(CORPUS)
+    matrix = vectorizer.transform(['', 'unknown words'])
+    assert matrix.nnz == 0
+    assert matrix.toarray() == [[0] * 12, [0] * 12]
+
+
+def test_wrong_sparse():
+    with pytest.raises(ValueError):
+        CountVectorizer(sparse='yes')
+
+
+def brute_force_count(vectorizer, corpus):
+    """
+    Эталонный подсчет: для каждого слова из feature_names
+    считаем его количество в токенах текста
+    """
+    matrix = []
+    for text in corpus:
+        words = vectorizer._tokenize(text)
+        matrix.append([words.count(word)
+                       for word in vectorizer.get_feature_names()])
+    return matrix
+
+
+@pytest.mark.parametrize('sort', ['original', 'alphabetical'])
+@pytest.mark.parametrize('sparse', [False, True])
+def test_columns_match_brute_force(sort, sparse):
+    corpus = CORPUS + ['zebra apple, apple! Pasta... never-ever 42 42',
+                       'Ёжик в тумане, ёжик']
+    vectorizer = CountVectorizer(sort=sort, sparse=sparse)
+    matrix = vectorizer.fit_transform(corpus)
+    if sparse:
+        matrix = matrix.toarray()
+    assert matrix == brute_force_count(vectorizer, corpus)
+    assert all(vectorizer.vocabulary[word] == i for i, word in
+               enumerate(vectorizer.get_feature_names()))
+
+
+def test_alphabetical_feature_names():
+    vectorizer = CountVectorizer(sort='alphabetical')
+    vectorizer.fit(CORPUS)
+    assert vectorizer.get_feature_names() == sorted(
+        vectorizer.get_feature_names())
+    assert vectorizer.transform(['pasta pasta taste']) == \
+        [[0, 0, 0, 0, 0, 0, 0, 2, 0, 0, 1, 0]]
+
+
+@pytest.mark.parametrize('sort', ['original', 'alphabetical'])
+def test_fit_transform_generator(sort):
+    expected = CountVectorizer(sort=sort).fit_transform(CORPUS)
+    vectorizer = CountVectorizer(sort=sort)
+    assert vectorizer.fit_transform(text for text in CORPUS) == expected
+
+
+def test_fit_file_handle(tmp_path):
+    path = tmp_path / 'corpus.txt'
+    path.write_text('\n'.join(CORPUS), encoding='utf-8')
+    vectorizer = CountVectorizer()
+    with open(path, encoding='utf-8') as file:
+        vectorizer.fit(file)
+    with open(path, encoding='utf-8') as file:
+        matrix = vectorizer.transform(file)
+    assert matrix == CountVectorizer().fit_transform(CORPUS)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_transform_iter(sparse):
+    vectorizer = CountVectorizer(sparse=sparse)
+    vectorizer.fit(CORPUS)
+    corpus = CORPUS * 3
+    expected = vectorizer.transform(corpus)
+    rows = list(vectorizer.transform_iter(corpus))
+    chunks = list(vectorizer.transform_iter(corpus, chunk_size=4))
+    assert [len(chunk) for chunk in chunks] == [4, 2]
+    if sparse:
+        assert rows == [(list(i), list(d)) for i, d in expected]
+        assert [row for chunk in chunks for row in chunk.toarray()] == \
+            expected.toarray()
+    else:
+        assert rows == expected
+        assert chunks[0] + chunks[1] == expected
+
+
+def test_transform_before_fit():
+    with pytest.raises(RuntimeError):
+        CountVectorizer().transform(CORPUS)
+
+
+@pytest.mark.parametrize('sort', ['original', 'alphabetical'])
+@pytest.mark.parametrize('sparse', [False, True])
+def test_parallel_matches_sequential(monkeypatch, sort, sparse):
+    # маленькие куски, что бы корпус точно разделился между процессами
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 2)
+    corpus = CORPUS + ['zebra apple, apple!', 'Ёжик в тумане', 'pasta']
+
+    sequential = CountVectorizer(sort=sort, sparse=sparse)
+    expected = sequential.fit_transform(corpus)
+    parallel = CountVectorizer(sort=sort, sparse=sparse, n_jobs=2)
+    result = parallel.fit_transform(iter(corpus))
+    assert parallel.get_feature_names() == sequential.get_feature_names()
+
+    refitted = CountVectorizer(sort=sort, sparse=sparse, n_jobs=2)
+    refitted.fit(corpus)
+    assert refitted.vocabulary == sequential.vocabulary
+    if sparse:
+        result, expected = result.toarray(), expected.toarray()
+        assert refitted.transform(corpus).toarray() == expected
+    else:
+        assert refitted.transform(corpus) == expected
+    assert result == expected
+
+
+@pytest.mark.parametrize('n_jobs', [0, -2, 1.5])
+def test_wrong_n_jobs(n_jobs):
+    with pytest.raises(ValueError):
+        CountVectorizer(n_jobs=n_jobs)
+
+
+def legacy_tokenize(text, lowercase=True):
+    """
+    Старый токенизатор: посимвольная проверка isalnum
+    """
+    if lowercase:
+        text = text.lower()
+    return [''.join(c for c in word if c.isalnum()) for word in text.split()
+            if any(c.isalnum() for c in word)]
+
+
+TOKENIZER_TEXTS = [
+    'Crock Pot Pasta Never boil pasta again',
+    'Hello, world!!! ... -- ?',
+    'snake_case and CamelCase, e-mail: test@example.com',
+    'Привет, мир! Ёлка и ЁЖИК — это «кириллица».',
+    'числа 3.14 и 42% и ½ и ٣',
+    'tabs\tand\nnew lines here',
+    'ﬁnally straße ΣΊΣΥΦΟΣ',
+    '',
+    '!!! ___ ---',
+]
+
+
+@pytest.mark.parametrize('text', TOKENIZER_TEXTS)
+@pytest.mark.parametrize('lowercase', [True, False])
+def test_tokenizer_matches_legacy(text, lowercase):
+    vectorizer = CountVectorizer(lowercase=lowercase)
+    assert vectorizer._tokenize(text) == legacy_tokenize(text, lowercase)
+
+
+def test_token_pattern():
+    vectorizer = CountVectorizer(token_pattern=r'(?u)\b\w\w+\b',
+                                 stop_words=['мир'])
+    assert vectorizer._tokenize('Привет, мир! a bb e-mail') == \
+        ['привет', 'bb', 'mail']
+
+
+def test_custom_tokenizer():
+    vectorizer = CountVectorizer(tokenizer=str.split, lowercase=False)
+    vectorizer.fit(['a b, a'])
+    assert vectorizer.get_feature_names() == ['a', 'b,']
+
+
+@pytest.mark.parametrize('params', [{'token_pattern': 1},
+                                    {'tokenizer': 'split'}])
+def test_wrong_tokenizer(params):
+    with pytest.raises(ValueError):
+        CountVectorizer(**params)
+
+
+def test_stop_words_after_normalization():
+    vectorizer = CountVectorizer(stop_words=['and', 'и'])
+    assert vectorizer._tokenize('Salt, and... pepper И соль и!') == \
+        ['salt', 'pepper', 'соль']
+
+
+def test_english_stop_words_cached(monkeypatch, tmp_path):
+    first = CountVectorizer(stop_words='english')
+    # путь не зависит от текущей директории
+    monkeypatch.chdir(tmp_path)
+    second = CountVectorizer(stop_words='english')
+    assert isinstance(first.stop_words, frozenset)
+    assert first.stop_words is second.stop_words
+    assert 'the' in first.stop_words
+    assert second._tokenize('The cat, the end.') == ['cat']
+
+
+def test_wrong_stop_words():
+    with pytest.raises(ValueError):
+        CountVectorizer(stop_words=['a', 1])
+
+
+def test_hashing_vectorizer_without_fit():
+    vectorizer = HashingVectorizer(n_features=32, alternate_sign=False)
+    matrix = vectorizer.transform(CORPUS)
+    assert isinstance(matrix, CSRMatrix)
+    assert matrix.shape == (2, 32)
+    # без знака сумма строки равна количеству токенов
+    assert [sum(data) for _, data in matrix] == [7, 7]
+    assert matrix.toarray() == \
+        HashingVectorizer(n_features=32, alternate_sign=False) \
+        .fit_transform(CORPUS).toarray()
+
+
+def test_hashing_vectorizer_stable_columns():
+    # номер столбца не зависит от экземпляра и от остальных текстов
+    first = HashingVectorizer(n_features=2 ** 10).transform(['pasta'])
+    second = HashingVectorizer(n_features=2 ** 10).transform(
+        ['other words', 'pasta'])
+    assert first.getrow(0) == second.getrow(1)
+    assert abs(first.data[0]) == 1
+
+
+def test_hashing_vectorizer_collisions_cancel():
+    # при одном столбце знаковые счетчики складываются
+    vectorizer = HashingVectorizer(n_features=1)
+    total = sum(vectorizer._count_words(['a', 'b', 'c', 'd', 'e'], {})
+                .values())
+    signed = [vectorizer._count_words([word], {})[0]
+              for word in 'abcde']
+    assert total == sum(signed)
+
+
+def test_hashing_vectorizer_parallel(monkeypatch):
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 1)
+    sequential = HashingVectorizer(n_features=64).transform(CORPUS)
+    parallel = HashingVectorizer(n_features=64, n_jobs=2).transform(CORPUS)
+    assert parallel.toarray() == sequential.toarray()
+
+
+@pytest.mark.parametrize('params', [{'n_features': 0},
+                                    {'alternate_sign': 1}])
+def test_wrong_hashing_params(params):
+    with pytest.raises(ValueError):
+        HashingVectorizer(**params)
+
+
+def naive_ngrams(words, ngram_range):
+    """
+    Эталонные n-граммы через склеивание строк
+    """
+    min_n, max_n = ngram_range
+    return [' '.join(words[i:i + n]) for n in range(min_n, max_n + 1)
+            for i in range(len(words) - n + 1)]
+
+
+@pytest.mark.parametrize('ngram_range', [(1, 2), (2, 2), (1, 3)])
+@pytest.mark.parametrize('sort', ['original', 'alphabetical'])
+def test_ngrams_match_naive(ngram_range, sort):
+    corpus = CORPUS + ['pasta never boil, pasta never', 'a']
+    vectorizer = CountVectorizer(ngram_range=ngram_range, sort=sort)
+    matrix = vectorizer.fit_transform(corpus)
+
+    expected_names = list(dict.fromkeys(
+        gram for text in corpus
+        for gram in naive_ngrams(vectorizer._tokenize(text), ngram_range)))
+    if sort == 'alphabetical':
+        expected_names.sort()
+    assert vectorizer.get_feature_names() == expected_names
+
+    new_texts = ['never boil pasta again', 'unknown pasta never boil']
+    for m, texts in [(matrix, corpus),
+                     (vectorizer.transform(new_texts), new_texts)]:
+        expected = []
+        for text in texts:
+            grams = naive_ngrams(vectorizer._tokenize(text), ngram_range)
+            expected.append([grams.count(name) for name in expected_names])
+        assert m == expected
+
+
+def test_ngrams_parallel(monkeypatch):
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 1)
+    corpus = CORPUS + ['pasta never boil, pasta never']
+    sequential = CountVectorizer(ngram_range=(1, 2), sort='alphabetical')
+    parallel = CountVectorizer(ngram_range=(1, 2), sort='alphabetical',
+                               n_jobs=2)
+    assert parallel.fit_transform(corpus) == \
+        sequential.fit_transform(corpus)
+    assert parallel.get_feature_names() == sequential.get_feature_names()
+
+    refitted = CountVectorizer(ngram_range=(1, 2), n_jobs=2)
+    refitted.fit(corpus)
+    assert refitted.transform(corpus) == \
+        CountVectorizer(ngram_range=(1, 2)).fit_transform(corpus)
+
+
+@pytest.mark.parametrize('ngram_range', [(0, 1), (2, 1), [1, 2], (1,)])
+def test_wrong_ngram_range(ngram_range):
+    with pytest.raises(ValueError):
+        CountVectorizer(ngram_range=ngram_range)
+
+
+PRUNING_CORPUS = ['apple banana apple', 'banana cherry', 'banana apple date',
+                  'banana egg egg egg', 'fig']
+
+
+@pytest.mark.parametrize('params, expected', [
+    ({'min_df': 2}, ['apple', 'banana']),
+    ({'max_df': 3}, ['apple', 'cherry', 'date', 'egg', 'fig']),
+    # целое 1 - не больше одного текста, дробное 1.0 - все тексты
+    ({'max_df': 1}, ['cherry', 'date', 'egg', 'fig']),
+    ({'min_df': 1.0}, []),
+    ({'max_df': 0.5}, ['apple', 'cherry', 'date', 'egg', 'fig']),
+    ({'min_df': 0.4, 'max_df': 0.5}, ['apple']),
+    ({'max_features': 1}, ['banana']),
+    ({'max_features': 3, 'min_df': 2}, ['apple', 'banana']),
+    # при равной частоте побеждает слово, встреченное раньше
+    ({'max_features': 2}, ['apple', 'banana']),
+    ({'max_features': 4}, ['apple', 'banana', 'cherry', 'egg']),
+])
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_pruning(monkeypatch, params, expected, n_jobs):
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 2)
+    vectorizer = CountVectorizer(sort='alphabetical', n_jobs=n_jobs,
+                                 **params)
+    matrix = vectorizer.fit_transform(PRUNING_CORPUS)
+    assert vectorizer.get_feature_names() == expected
+    assert vectorizer.stop_words_ == \
+        {'apple', 'banana', 'cherry', 'date', 'egg', 'fig'} - set(expected)
+    assert matrix == brute_force_count(vectorizer, PRUNING_CORPUS)
+
+    refitted = CountVectorizer(sort='alphabetical', n_jobs=n_jobs, **params)
+    refitted.fit(iter(PRUNING_CORPUS))
+    assert refitted.vocabulary == vectorizer.vocabulary
+
+    # после сортировки частоты остаются у своих столбцов
+    document_counts = [sum(word in text.split() for text in PRUNING_CORPUS)
+                       for word in expected]
+    assert list(refitted._document_counts) == document_counts
+
+    # частоты убранных слов тоже копятся, поэтому дообучение
+    # и повторный fit отбирают слова так же, как обучение
+    # на всем корпусе сразу
+    refitted.partial_fit(PRUNING_CORPUS[:2])
+    refitted.fit([])
+    combined = CountVectorizer(sort='alphabetical', n_jobs=n_jobs, **params)
+    combined.fit(PRUNING_CORPUS + PRUNING_CORPUS[:2])
+    assert refitted.get_feature_names() == combined.get_feature_names()
+    assert refitted._document_counts == combined._document_counts
+    assert refitted.stop_words_ == combined.stop_words_
+
+
+def test_pruning_alphabetical_refit():
+    vectorizer = CountVectorizer(sort='alphabetical', max_df=3)
+    vectorizer.fit(['zeta', 'zeta', 'zeta alpha', 'alpha'])
+    vectorizer.partial_fit(['alpha'])
+    vectorizer.fit([])
+    assert vectorizer.get_feature_names() == ['alpha', 'zeta']
+    assert list(vectorizer._document_counts) == [3, 3]
+    assert vectorizer.stop_words_ == set()
+
+
+def test_pruning_keeps_pruned_counts():
+    vectorizer = CountVectorizer(min_df=2)
+    vectorizer.fit(['a b', 'a'])
+    assert vectorizer.get_feature_names() == ['a']
+    assert vectorizer.stop_words_ == {'b'}
+
+    # у b теперь два текста: слово возвращается со старой частотой
+    vectorizer.fit(['b'])
+    assert vectorizer.get_feature_names() == ['a', 'b']
+    assert list(vectorizer._document_counts) == [2, 2]
+    assert vectorizer.stop_words_ == set()
+
+    # убранная n-грамма возвращается по тому же кортежу номеров слов
+    vectorizer = CountVectorizer(ngram_range=(1, 2), min_df=2)
+    vectorizer.fit(['a b', 'a c'])
+    vectorizer.fit(['x a b'])
+    assert vectorizer.get_feature_names() == ['a', 'b', 'a b']
+    assert vectorizer.transform(['a b a b']) == [[2, 2, 2]]
+
+
+def test_pruning_ngrams():
+    vectorizer = CountVectorizer(ngram_range=(1, 2), min_df=2)
+    vectorizer.fit(['a b c', 'a b d', 'c d'])
+    assert vectorizer.get_feature_names() == ['a', 'b', 'c', 'a b', 'd']
+    assert vectorizer.transform(['a b c d']) == [[1, 1, 1, 1, 1]]
+
+
+@pytest.mark.parametrize('params', [{'min_df': -1}, {'max_df': 1.5},
+                                    {'min_df': '1'}, {'max_features': 0}])
+def test_wrong_pruning_params(params):
+    with pytest.raises(ValueError):
+        CountVectorizer(**params)
+
+
+def test_pruning_empty_range():
+    with pytest.raises(ValueError):
+        CountVectorizer(min_df=3, max_df=2).fit(PRUNING_CORPUS)
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'sort': 'alphabetical', 'stop_words': 'english', 'max_features': 5},
+    {'ngram_range': (1, 3), 'token_pattern': r'\w+'},
+])
+def test_save_load(tmp_path, params):
+    path = tmp_path / 'model.bin'
+    corpus = CORPUS + ['']
+    new_texts = ['Fresh pasta with parmesan', 'crock pot again and again']
+    vectorizer = CountVectorizer(**params)
+    vectorizer.fit(corpus)
+    vectorizer.save(path)
+
+    loaded = CountVectorizer.load(path)
+    assert list(loaded.get_feature_names()) == vectorizer.get_feature_names()
+    assert dict(loaded.vocabulary) == vectorizer.vocabulary
+    assert 'zzz' not in loaded.vocabulary
+    assert loaded.transform(new_texts) == vectorizer.transform(new_texts)
+
+    # после load словарь можно дополнять
+    loaded.fit(['brand new words'])
+    vectorizer.fit(['brand new words'])
+    assert loaded.get_feature_names() == vectorizer.get_feature_names()
+    assert loaded.transform(new_texts) == vectorizer.transform(new_texts)
+
+
+def test_save_load_parallel(tmp_path, monkeypatch):
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 1)
+    path = tmp_path / 'model.bin'
+    vectorizer = CountVectorizer(ngram_range=(1, 2), sparse=True)
+    vectorizer.fit(CORPUS)
+    vectorizer.save(path)
+
+    loaded = CountVectorizer.load(path)
+    loaded.n_jobs = 2
+    assert loaded.transform(CORPUS * 2).toarray() == \
+        vectorizer.transform(CORPUS * 2).toarray()
+
+
+def test_save_load_hashing(tmp_path):
+    path = tmp_path / 'model.bin'
+    vectorizer = HashingVectorizer(n_features=16, alternate_sign=False)
+    vectorizer.save(path)
+    loaded = HashingVectorizer.load(path)
+    assert loaded.n_features == 16
+    assert loaded.transform(CORPUS).toarray() == \
+        vectorizer.transform(CORPUS).toarray()
+
+
+def test_load_errors(tmp_path):
+    path = tmp_path / 'model.bin'
+    with pytest.raises(ValueError):
+        CountVectorizer(tokenizer=str.split).save(path)
+
+    CountVectorizer().save(path)
+    with pytest.raises(ValueError):
+        HashingVectorizer.load(path)
+
+    path.write_bytes(b'not a model')
+    with pytest.raises(ValueError):
+        CountVectorizer.load(path)
+
+
+@pytest.mark.parametrize('params', [{}, {'ngram_range': (1, 2)},
+                                    {'n_jobs': 2}])
+def test_partial_fit(monkeypatch, params):
+    monkeypatch.setattr(class_vectorizer, 'PARALLEL_CHUNK_SIZE', 1)
+    corpus = CORPUS + ['pasta never boil, fresh basil']
+    vectorizer = CountVectorizer(**params)
+    vectorizer.partial_fit(corpus[:1])
+    old_names = list(vectorizer.get_feature_names())
+    old_matrix = vectorizer.transform(corpus[:1])
+
+    for text in corpus[1:]:
+        vectorizer.partial_fit([text])
+
+    # новые слова добавились в конец, старые столбцы не сдвинулись
+    names = vectorizer.get_feature_names()
+    assert names[:len(old_names)] == old_names
+    assert vectorizer.transform(corpus[:1])[0][:len(old_names)] == \
+        old_matrix[0]
+
+    full = CountVectorizer(**params)
+    assert vectorizer.transform(corpus) == full.fit_transform(corpus)
+    assert names == full.get_feature_names()
+
+
+def test_partial_fit_keeps_columns_with_pruning():
+    vectorizer = CountVectorizer(sort='alphabetical', max_features=3)
+    vectorizer.fit(CORPUS)
+    names = list(vectorizer.get_feature_names())
+    vectorizer.partial_fit(['zucchini and apple'])
+    assert vectorizer.get_feature_names() == names + ['zucchini', 'and',
+                                                      'apple']
+
+
+def test_partial_fit_after_load(tmp_path):
+    path = tmp_path / 'model.bin'
+    vectorizer = CountVectorizer()
+    vectorizer.partial_fit(CORPUS[:1])
+    vectorizer.save(path)
+
+    loaded = CountVectorizer.load(path)
+    loaded.partial_fit(CORPUS[1:])
+    full = CountVectorizer()
+    assert loaded.transform(CORPUS) == full.fit_transform(CORPUS)
+    assert loaded.get_feature_names() == full.get_feature_names()
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_transform_cache(sparse):
+    texts = ['pasta again', 'fresh pasta', 'pasta again', 'never boil',
+             'pasta again', 'fresh pasta']
+    vectorizer = CountVectorizer(sparse=sparse, cache_size=2)
+    vectorizer.fit(CORPUS)
+    plain = CountVectorizer(sparse=sparse)
+    plain.fit(CORPUS)
+
+    result = vectorizer.transform(texts)
+    expected = plain.transform(texts)
+    if sparse:
+        result, expected = result.toarray(), expected.toarray()
+    assert result == expected
+    # 'fresh pasta' вытеснен из кэша текстом 'never boil'
+    assert vectorizer.cache_info() == (2, 4, 2, 2)
+    assert list(vectorizer._cache) == ['pasta again', 'fresh pasta']
+
+
+def test_cache_cleared_on_fit():
+    vectorizer = CountVectorizer(cache_size=10)
+    vectorizer.fit(CORPUS)
+    assert vectorizer.transform(['pasta basil'] * 2) == [
+        [0, 0, 1] + [0] * 9] * 2
+    assert vectorizer.cache_info().hits == 1
+
+    vectorizer.partial_fit(['basil'])
+    assert vectorizer.cache_info() == (0, 0, 10, 0)
+    assert vectorizer.transform(['pasta basil']) == [[0, 0, 1] + [0] * 9
+                                                     + [1]]
+
+
+@pytest.mark.parametrize('cache_size', [0, -1, 1.5, '10'])
+def test_wrong_cache_size(cache_size):
+    with pytest.raises(ValueError):
+        CountVectorizer(cache_size=cache_size)
+
+
+def test_feature_names_by_prefix(tmp_path):
+    vectorizer = CountVectorizer()
+    vectorizer.fit(CORPUS + ['parsley pastry'])
+    names = vectorizer.get_feature_names()
+
+    def expected(prefix):
+        return sorted((word, vectorizer.vocabulary[word]) for word in names
+                      if word.startswith(prefix))
+
+    for prefix in ['pa', 'p', 'pasta', 'z', '', 'crock pot']:
+        assert vectorizer.get_feature_names_by_prefix(prefix) == \
+            expected(prefix)
+
+    # индекс перестраивается, когда меняется словарь
+    vectorizer.partial_fit(['pan'])
+    assert vectorizer.get_feature_names_by_prefix('pa') == expected('pa')
+    assert ('pan', len(names) - 1) in \
+        vectorizer.get_feature_names_by_prefix('pa')
+
+    path = tmp_path / 'model.bin'
+    vectorizer.save(path)
+    loaded = CountVectorizer.load(path)
+    assert loaded.get_feature_names_by_prefix('par') == expected('par')
+
+    with pytest.raises(RuntimeError):
+        HashingVectorizer().get_feature_names_by_prefix('pa')
+
+
+@pytest.mark.parametrize('dtype, typecode', [('uint8', 'B'), ('uint16', 'H'),
+                                             ('uint32', 'I'), ('int64', 'q')])
+def test_dtype(dtype, typecode):
+    expected = CountVectorizer().fit_transform(CORPUS)
+
+    dense = CountVectorizer(dtype=dtype).fit_transform(CORPUS)
+    assert all(row.typecode == typecode for row in dense)
+    assert [list(row) for row in dense] == expected
+
+    sparse = CountVectorizer(sparse=True, dtype=dtype).fit_transform(CORPUS)
+    assert sparse.data.typecode == typecode
+    assert sparse.toarray() == expected
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_dtype_overflow(sparse):
+    vectorizer = CountVectorizer(sparse=sparse, dtype='uint8')
+    vectorizer.fit(['pasta'])
+    matrix = vectorizer.transform(['pasta ' * 255])
+    if sparse:
+        matrix = matrix.toarray()
+    assert list(matrix[0]) == [255]
+    with pytest.raises(OverflowError):
+        vectorizer.transform(['pasta ' * 256])
+
+
+def test_wrong_dtype():
+    with pytest.raises(ValueError):
+        CountVectorizer(dtype='int8')
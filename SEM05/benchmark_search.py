@@ -0,0 +1,71 @@
+"""
+Время одного запроса TfidfSearch в зависимости от размера корпуса
+в сравнении с перебором всех текстов (косинус с каждой строкой
+разреженной tf-idf матрицы).
+
+Запуск:
+    python benchmark_search.py
+"""
+import math
+import random
+import time
+
+from benchmark_suite import make_corpus
+from sem05 import TfidfSearch, TfidfVectorizer
+
+
+def brute_force(matrix, query_row: tuple, k: int) -> list:
+    """
+    Косинус запроса с каждой строкой матрицы и сортировка
+
+    Returns:
+        list: Пары (номер текста, косинус)
+    """
+    query = dict(zip(*query_row))
+    query_length = math.sqrt(sum(w * w for w in query.values()))
+    scores = []
+
+    for doc, (indices, data) in enumerate(matrix):
+        dot = sum(query.get(indx, 0.0) * weight
+                  for indx, weight in zip(indices, data))
+        if dot:
+            length = math.sqrt(sum(w * w for w in data))
+            scores.append((doc, dot / (length * query_length)))
+
+    scores.sort(key=lambda item: (-item[1], item[0]))
+
+    return scores[:k]
+
+
+if __name__ == '__main__':
+    rnd = random.Random(1)
+    print(f'{"текстов":>8} | {"индекс, мс":>10} | {"перебор, мс":>11} | '
+          f'{"ускорение":>9}')
+
+    for n_texts in [1000, 5000, 20000]:
+        corpus = make_corpus(n_texts)
+        vectorizer = TfidfVectorizer(sparse=True, decimals=None)
+        search = TfidfSearch(vectorizer)
+        search.fit(corpus)
+        matrix = vectorizer.transform(corpus)
+
+        # запрос - три случайных слова из случайного текста
+        queries = [' '.join(rnd.sample(rnd.choice(corpus).split(), 3))
+                   for _ in range(50)]
+        query_rows = [vectorizer.transform([query]).getrow(0)
+                      for query in queries]
+
+        start = time.perf_counter()
+        results = [search.search(query, k=10) for query in queries]
+        search_time = (time.perf_counter() - start) / len(queries)
+
+        start = time.perf_counter()
+        expected = [brute_force(matrix, row, 10) for row in query_rows]
+        brute_time = (time.perf_counter() - start) / len(queries)
+
+        assert [[doc for doc, _ in result] for result in results] == \
+            [[doc for doc, _ in result] for result in expected]
+
+        print(f'{n_texts:>8} | {search_time * 1000:>10.2f} | '
+              f'{brute_time * 1000:>11.2f} | '
+              f'{brute_time / search_time:>8.1f}x')
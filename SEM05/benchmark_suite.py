@@ -0,0 +1,206 @@
+"""
+Набор бенчмарков для CountVectorizer, TfidfTransformer и
+TfidfVectorizer на синтетических корпусах разного размера.
+Для каждого замера записываются время, пиковая память и пропускная
+способность (текстов и токенов в секунду), а результат сравнивается
+с сохраненным базовым замером: если что-то стало медленнее или
+прожорливее больше чем на tolerance, скрипт завершается с кодом 1,
+а если базового замера нет - с кодом 2.
+
+Базовый замер зависит от машины, поэтому хранится локально:
+    python benchmark_suite.py --save-baseline   # записать базовый замер
+    python benchmark_suite.py                   # сравнить с ним
+    python benchmark_suite.py --quick           # только маленькие корпуса
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from sem05 import CountVectorizer, TfidfTransformer, TfidfVectorizer
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'benchmark_baseline.json')
+
+# размеры корпусов для кривых масштабирования
+N_TEXTS = [1000, 4000, 16000]
+QUICK_N_TEXTS = [1000]
+
+
+def make_corpus(n_texts: int, vocabulary_size: int = 20000,
+                text_length: int = 50, zipf_s: float = 1.0,
+                seed: int = 0) -> list:
+    """
+    Корпус, в котором частоты слов распределены по закону Ципфа:
+    вероятность слова с рангом r пропорциональна 1 / r ** zipf_s.
+    Этот же корпус используют остальные бенчмарки SEM05
+
+    Args:
+        n_texts (int): Количество текстов
+        vocabulary_size (int, optional): Количество различных слов.
+            Defaults to 20000.
+        text_length (int, optional): Количество слов в тексте.
+            Defaults to 50.
+        zipf_s (float, optional): Перекос распределения, 0 - все слова
+            равновероятны. Defaults to 1.0.
+        seed (int, optional): Зерно генератора. Defaults to 0.
+
+    Returns:
+        list: Список текстов
+    """
+    rnd = random.Random(seed)
+    words = [f'w{i}' for i in range(vocabulary_size)]
+    weights = [1 / rank ** zipf_s for rank in range(1, vocabulary_size + 1)]
+
+    return [' '.join(rnd.choices(words, weights=weights, k=text_length))
+            for _ in range(n_texts)]
+
+
+def make_cases(corpus: list) -> dict:
+    """
+    Замеряемые операции. Все, что нужно заранее (обученный словарь,
+    count_matrix), готовится здесь и в замер не попадает
+
+    Args:
+        corpus (list): Корпус
+
+    Returns:
+        dict: Название - функция без аргументов
+    """
+    fitted = CountVectorizer(sparse=True)
+    count_matrix = fitted.fit_transform(corpus)
+    feature_names = fitted.get_feature_names()
+
+    return {
+        'CountVectorizer.fit':
+            lambda: CountVectorizer(sparse=True).fit(corpus),
+        'CountVectorizer.transform':
+            lambda: fitted.transform(corpus),
+        'TfidfTransformer.fit_transform':
+            lambda: TfidfTransformer(feature_names).fit_transform(
+                count_matrix),
+        'TfidfVectorizer.fit_transform':
+            lambda: TfidfVectorizer(sparse=True).fit_transform(corpus),
+    }
+
+
+def measure(func, repeat: int = 3) -> tuple:
+    """
+    Лучшее время из repeat запусков и пиковая память отдельного
+    запуска под tracemalloc (он замедляет код, поэтому время
+    меряется без него)
+
+    Returns:
+        tuple: (секунды, байты)
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return min(timings), peak
+
+
+def run(n_texts_list: list, repeat: int) -> dict:
+    """
+    Прогоняет все операции на корпусах всех размеров
+
+    Returns:
+        dict: "операция/n_texts" - замеры
+    """
+    results = {}
+
+    for n_texts in n_texts_list:
+        corpus = make_corpus(n_texts)
+        n_tokens = sum(len(text.split()) for text in corpus)
+
+        for name, func in make_cases(corpus).items():
+            seconds, peak = measure(func, repeat)
+            results[f'{name}/{n_texts}'] = {
+                'seconds': seconds,
+                'peak_bytes': peak,
+                'docs_per_second': n_texts / seconds,
+                'tokens_per_second': n_tokens / seconds,
+            }
+
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """
+    Замеры, которые хуже базовых больше чем на tolerance
+    (время или пиковая память)
+
+    Returns:
+        list: Описания регрессий
+    """
+    regressions = []
+
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ['seconds', 'peak_bytes']:
+            old, new = baseline[key][metric], result[metric]
+            if new > old * (1 + tolerance):
+                regressions.append(f'{key}: {metric} {old:.4g} -> '
+                                   f'{new:.4g} ({new / old - 1:+.0%})')
+
+    return regressions
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='файл с базовым замером')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='записать текущий замер как базовый')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='допустимое ухудшение, доля (0.25 = 25%%)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='сколько раз замерять время')
+    parser.add_argument('--quick', action='store_true',
+                        help='только самый маленький корпус')
+    args = parser.parse_args()
+
+    results = run(QUICK_N_TEXTS if args.quick else N_TEXTS, args.repeat)
+
+    print(f'{"операция/текстов":>36} | {"мс":>8} | {"МБ":>6} | '
+          f'{"текстов/с":>9} | {"токенов/с":>9}')
+    for key, result in results.items():
+        print(f'{key:>36} | {result["seconds"] * 1000:>8.1f} | '
+              f'{result["peak_bytes"] / 2 ** 20:>6.1f} | '
+              f'{result["docs_per_second"]:>9.0f} | '
+              f'{result["tokens_per_second"]:>9.0f}')
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+        print(f'Базовый замер записан в {args.baseline}')
+        sys.exit(0)
+
+    if not os.path.exists(args.baseline):
+        # без базового замера сравнивать не с чем, и проверка
+        # не должна молча проходить
+        print('Базового замера нет, запустите с --save-baseline')
+        sys.exit(2)
+
+    with open(args.baseline, encoding='utf-8') as file:
+        baseline = json.load(file)
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print('Регрессии:')
+        print('\n'.join(regressions))
+        sys.exit(1)
+
+    print(f'Регрессий нет (допуск {args.tolerance:.0%})')
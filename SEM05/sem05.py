@@ -1,4 +1,479 @@
+import bisect
+import copy
+import heapq
+import json
 import math
+import mmap
+import os
+import re
+import sys
+import zlib
+from array import array
+from collections import Counter, OrderedDict, deque, namedtuple
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import accumulate, compress, islice, repeat
+from operator import mul, truediv
+from typing import Iterable, Iterator
+
+
+# все, что не буква и не цифра: \W для str совпадает с "not isalnum()",
+# кроме '_', который приходится добавлять отдельно
+NON_ALNUM_RE = re.compile(r'[\W_]+')
+
+# файл со стоп словами английского языка лежит рядом с модулем
+STOP_WORDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                               'stopwords.txt')
+
+# сколько текстов отправляется в один процесс за раз при n_jobs > 1
+PARALLEL_CHUNK_SIZE = 1000
+
+# dtype счетчиков - typecode для array
+COUNT_DTYPES = {'uint8': 'B', 'uint16': 'H', 'uint32': 'I', 'int64': 'q'}
+
+# первые байты файла, сохраненного через save
+MODEL_MAGIC = b'VECMODEL'
+
+# статистика кэша счетчиков слов, как у functools.lru_cache
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize',
+                                     'currsize'])
+
+# векторайзер, с которым работает процесс-воркер при n_jobs > 1.
+# Передается один раз при запуске процесса, а не с каждым куском корпуса
+_worker_vectorizer = None
+
+
+@lru_cache(maxsize=None)
+def _load_stop_words(path: str = STOP_WORDS_PATH) -> frozenset:
+    """
+    Читает файл со стоп словами (по слову в строке).
+    Результат кэшируется, поэтому файл читается один раз за процесс,
+    сколько бы векторайзеров ни создавалось
+
+    Args:
+        path (str, optional): Путь к файлу. Defaults to STOP_WORDS_PATH.
+
+    Returns:
+        frozenset: Множество стоп слов
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        return frozenset(word for word in (line.strip() for line in file)
+                         if word)
+
+
+def _init_worker(vectorizer) -> None:
+    """
+    Запоминает векторайзер в процессе-воркере
+    """
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+
+def _fit_chunk(texts: list) -> tuple:
+    """
+    Частичный словарь куска корпуса: слова (или n-граммы)
+    в порядке первого появления вместе с их частотами
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        tuple: (количество текстов, Counter слово - в скольких текстах
+        встречается, Counter слово - сколько раз встречается).
+        Для n-грамм вместо слов кортежи слов
+    """
+    vectorizer = _worker_vectorizer
+    document_counts = Counter()
+    term_counts = Counter()
+
+    for text in texts:
+        text_count = Counter(vectorizer._terms(vectorizer._tokenize(text)))
+        document_counts.update(text_count.keys())
+        term_counts.update(text_count)
+
+    return len(texts), document_counts, term_counts
+
+
+def _count_chunk(texts: list) -> list:
+    """
+    Счетчики слов (или n-грамм) для каждого текста куска корпуса.
+    Слова в каждом счетчике идут в порядке первого появления в тексте
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        list: Список Counter слово - количество
+    """
+    vectorizer = _worker_vectorizer
+
+    return [Counter(vectorizer._terms(vectorizer._tokenize(text)))
+            for text in texts]
+
+
+def _transform_chunk(texts: list) -> list:
+    """
+    Строки document-term matrix для куска корпуса по готовому словарю
+
+    Args:
+        texts (list): Кусок корпуса
+
+    Returns:
+        list: Строки в формате CountVectorizer._make_row
+    """
+    vectorizer = _worker_vectorizer
+
+    return [vectorizer._make_row(vectorizer._count_words(
+        vectorizer._tokenize(text), vectorizer.vocabulary)) for text in texts]
+
+
+class CSRMatrix:
+    """
+    Разреженная document-term matrix в формате CSR
+    (compressed sparse row). Хранятся только ненулевые элементы,
+    поэтому память растет с количеством ненулевых ячеек,
+    а не с произведением числа текстов на размер словаря.
+
+    Attributes:
+        indptr (array): Границы строк: элементы строки i лежат
+            в indices[indptr[i]:indptr[i + 1]]
+        indices (array): Номера столбцов ненулевых элементов
+        data (array): Значения ненулевых элементов
+        n_cols (int): Количество столбцов матрицы
+    """
+
+    def __init__(self, n_cols: int = 0, typecode: str = 'q') -> None:
+        """
+        Инициализация пустой матрицы
+
+        Args:
+            n_cols (int, optional): Количество столбцов. Defaults to 0.
+            typecode (str, optional): typecode для array с данными
+                ('q' для счетчиков, 'd' для весов). Defaults to 'q'.
+        """
+        self.indptr = array('q', [0])
+        self.indices = array('l')
+        self.data = array(typecode)
+        self.n_cols = n_cols
+
+    @property
+    def shape(self) -> tuple:
+        """
+        Размер матрицы
+
+        Returns:
+            tuple: (количество строк, количество столбцов)
+        """
+        return len(self.indptr) - 1, self.n_cols
+
+    @property
+    def nnz(self) -> int:
+        """
+        Количество ненулевых элементов
+
+        Returns:
+            int: Количество хранимых элементов
+        """
+        return len(self.data)
+
+    def append_row(self, indices, data) -> None:
+        """
+        Добавляет в конец матрицы строку
+
+        Args:
+            indices (iterable): Номера столбцов по возрастанию
+            data (iterable): Значения в этих столбцах
+        """
+        self.indices.extend(indices)
+        self.data.extend(data)
+        self.indptr.append(len(self.data))
+
+    def getrow(self, i: int) -> tuple:
+        """
+        Возвращает строку матрицы в разреженном виде
+
+        Args:
+            i (int): Номер строки
+
+        Returns:
+            tuple: (номера столбцов, значения)
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+
+        return self.indices[start:end], self.data[start:end]
+
+    def __len__(self) -> int:
+        return len(self.indptr) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.getrow(i)
+
+    def toarray(self) -> list:
+        """
+        Переводит матрицу в обычный список списков
+
+        Returns:
+            list: Плотная матрица
+        """
+        matrix = []
+
+        for indices, data in self:
+            row = [0] * self.n_cols
+            for col, value in zip(indices, data):
+                row[col] = value
+            matrix.append(row)
+
+        return matrix
+
+
+def _write_model(path: str, header: dict, sections: dict) -> None:
+    """
+    Записывает модель в файл: MODEL_MAGIC, длина заголовка (8 байт),
+    заголовок в JSON и секции-массивы подряд. Каждая секция начинается
+    с адреса, кратного 8 байтам, что бы ее можно было читать как массив
+    чисел прямо из mmap
+
+    Args:
+        path (str): Путь к файлу
+        header (dict): Параметры модели, которые можно записать в JSON
+        sections (dict): Название секции - array
+    """
+    layout = {}
+    offset = 0
+    for name, values in sections.items():
+        layout[name] = [values.typecode, offset, len(values)]
+        size = len(values) * values.itemsize
+        offset += size + -size % 8
+
+    header = dict(header, byteorder=sys.byteorder, sections=layout)
+    header_bytes = json.dumps(header, ensure_ascii=False).encode('utf-8')
+    header_bytes += b' ' * (-len(header_bytes) % 8)
+
+    with open(path, 'wb') as file:
+        file.write(MODEL_MAGIC)
+        file.write(len(header_bytes).to_bytes(8, 'little'))
+        file.write(header_bytes)
+        for values in sections.values():
+            values.tofile(file)
+            file.write(bytes(-len(values) * values.itemsize % 8))
+
+
+class _ModelFile:
+    """
+    Файл модели, отображенный в память через mmap. Секции отдаются как
+    memoryview без копирования, поэтому процессы, загрузившие одну и ту
+    же модель, читают одни и те же страницы из page cache
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Открывает файл и читает заголовок
+
+        Args:
+            path (str): Путь к файлу, записанному через _write_model
+
+        Raises:
+            ValueError: Файл не является сохраненной моделью
+        """
+        self.path = os.fspath(path)
+
+        with open(self.path, 'rb') as file:
+            if file.read(len(MODEL_MAGIC)) != MODEL_MAGIC:
+                raise ValueError(f'{self.path} не является файлом модели')
+            header_size = int.from_bytes(file.read(8), 'little')
+            self.header = json.loads(file.read(header_size))
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.header['byteorder'] != sys.byteorder:
+            raise ValueError('Модель сохранена на машине с другим '
+                             'порядком байт')
+
+        self._start = len(MODEL_MAGIC) + 8 + header_size
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.header['sections']
+
+    def section(self, name: str) -> memoryview:
+        """
+        Секция файла без копирования
+
+        Args:
+            name (str): Название секции
+
+        Returns:
+            memoryview: Массив с тем же typecode, что и при записи
+        """
+        typecode, offset, length = self.header['sections'][name]
+        start = self._start + offset
+        end = start + length * array(typecode).itemsize
+
+        return memoryview(self._mmap)[start:end].cast(typecode)
+
+    def __reduce__(self):
+        # mmap нельзя передать в другой процесс, поэтому там файл
+        # открывается заново (и попадает на те же страницы page cache)
+        return _ModelFile, (self.path,)
+
+
+def _index_sections(name: str, keys: Iterable, encode) -> dict:
+    """
+    Секции для _MappedIndex: ключи подряд в одном блоке байт,
+    границы ключей и хэш-таблица с открытой адресацией,
+    в которой хранятся номера ключей + 1 (0 - пустая ячейка)
+
+    Args:
+        name (str): Префикс названий секций
+        keys (Iterable): Ключи в порядке номеров
+        encode (callable): Перевод ключа в bytes
+
+    Returns:
+        dict: Название секции - array
+    """
+    encoded = [encode(key) for key in keys]
+
+    # таблица заполнена не больше чем наполовину, поэтому
+    # цепочки проб короткие, а пустая ячейка всегда найдется
+    size = 1
+    while size < 2 * len(encoded):
+        size *= 2
+    mask = size - 1
+    table = array('q', bytes(8 * size))
+    for indx, key in enumerate(encoded, 1):
+        slot = zlib.crc32(key) & mask
+        while table[slot]:
+            slot = (slot + 1) & mask
+        table[slot] = indx
+
+    blob = array('B')
+    for key in encoded:
+        blob.frombytes(key)
+
+    return {name + '.offsets': array('q', accumulate(map(len, encoded),
+                                                     initial=0)),
+            name + '.blob': blob,
+            name + '.table': table}
+
+
+class _MappedIndex(Mapping):
+    """
+    Словарь строка - номер, который читается прямо из файла модели
+    и не создает объектов для всех ключей при загрузке.
+    Поиск идет по хэш-таблице из _index_sections
+    """
+
+    def __init__(self, model_file: _ModelFile, name: str) -> None:
+        """
+        Инициализация
+
+        Args:
+            model_file (_ModelFile): Открытый файл модели
+            name (str): Префикс названий секций
+        """
+        self._model_file = model_file
+        self._name = name
+        self._offsets = model_file.section(name + '.offsets')
+        self._blob = model_file.section(name + '.blob')
+        self._table = model_file.section(name + '.table')
+
+    @staticmethod
+    def encode(key: str) -> bytes:
+        """
+        Ключ в том виде, в котором он хранится в файле
+        """
+        if type(key) is not str:
+            raise TypeError
+        return key.encode('utf-8', 'surrogatepass')
+
+    @staticmethod
+    def decode(key: memoryview) -> str:
+        """
+        Обратное к encode
+        """
+        return str(key, 'utf-8', 'surrogatepass')
+
+    def key_at(self, indx: int):
+        """
+        Ключ с номером indx
+        """
+        return self.decode(self._blob[self._offsets[indx]:
+                                      self._offsets[indx + 1]])
+
+    def get(self, key, default=None):
+        """
+        Номер ключа за одно вычисление crc32 и несколько сравнений
+        байт, без создания строк из файла
+        """
+        try:
+            encoded = self.encode(key)
+        except TypeError:
+            return default
+
+        table = self._table
+        offsets = self._offsets
+        mask = len(table) - 1
+        slot = zlib.crc32(encoded) & mask
+        while True:
+            indx = table[slot]
+            if not indx:
+                return default
+            indx -= 1
+            if self._blob[offsets[indx]:offsets[indx + 1]] == encoded:
+                return indx
+            slot = (slot + 1) & mask
+
+    def __getitem__(self, key) -> int:
+        indx = self.get(key)
+        if indx is None:
+            raise KeyError(key)
+        return indx
+
+    def __contains__(self, key) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self) -> Iterator:
+        return map(self.key_at, range(len(self)))
+
+    def __reduce__(self):
+        return type(self), (self._model_file, self._name)
+
+
+class _MappedNgramIndex(_MappedIndex):
+    """
+    _MappedIndex, где ключи - кортежи номеров слов n-граммы
+    """
+
+    @staticmethod
+    def encode(key: tuple) -> bytes:
+        # кортеж с None (слово не из словаря) дает TypeError
+        return array('q', key).tobytes()
+
+    @staticmethod
+    def decode(key: memoryview) -> tuple:
+        return tuple(key.cast('q'))
+
+
+class _MappedKeys(Sequence):
+    """
+    Список ключей _MappedIndex по номерам (feature_names загруженной
+    модели). Строки создаются только при обращении к ним
+    """
+
+    def __init__(self, index: _MappedIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._index.key_at(indx)
+                    for indx in range(len(self))[i]]
+        return self._index.key_at(range(len(self))[i])
 
 
 class CountVectorizer:
@@ -9,7 +484,11 @@ class CountVectorizer:
     """
 
     def __init__(self, lowercase: bool = True, stop_words: list = None,
-                 sort: str = 'original') -> None:
+                 sort: str = 'original', sparse: bool = False,
+                 n_jobs: int = 1, token_pattern: str = None,
+                 tokenizer=None, ngram_range: tuple = (1, 1),
+                 min_df=1, max_df=1.0, max_features: int = None,
+                 cache_size: int = None, dtype: str = None) -> None:
         """
         Инициализация класса
 
@@ -17,8 +496,9 @@ class CountVectorizer:
             lowercase (bool, optional): Нужно ли преобразовывать
             тексты в нижний регистр. Defaults to True.
 
-            stop_words (list, optional): Список стоп слов или 'english' для
-            стоп слов английского языка. Defaults to None.
+            stop_words (list, optional): Список (или множество) стоп слов
+            или 'english' для стоп слов английского языка. Стоп слова
+            сравниваются с уже очищенными токенами. Defaults to None.
 
             sort (str, optional): Порядок добавления слов в
             document-term matrix.
@@ -27,10 +507,63 @@ class CountVectorizer:
             'alphabetical' для добавления в алфавитном порядке. Defaults
             to 'original'
 
+            sparse (bool, optional): Возвращать ли document-term matrix
+            в виде CSRMatrix вместо списка списков. Defaults to False.
+
+            n_jobs (int, optional): Количество процессов для fit и
+            transform. -1 для всех ядер процессора. Defaults to 1.
+
+            token_pattern (str, optional): Регулярное выражение, все
+            совпадения с которым в тексте считаются токенами. Если не
+            указано, то текст делится по пробелам, а из слов удаляются
+            все символы, кроме букв и цифр. Defaults to None.
+
+            tokenizer (callable, optional): Своя функция, которая делит
+            текст на список токенов. Важнее, чем token_pattern.
+            При n_jobs > 1 должна быть picklable. Defaults to None.
+
+            ngram_range (tuple, optional): Минимальная и максимальная
+            длина n-грамм, например (1, 2) для слов и пар слов.
+            Defaults to (1, 1).
+
+            min_df (int | float, optional): Слова, которые встречаются
+            меньше чем в min_df текстах (или в меньшей доле текстов, если
+            передано дробное число), не попадают в словарь. Defaults to 1.
+
+            max_df (int | float, optional): Слова, которые встречаются
+            больше чем в max_df текстах (или в большей доле текстов, если
+            передано дробное число), не попадают в словарь.
+            Defaults to 1.0.
+
+            max_features (int, optional): Оставить в словаре только
+            max_features самых частых по всему корпусу слов.
+            Defaults to None.
+
+            cache_size (int, optional): Сколько последних различных
+            текстов помнит transform вместе с их счетчиками слов, что бы
+            не токенизировать повторяющиеся тексты заново (LRU кэш).
+            Работает при n_jobs=1 и очищается, когда меняется словарь.
+            None - без кэша. Defaults to None.
+
+            dtype (str, optional): Тип счетчиков: 'uint8', 'uint16',
+            'uint32' или 'int64'. Строки матрицы (и данные CSRMatrix)
+            хранятся в array с 1, 2, 4 или 8 байтами на ячейку.
+            None - строки плотной матрицы это списки int, а CSRMatrix
+            хранит 'int64'. Defaults to None.
+
         Raises:
             ValueError: Неправильный тип данных для lowercase
             ValueError: Неправильный тип данных для stop_words
             ValueError: Неправильный тип данных для sort
+            ValueError: Неправильный тип данных для sparse
+            ValueError: Неправильное значение n_jobs
+            ValueError: Неправильный тип данных для token_pattern
+            ValueError: Неправильный тип данных для tokenizer
+            ValueError: Неправильное значение ngram_range
+            ValueError: Неправильное значение min_df или max_df
+            ValueError: Неправильное значение max_features
+            ValueError: Неправильное значение cache_size
+            ValueError: Неправильное значение dtype
         """
         # Проверка на тип lowercase
         if type(lowercase) is not bool:
@@ -43,17 +576,13 @@ class CountVectorizer:
             # Если выбрано 'english', то используется файлик со стоп словами
             # из английского языка
             if stop_words == 'english':
-                self.stop_words = []
-                with open('stopwords.txt', 'r') as file:
-                    for line in file:
-                        word = line.strip()
-                        self.stop_words.append(word)
+                self.stop_words = _load_stop_words()
 
             # Если передан список, то смотрим что б элементами списка были
-            # строки
-            elif type(stop_words) is list \
+            # строки. Храним как frozenset, что бы проверка была за O(1)
+            elif type(stop_words) in (list, tuple, set, frozenset) \
                     and all(isinstance(word, str) for word in stop_words):
-                self.stop_words = stop_words
+                self.stop_words = frozenset(stop_words)
             # иначе ошибка
             else:
                 raise ValueError('Неправильный формат stop_words')
@@ -72,21 +601,110 @@ class CountVectorizer:
             raise ValueError('sort должен быть либо "original",\
                              либо "alphabetical"')
 
-    def _remove_non_alnum(self, word: str) -> str:
-        """
-        Удаляет из слова все символы, которые не буквы и не числа.
-        Начинается с '_' потому что функция для внутреннего пользования
+        # Проверка на тип sparse
+        if type(sparse) is not bool:
+            raise ValueError('Параметр sparse должен быть True или False')
 
-        Args:
-            word (str): Слово
+        self.sparse = sparse
 
-        Returns:
-            str: Слово только с числами или буквами
-        """
-        # для каждого слова убираем символы, которые не alnum
-        new_word = ''.join(symbol for symbol in word if symbol.isalnum())
+        # Проверка n_jobs
+        if type(n_jobs) is not int or (n_jobs < 1 and n_jobs != -1):
+            raise ValueError('n_jobs должен быть натуральным числом или -1')
+
+        self.n_jobs = n_jobs
 
-        return new_word
+        # Проверка token_pattern, регулярку компилируем один раз
+        if token_pattern is None:
+            self.token_pattern = None
+        elif type(token_pattern) is str:
+            self.token_pattern = re.compile(token_pattern)
+        else:
+            raise ValueError('token_pattern должен быть строкой')
+
+        # Проверка tokenizer
+        if tokenizer is not None and not callable(tokenizer):
+            raise ValueError('tokenizer должен быть функцией')
+
+        self.tokenizer = tokenizer
+
+        # Проверка ngram_range
+        if type(ngram_range) is not tuple or len(ngram_range) != 2 \
+                or not all(type(n) is int for n in ngram_range) \
+                or not 1 <= ngram_range[0] <= ngram_range[1]:
+            raise ValueError('ngram_range должен быть кортежем (min_n, max_n),'
+                             ' где 1 <= min_n <= max_n')
+
+        self.ngram_range = ngram_range
+
+        # для n-грамм: номер каждого слова и словарь, где ключ - кортеж
+        # номеров слов n-граммы, значение - индекс в document-term matrix.
+        # Так при подсчете не создаются строки для каждой n-граммы
+        self._token_ids = {}
+        self._ngram_index = {}
+
+        # Проверка min_df и max_df: целое число - количество текстов,
+        # дробное - доля текстов
+        for name, value in [('min_df', min_df), ('max_df', max_df)]:
+            if not (type(value) is int and value >= 0
+                    or type(value) is float and 0.0 <= value <= 1.0):
+                raise ValueError(f'{name} должен быть целым числом >= 0 '
+                                 'или дробным числом от 0 до 1')
+
+        self.min_df = min_df
+        self.max_df = max_df
+
+        # Проверка max_features
+        if max_features is not None \
+                and (type(max_features) is not int or max_features < 1):
+            raise ValueError('max_features должен быть натуральным числом')
+
+        self.max_features = max_features
+
+        # для отбора слов при fit нужны частоты: в скольких текстах
+        # встречается слово и сколько раз всего, по номерам столбцов.
+        # Тип важен: max_df=1 - не больше одного текста, а 1.0 - все
+        # тексты, min_df=1 - хотя бы один текст, а 1.0 - все тексты
+        self._pruning = not (type(min_df) is int and min_df == 1) \
+            or not (type(max_df) is float and max_df == 1.0) \
+            or max_features is not None
+        self._document_counts = array('q')
+        self._term_counts = array('q')
+        self._n_documents = 0
+
+        # слова, которые были в корпусе, но не попали в словарь
+        # из-за min_df, max_df или max_features
+        self.stop_words_ = set()
+        # их частоты, что бы следующий fit отбирал по частотам за все
+        # время обучения: слово - (кортеж номеров слов n-граммы или None,
+        # в скольких текстах встречается, сколько раз всего)
+        self._pruned_counts = {}
+
+        # Проверка cache_size
+        if cache_size is not None \
+                and (type(cache_size) is not int or cache_size < 1):
+            raise ValueError('cache_size должен быть натуральным числом '
+                             'или None')
+
+        self.cache_size = cache_size
+
+        # Проверка dtype
+        if dtype is not None and dtype not in COUNT_DTYPES:
+            raise ValueError('dtype должен быть одним из '
+                             f'{", ".join(COUNT_DTYPES)} или None')
+
+        self.dtype = dtype
+        self._typecode = COUNT_DTYPES.get(dtype)
+
+        # текст - счетчик его слов, от давно использованных к недавним
+        self._cache = OrderedDict()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+        # слова по алфавиту и номера их столбцов для поиска по префиксу,
+        # строятся при первом поиске
+        self._prefix_index = None
+
+        self.fitted = False  # флажок, что был вызван fit
 
     def _tokenize(self, text: str) -> list:
         """
@@ -106,167 +724,1417 @@ class CountVectorizer:
         if self.lowercase:
             text = text.lower()
 
+        # токенизатор, выбранный пользователем
+        if self.tokenizer is not None or self.token_pattern is not None:
+            if self.tokenizer is not None:
+                words = self.tokenizer(text)
+            else:
+                words = self.token_pattern.findall(text)
+
+            if self.stop_words:
+                words = [word for word in words
+                         if word not in self.stop_words]
+
+            return words
+
         # делим слова по пробелам
         words = text.split()
-        # в зависимости от наличия списка стоп слов убираем non alphanumeric
-        # условие any(...) нужно для того, что бы отсеять случаи, когда есть
-        # слово, состоящее только из non alphanumeric символов
+        # из каждого слова одной заранее скомпилированной регуляркой
+        # убираем non alphanumeric. Если от слова ничего не осталось, значит
+        # оно состояло только из non alphanumeric символов и отбрасывается.
+        # Стоп слова проверяются уже после очистки, что бы 'the,' тоже
+        # считалось стоп словом
+        remove_non_alnum = NON_ALNUM_RE.sub
         if self.stop_words:
-            words = [self._remove_non_alnum(word) for word in words if word
-                     not in self.stop_words and any(c.isalnum() for c in word)]
+            stop_words = self.stop_words
+            words = [token for word in words
+                     if (token := remove_non_alnum('', word))
+                     and token not in stop_words]
         else:
-            words = [self._remove_non_alnum(word) for word in words if
-                     any(c.isalnum() for c in word)]
+            words = [token for word in words
+                     if (token := remove_non_alnum('', word))]
 
         return words
 
-    def fit(self, corpus: list) -> None:
+    def _count_words(self, words: list, vocabulary: dict) -> dict:
         """
-        Создает список всех слов из корпуса, а так же
-        считает их количество
+        Считает слова текста за один проход по списку токенов.
+        Слова, которых нет в словаре, пропускаются
 
         Args:
-            corpus (list): Список текстов
+            words (list): Список токенов
+            vocabulary (dict): Словарь слово - номер столбца
+
+        Returns:
+            dict: Номер столбца - количество слова в тексте
         """
-        # для каждого текста будем токенизировать слова
-        for text in corpus:
-            words = self._tokenize(text)
-            # для каждого нового слова будем добавлять его в словарик
-            # и добавлять в список всех слов
-            for word in words:
-                if word not in self.vocabulary:
-                    self.vocabulary[word] = len(self.vocabulary)
-                    self.feature_names.append(word)
+        text_count = {}
+
+        if self.ngram_range != (1, 1):
+            # слова, которых не было при обучении, получают номер None,
+            # и n-граммы с ними не найдутся в словаре
+            ids = [self._token_ids.get(word) for word in words]
+            ngram_index = self._ngram_index
+            min_n, max_n = self.ngram_range
+            for n in range(min_n, max_n + 1):
+                for key in zip(*(ids[k:] for k in range(n))):
+                    indx = ngram_index.get(key)
+                    if indx is not None:
+                        text_count[indx] = text_count.get(indx, 0) + 1
+
+            return text_count
+
+        for word in words:
+            indx = vocabulary.get(word)
+            if indx is not None:
+                text_count[indx] = text_count.get(indx, 0) + 1
+
+        return text_count
+
+    def _ngram_keys(self, tokens: list) -> Iterator:
+        """
+        Все n-граммы текста скользящим окном по списку токенов,
+        без склеивания слов в строки
 
-        # учитываем сортировку
-        if self.sort == 'alphabetical':
-            self.feature_names = sorted(self.feature_names)
+        Args:
+            tokens (list): Токены текста (слова или их номера)
 
-        # указываем флажок для фит
-        self.fitted = True
+        Yields:
+            tuple: Кортеж из n подряд идущих токенов
+        """
+        min_n, max_n = self.ngram_range
+
+        for n in range(min_n, max_n + 1):
+            yield from zip(*(tokens[k:] for k in range(n)))
 
-    def transform(self, corpus: list) -> list:
+    def _terms(self, words: list) -> list:
         """
-        Преобразования корпуса текстов в document-term matrix
+        Признаки текста в том виде, в котором их можно передать
+        между процессами: сами слова или кортежи слов для n-грамм
 
         Args:
-            corpus (list): Список текстов
+            words (list): Список токенов
 
         Returns:
-            list: Document-term matrix
+            list: Слова или кортежи слов
         """
-        # трансформ можно применить только после фит
-        if not self.fitted:
-            raise RuntimeError('Метод transform можно вызывать только после \
-                               вызова метода fit.')
-
-        matrix = []  # document-term matrix
-
-        # для каждого текста в корпусе будем токенизировать его и
-        # добавлять счетчик
-        for text in corpus:
-            words = self._tokenize(text)
-            text_count = [words.count(word) for word in self.feature_names]
-            matrix.append(text_count)
+        if self.ngram_range == (1, 1):
+            return words
 
-        return matrix
+        return list(self._ngram_keys(words))
 
-    def fit_transform(self, corpus: list) -> list:
+    def _add_ngram(self, key: tuple, words: list) -> None:
         """
-        Одновременный fit и transform
+        Добавляет n-грамму в словарь, если ее там еще нет
 
         Args:
-            corpus (list): Список текстов
-
-        Returns:
-            list: Document-term matrix
+            key (tuple): Кортеж номеров слов n-граммы
+            words (list): Слова n-граммы
+        """
+        if key not in self._ngram_index:
+            indx = len(self.feature_names)
+            # строка создается только один раз, для названия признака
+            word = ' '.join(words)
+            self._ngram_index[key] = indx
+            self.vocabulary[word] = indx
+            self.feature_names.append(word)
+
+    def _add_terms(self, terms: Iterable) -> None:
         """
+        Добавляет в словарь признаки, полученные из _terms
 
-        self.fit(corpus)
+        Args:
+            terms (Iterable): Слова или кортежи слов
+        """
+        if self.ngram_range == (1, 1):
+            self._update_vocabulary(terms)
+            return
 
-        return self.transform(corpus)
+        token_ids = self._token_ids
+        for term in terms:
+            key = tuple(token_ids.setdefault(word, len(token_ids))
+                        for word in term)
+            self._add_ngram(key, term)
 
-    def get_feature_names(self) -> list:
+    def _term_column(self, term) -> int:
         """
-        Получение всех слов в текстах корпуса текстов
+        Номер столбца признака, полученного из _terms
+
+        Args:
+            term (str | tuple): Слово или кортеж слов
 
         Returns:
-            list: Список всех слов корпуса текстов
+            int: Номер столбца
         """
+        if self.ngram_range == (1, 1):
+            return self.vocabulary[term]
 
-        return self.feature_names
+        return self._ngram_index[tuple(self._token_ids[word]
+                                       for word in term)]
 
+    def _build_index(self) -> None:
+        """
+        Перестраивает self.vocabulary так, что бы индекс каждого слова
+        совпадал с его позицией в self.feature_names.
+        Словарь обновляется на месте, поэтому все, кто хранит на него
+        ссылку, видят одинаковые номера столбцов.
+        Частоты для отбора слов переставляются вместе со столбцами
+        """
+        index = {word: i for i, word in enumerate(self.feature_names)}
+
+        # у n-грамм номера столбцов хранятся еще и по кортежам номеров слов
+        if self._ngram_index:
+            new_indices = [0] * len(index)
+            for word, indx in self.vocabulary.items():
+                new_indices[indx] = index[word]
+            for key, indx in self._ngram_index.items():
+                self._ngram_index[key] = new_indices[indx]
+
+        if self._document_counts:
+            # старый номер столбца для каждого нового
+            old_indices = [self.vocabulary[word]
+                           for word in self.feature_names]
+            self._document_counts = array(
+                'q', map(self._document_counts.__getitem__, old_indices))
+            self._term_counts = array(
+                'q', map(self._term_counts.__getitem__, old_indices))
+
+        self.vocabulary.clear()
+        self.vocabulary.update(index)
+
+    def _map_chunks(self, func, corpus: Iterable) -> Iterator:
+        """
+        Делит корпус на куски по PARALLEL_CHUNK_SIZE текстов и применяет
+        к ним func в пуле процессов. Результаты отдаются в порядке кусков,
+        а в обработке одновременно не больше 2 * n_jobs кусков
 
-class TfidfTransformer:
-    """
-    Позволяет считать tf и idf матрицы по count_matrix
+        Args:
+            func (callable): Функция-воркер от списка текстов
+            corpus (Iterable): Тексты корпуса
 
-    """
+        Yields:
+            Any: Результат func для очередного куска
+        """
+        n_jobs = os.cpu_count() if self.n_jobs == -1 else self.n_jobs
+        corpus = iter(corpus)
+
+        with ProcessPoolExecutor(max_workers=n_jobs,
+                                 initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            pending = deque()
+            while True:
+                texts = list(islice(corpus, PARALLEL_CHUNK_SIZE))
+                if not texts:
+                    break
+                pending.append(executor.submit(func, texts))
+                if len(pending) >= 2 * n_jobs:
+                    yield pending.popleft().result()
+
+            while pending:
+                yield pending.popleft().result()
+
+    def _update_vocabulary(self, words: list) -> None:
+        """
+        Добавляет новые слова текста в словарь и в список всех слов
 
-    def __init__(self, feature_names: list) -> None:
+        Args:
+            words (list): Список токенов
         """
-        Инициализация
+        if self.ngram_range != (1, 1):
+            token_ids = self._token_ids
+            ids = [token_ids.setdefault(word, len(token_ids))
+                   for word in words]
+            min_n, max_n = self.ngram_range
+            for n in range(min_n, max_n + 1):
+                for i, key in enumerate(zip(*(ids[k:] for k in range(n)))):
+                    if key not in self._ngram_index:
+                        self._add_ngram(key, words[i:i + n])
+            return
+
+        for word in words:
+            if word not in self.vocabulary:
+                self.vocabulary[word] = len(self.vocabulary)
+                self.feature_names.append(word)
+
+    def _update_counts(self, text_count: dict, n_documents: int = 1,
+                       document_count: dict = None) -> None:
+        """
+        Добавляет частоты текста (или куска корпуса) к частотам
+        слов, по которым потом отбирается словарь
 
         Args:
-            feature_names (list): Все уникальные слова из корпуса
+            text_count (dict): Номер столбца - сколько раз встречается
+            n_documents (int, optional): Сколько текстов учтено в
+            text_count. Defaults to 1.
+            document_count (dict, optional): Номер столбца - в скольких
+            текстах встречается. Если не передан, то каждое слово
+            встречается в одном тексте. Defaults to None.
         """
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+
+        # массивы растут вместе со словарем
+        missing = len(self.feature_names) - len(document_counts)
+        if missing > 0:
+            document_counts.extend([0] * missing)
+            term_counts.extend([0] * missing)
+
+        for indx, count in text_count.items():
+            term_counts[indx] += count
+            if document_count is None:
+                document_counts[indx] += 1
+            else:
+                document_counts[indx] += document_count[indx]
 
-        self.feature_names = feature_names
+        self._n_documents += n_documents
 
-    def tf_transform(self, count_matrix: list) -> list:
+    def _prune(self) -> None:
         """
-        Выводит tf матрицу по count_matrix
+        Убирает из словаря слова по min_df, max_df и max_features.
+        Отбор идет за один проход по частотам, а max_features самых
+        частых слов выбираются через кучу, без сортировки всего словаря.
+        Слова, убранные прошлым отбором, сначала возвращаются в словарь
+        со своими частотами и отбираются заново.
+        Убранные слова попадают в stop_words_
+        """
+        self._restore_pruned()
+
+        n_documents = self._n_documents
+        min_count = self.min_df if type(self.min_df) is int \
+            else math.ceil(self.min_df * n_documents)
+        max_count = self.max_df if type(self.max_df) is int \
+            else math.floor(self.max_df * n_documents)
+        if max_count < min_count:
+            raise ValueError('При таких min_df и max_df в словаре '
+                             'не останется слов')
+
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+        kept = (indx for indx in range(len(self.feature_names))
+                if min_count <= document_counts[indx] <= max_count)
+
+        if self.max_features is not None:
+            # при равной частоте остаются слова, встреченные раньше
+            kept = sorted(heapq.nlargest(self.max_features, kept,
+                                         key=term_counts.__getitem__))
+        else:
+            kept = list(kept)
 
-        Args:
-            count_matrix (list): Матрица-счетчик слов
+        self.stop_words_.clear()
+        if len(kept) == len(self.feature_names):
+            return
 
-        Returns:
-            list: _description_
+        new_indices = {indx: i for i, indx in enumerate(kept)}
+        pruned_keys = {}
+        for key, indx in list(self._ngram_index.items()):
+            if indx in new_indices:
+                self._ngram_index[key] = new_indices[indx]
+            else:
+                pruned_keys[indx] = key
+                del self._ngram_index[key]
+
+        for indx, word in enumerate(self.feature_names):
+            if indx not in new_indices:
+                self._pruned_counts[word] = (pruned_keys.get(indx),
+                                             document_counts[indx],
+                                             term_counts[indx])
+        self.stop_words_.update(self._pruned_counts)
+
+        self.feature_names[:] = [self.feature_names[indx] for indx in kept]
+        self._document_counts = array('q', (document_counts[indx]
+                                            for indx in kept))
+        self._term_counts = array('q', (term_counts[indx] for indx in kept))
+
+        self.vocabulary.clear()
+        self.vocabulary.update((word, i) for i, word in
+                               enumerate(self.feature_names))
+
+    def _restore_pruned(self) -> None:
         """
+        Возвращает в конец словаря слова, убранные прошлым отбором,
+        и добавляет их частоты (к столбцу слова, если оно снова
+        встретилось в корпусе)
+        """
+        document_counts = self._document_counts
+        term_counts = self._term_counts
+
+        missing = len(self.feature_names) - len(document_counts)
+        if missing > 0:
+            document_counts.extend([0] * missing)
+            term_counts.extend([0] * missing)
+
+        for word, (key, document_count, term_count) in \
+                self._pruned_counts.items():
+            indx = self.vocabulary.get(word)
+            if indx is None:
+                indx = len(self.feature_names)
+                if key is not None:
+                    self._ngram_index[key] = indx
+                self.vocabulary[word] = indx
+                self.feature_names.append(word)
+                document_counts.append(0)
+                term_counts.append(0)
+            document_counts[indx] += document_count
+            term_counts[indx] += term_count
+
+        self._pruned_counts.clear()
+
+    def _finish_fit(self) -> None:
+        """
+        Завершает обучение: отбирает слова, учитывает сортировку
+        и ставит флажок fitted
+        """
+        if self._pruning:
+            self._prune()
 
-        tf_matrix = []
-
-        for t_count in count_matrix:
-            total_words = sum(t_count)
-            text_tf = [round(count / total_words, 3) for count in t_count]
-            tf_matrix.append(text_tf)
+        # учитываем сортировку
+        if self.sort == 'alphabetical':
+            # сортируем на месте, что бы ссылки на feature_names
+            # (например, в TfidfTransformer) оставались актуальными
+            self.feature_names.sort()
+            self._build_index()
 
-        return tf_matrix
+        # указываем флажок для фит
+        self.fitted = True
 
-    def idf_transform(self, count_matrix: list) -> list:
+    def _new_matrix(self) -> list:
         """
-        Выводит idf матрицу по count_matrix
-
-        Args:
-            count_matrix (list): матрица-счетчик слов
+        Создает пустую document-term matrix нужного формата
 
         Returns:
-            list: idf matrix
+            list: Пустой список или пустая CSRMatrix, если sparse=True
         """
+        if self.sparse:
+            return CSRMatrix(n_cols=len(self.feature_names),
+                             typecode=self._typecode or 'q')
 
-        idf_matrix = []
+        return []
 
-        for indx in range(len(self.feature_names)):
-
-            document_count = sum(
-                1 for text_count in count_matrix if
-                text_count[indx] > 0)
+    def _make_row(self, text_count: dict):
+        """
+        Превращает счетчик слов текста в строку document-term matrix
 
-            idf = round(math.log((len(count_matrix) + 1) /
-                                 (1 + document_count)) + 1, 3)
-            idf_matrix.append(idf)
+        Args:
+            text_count (dict): Номер столбца - количество слова в тексте
 
-        return idf_matrix
+        Raises:
+            OverflowError: Счетчик не помещается в dtype
 
-    def fit_transform(self, count_matrix: list) -> list:
+        Returns:
+            list | tuple: Список счетчиков по всем столбцам (array,
+            если задан dtype) или, если sparse=True, пара
+            (номера столбцов, счетчики)
+        """
+        typecode = self._typecode
+
+        try:
+            if self.sparse:
+                # в разреженную матрицу кладем только ненулевые счетчики
+                indices = sorted(text_count)
+                counts = [text_count[i] for i in indices]
+                if typecode is not None:
+                    counts = array(typecode, counts)
+                return indices, counts
+
+            if typecode is None:
+                row = [0] * len(self.feature_names)
+            else:
+                row = array(typecode, bytes(len(self.feature_names)
+                                            * array(typecode).itemsize))
+            for i, count in text_count.items():
+                row[i] = count
+        except OverflowError:
+            raise OverflowError(f'Счетчик слова в тексте не помещается '
+                                f'в dtype={self.dtype}') from None
 
-        tf = self.tf_transform(count_matrix)
-        idf = self.idf_transform(count_matrix)
+        return row
 
-        tfidf_matrix = [[round(t * i, 3) for t, i in zip(tf_row, idf)] for
-                        tf_row in tf]
+    def _append_row(self, matrix: list, row) -> None:
+        """
+        Добавляет строку, полученную из _make_row, в матрицу
+        """
+        if self.sparse:
+            matrix.append_row(*row)
+        else:
+            matrix.append(row)
 
-        return tfidf_matrix
+    def _add_corpus(self, corpus: Iterable) -> None:
+        """
+        Добавляет в словарь новые слова корпуса (в конец, не трогая
+        номера уже известных слов) и, если нужно, их частоты
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+        self._materialize()
+        self._vocabulary_changed()
+
+        # для каждого текста будем токенизировать слова
+        # и добавлять новые слова в словарик и в список всех слов
+        if self.n_jobs == 1:
+            for text in corpus:
+                words = self._tokenize(text)
+                self._update_vocabulary(words)
+                # частоты считаются в том же проходе по корпусу
+                if self._pruning:
+                    self._update_counts(
+                        self._count_words(words, self.vocabulary))
+        else:
+            # частичные словари кусков объединяются в порядке кусков,
+            # поэтому порядок слов такой же, как при n_jobs=1
+            for n_texts, document_counts, term_counts in \
+                    self._map_chunks(_fit_chunk, corpus):
+                self._add_terms(document_counts)
+                if self._pruning:
+                    self._update_counts(
+                        {self._term_column(term): count
+                         for term, count in term_counts.items()},
+                        n_documents=n_texts,
+                        document_count={
+                            self._term_column(term): count
+                            for term, count in document_counts.items()})
+
+    def fit(self, corpus: Iterable) -> None:
+        """
+        Создает список всех слов из корпуса, а так же
+        считает их количество.
+        Корпус читается за один проход, поэтому можно передать
+        генератор или открытый файл, в котором каждая строка - это текст
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+        self._add_corpus(corpus)
+        self._finish_fit()
+
+    def partial_fit(self, corpus: Iterable) -> None:
+        """
+        Дообучение на новой порции текстов: новые слова добавляются
+        в конец словаря, а номера столбцов уже известных слов
+        не меняются, поэтому старые document-term matrix остаются
+        верными (в них просто меньше столбцов).
+        Поэтому при partial_fit не применяются sort='alphabetical',
+        min_df, max_df и max_features: они переставили бы или убрали
+        столбцы. Частоты для них копятся, и их учтет следующий fit
+
+        Args:
+            corpus (Iterable): Новые тексты
+        """
+        self._add_corpus(corpus)
+        self.fitted = True
+
+    def _iter_rows(self, corpus: Iterable) -> Iterator:
+        """
+        Строки document-term matrix для каждого текста корпуса
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Yields:
+            list | tuple: Строка в формате _make_row
+        """
+        if self.n_jobs != 1:
+            for rows in self._map_chunks(_transform_chunk, corpus):
+                yield from rows
+            return
+
+        # для каждого текста в корпусе будем токенизировать его и
+        # добавлять счетчик
+        if self.cache_size is None:
+            for text in corpus:
+                text_count = self._count_words(self._tokenize(text),
+                                               self.vocabulary)
+                yield self._make_row(text_count)
+            return
+
+        for text in corpus:
+            yield self._make_row(self._cached_count(text))
+
+    def _cached_count(self, text: str) -> dict:
+        """
+        Счетчик слов текста из LRU кэша, а если его там нет, то
+        посчитанный заново и положенный в кэш. Если кэш переполнен,
+        то из него убирается текст, который дольше всех не встречался
+
+        Args:
+            text (str): Текст
+
+        Returns:
+            dict: Номер столбца - количество слова в тексте
+        """
+        cache = self._cache
+        text_count = cache.get(text)
+
+        if text_count is not None:
+            cache.move_to_end(text)
+            self._cache_hits += 1
+            return text_count
+
+        self._cache_misses += 1
+        text_count = self._count_words(self._tokenize(text), self.vocabulary)
+        cache[text] = text_count
+        if len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        return text_count
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Статистика кэша transform
+
+        Returns:
+            CacheInfo: Попадания, промахи, cache_size и сколько
+            текстов сейчас в кэше
+        """
+        return CacheInfo(self._cache_hits, self._cache_misses,
+                         self.cache_size, len(self._cache))
+
+    def cache_clear(self) -> None:
+        """
+        Очищает кэш transform и его статистику
+        """
+        self._cache.clear()
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    def _vocabulary_changed(self) -> None:
+        """
+        Сбрасывает все, что посчитано по старому словарю:
+        кэш transform и индекс для поиска по префиксу
+        """
+        self.cache_clear()
+        self._prefix_index = None
+
+    def __getstate__(self) -> dict:
+        # кэш и индекс по префиксам не передаются в процессы-воркеры
+        # и не сохраняются в pickle
+        state = self.__dict__.copy()
+        state['_cache'] = OrderedDict()
+        state['_prefix_index'] = None
+
+        return state
+
+    def transform_iter(self, corpus: Iterable,
+                       chunk_size: int = None) -> Iterator:
+        """
+        Лениво преобразует корпус в document-term matrix.
+        В памяти одновременно находится только один текст или один кусок
+        из chunk_size текстов
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+            chunk_size (int, optional): Если указан, то отдаются куски
+            матрицы по chunk_size строк в том же формате, что и у
+            transform. Иначе отдаются отдельные строки: список счетчиков
+            или пара (номера столбцов, счетчики), если sparse=True.
+            Defaults to None.
+
+        Raises:
+            RuntimeError: Метод вызван до fit
+            ValueError: Неправильное значение chunk_size
+
+        Yields:
+            list | tuple | CSRMatrix: Строка или кусок document-term matrix
+        """
+        # трансформ можно применить только после фит
+        if not self.fitted:
+            raise RuntimeError('Метод transform можно вызывать только после \
+                               вызова метода fit.')
+
+        if chunk_size is not None \
+                and (type(chunk_size) is not int or chunk_size < 1):
+            raise ValueError('chunk_size должен быть натуральным числом')
+
+        chunk = self._new_matrix()
+
+        for row in self._iter_rows(corpus):
+            if chunk_size is None:
+                yield row
+                continue
+
+            self._append_row(chunk, row)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = self._new_matrix()
+
+        if chunk_size is not None and len(chunk):
+            yield chunk
+
+    def transform(self, corpus: Iterable) -> list:
+        """
+        Преобразования корпуса текстов в document-term matrix
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Document-term matrix (CSRMatrix, если sparse=True)
+        """
+        # трансформ можно применить только после фит
+        if not self.fitted:
+            raise RuntimeError('Метод transform можно вызывать только после \
+                               вызова метода fit.')
+
+        matrix = self._new_matrix()  # document-term matrix
+
+        # строки берутся не из transform_iter: у TfidfVectorizer
+        # он отдает уже веса, а не счетчики
+        for row in self._iter_rows(corpus):
+            self._append_row(matrix, row)
+
+        return matrix
+
+    def _collect_counts(self, corpus: Iterable) -> list:
+        """
+        Пополняет словарь, как _add_corpus, и запоминает счетчик слов
+        каждого текста. Номера столбцов идут в порядке появления слов
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Номер столбца - количество слова, для каждого текста
+        """
+        self._materialize()
+        self._vocabulary_changed()
+
+        counts = []
+        if self.n_jobs == 1:
+            for text in corpus:
+                words = self._tokenize(text)
+                self._update_vocabulary(words)
+                counts.append(self._count_words(words, self.vocabulary))
+                if self._pruning:
+                    self._update_counts(counts[-1])
+        else:
+            # токенизация идет в процессах, а словарь пополняется здесь
+            # в порядке текстов, как и при n_jobs=1
+            for term_counts in self._map_chunks(_count_chunk, corpus):
+                for term_count in term_counts:
+                    self._add_terms(term_count)
+                    counts.append({self._term_column(term): count
+                                   for term, count in term_count.items()})
+                    if self._pruning:
+                        self._update_counts(counts[-1])
+
+        return counts
+
+    def fit_transform(self, corpus: Iterable) -> list:
+        """
+        Одновременный fit и transform.
+        Каждый текст токенизируется один раз, поэтому корпус
+        может быть генератором
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: Document-term matrix (CSRMatrix, если sparse=True)
+        """
+        # пока словарь строится, номера столбцов идут в порядке
+        # появления слов, поэтому запоминаем счетчики по этим номерам
+        counts = self._collect_counts(corpus)
+
+        original_order = list(self.feature_names)
+        self._finish_fit()
+
+        # после отбора слов и сортировки номера столбцов могли поменяться,
+        # а у убранных слов столбца больше нет
+        if self.sort == 'alphabetical' or self._pruning:
+            new_indices = [self.vocabulary.get(word)
+                           for word in original_order]
+            counts = [{new_indices[i]: count for i, count in
+                       text_count.items() if new_indices[i] is not None}
+                      for text_count in counts]
+
+        matrix = self._new_matrix()  # document-term matrix
+
+        for text_count in counts:
+            self._append_row(matrix, self._make_row(text_count))
+
+        return matrix
+
+    def get_feature_names(self) -> list:
+        """
+        Получение всех слов в текстах корпуса текстов
+
+        Returns:
+            list: Список всех слов корпуса текстов
+        """
+
+        return self.feature_names
+
+    def get_feature_names_by_prefix(self, prefix: str) -> list:
+        """
+        Все слова словаря, которые начинаются с prefix, по алфавиту.
+        При первом вызове слова сортируются один раз, дальше поиск
+        идет бинарным поиском за O(log(размер словаря) + ответ)
+
+        Args:
+            prefix (str): Начало слова
+
+        Returns:
+            list: Пары (слово, номер столбца)
+        """
+        if self._prefix_index is None:
+            feature_names = self.get_feature_names()
+            # при sort='alphabetical' словарь уже почти отсортирован
+            # (кроме слов из partial_fit), и сортировка идет за O(n)
+            columns = array('l', sorted(range(len(feature_names)),
+                                        key=feature_names.__getitem__))
+            self._prefix_index = ([feature_names[indx] for indx in columns],
+                                  columns)
+
+        words, columns = self._prefix_index
+        start = bisect.bisect_left(words, prefix)
+        end = start
+        while end < len(words) and words[end].startswith(prefix):
+            end += 1
+
+        return list(zip(words[start:end], columns[start:end]))
+
+    def _params(self) -> dict:
+        """
+        Параметры __init__, по которым load заново создает векторайзер
+
+        Raises:
+            ValueError: Задан свой tokenizer, его нельзя записать в файл
+
+        Returns:
+            dict: Параметры, которые можно записать в JSON
+        """
+        if self.tokenizer is not None:
+            raise ValueError('Векторайзер со своим tokenizer нельзя '
+                             'сохранить')
+
+        return {
+            'lowercase': self.lowercase,
+            'stop_words': None if self.stop_words is None
+            else sorted(self.stop_words),
+            'sort': self.sort,
+            'sparse': self.sparse,
+            'n_jobs': self.n_jobs,
+            'token_pattern': None if self.token_pattern is None
+            else self.token_pattern.pattern,
+            'ngram_range': self.ngram_range,
+            'min_df': self.min_df,
+            'max_df': self.max_df,
+            'max_features': self.max_features,
+            'cache_size': self.cache_size,
+            'dtype': self.dtype,
+        }
+
+    def _header(self) -> dict:
+        """
+        Заголовок файла модели для _write_model
+
+        Returns:
+            dict: Класс, параметры и обученное состояние, которое
+            можно записать в JSON
+        """
+        return {'class': type(self).__name__, 'params': self._params(),
+                'fitted': self.fitted, 'n_documents': self._n_documents}
+
+    def _sections(self) -> dict:
+        """
+        Обученное состояние в виде массивов для _write_model
+
+        Returns:
+            dict: Название секции - array
+        """
+        sections = _index_sections('vocabulary', self.feature_names,
+                                   _MappedIndex.encode)
+
+        if self._ngram_index:
+            # у n-грамм номера столбцов ищутся по кортежам номеров слов
+            sections.update(_index_sections(
+                'token_ids', self._token_ids, _MappedIndex.encode))
+            ngram_keys = [None] * len(self._ngram_index)
+            for key, indx in self._ngram_index.items():
+                ngram_keys[indx] = key
+            sections.update(_index_sections(
+                'ngram_index', ngram_keys, _MappedNgramIndex.encode))
+
+        if self._pruning:
+            sections['document_counts'] = array('q', self._document_counts)
+            sections['term_counts'] = array('q', self._term_counts)
+
+        return sections
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет векторайзер в бинарный файл. Словарь хранится так,
+        что load отображает его в память через mmap, а не читает:
+        загрузка занимает миллисекунды при любом размере словаря,
+        а процессы, загрузившие один файл, делят одну копию в page cache.
+        stop_words_ и частоты убранных слов не сохраняются, поэтому
+        fit после load отбирает слова только по частотам словаря
+
+        Args:
+            path (str): Путь к файлу
+        """
+        _write_model(path, self._header(), self._sections())
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Загружает векторайзер, сохраненный через save.
+        Файл нельзя менять или удалять, пока векторайзер используется
+
+        Args:
+            path (str): Путь к файлу
+
+        Raises:
+            ValueError: В файле векторайзер другого класса
+
+        Returns:
+            CountVectorizer: Векторайзер, готовый к transform
+        """
+        model_file = _ModelFile(path)
+        header = model_file.header
+        if header['class'] != cls.__name__:
+            raise ValueError(f'В файле сохранен {header["class"]}, '
+                             f'а не {cls.__name__}')
+
+        params = header['params']
+        # JSON не отличает кортеж от списка
+        if 'ngram_range' in params:
+            params['ngram_range'] = tuple(params['ngram_range'])
+
+        vectorizer = cls(**params)
+        vectorizer._load_state(model_file)
+
+        return vectorizer
+
+    def _load_state(self, model_file: _ModelFile) -> None:
+        """
+        Подставляет обученное состояние из файла модели.
+        Словари остаются в файле, копий не создается
+
+        Args:
+            model_file (_ModelFile): Открытый файл модели
+        """
+        self.vocabulary = _MappedIndex(model_file, 'vocabulary')
+        self.feature_names = _MappedKeys(self.vocabulary)
+
+        if 'token_ids.table' in model_file:
+            self._token_ids = _MappedIndex(model_file, 'token_ids')
+            self._ngram_index = _MappedNgramIndex(model_file, 'ngram_index')
+
+        # частоты нужны только для обучения, их копируем одним блоком
+        if 'document_counts' in model_file:
+            self._document_counts.frombytes(
+                model_file.section('document_counts').cast('B'))
+            self._term_counts.frombytes(
+                model_file.section('term_counts').cast('B'))
+
+        self._n_documents = model_file.header['n_documents']
+        self.fitted = model_file.header['fitted']
+
+    def _materialize(self) -> None:
+        """
+        Копирует словари из файла модели в обычные dict и list,
+        что бы их можно было дополнять. Нужно перед fit загруженного
+        векторайзера
+        """
+        if isinstance(self.vocabulary, dict):
+            return
+
+        self.vocabulary = dict(self.vocabulary)
+        self.feature_names = list(self.feature_names)
+        self._token_ids = dict(self._token_ids)
+        self._ngram_index = dict(self._ngram_index)
+
+
+# dtype весов - typecode для array
+FLOAT_DTYPES = {'float32': 'f', 'float64': 'd'}
+
+
+class TfidfTransformer:
+    """
+    Позволяет считать tf и idf матрицы по count_matrix.
+    count_matrix может быть как списком списков, так и CSRMatrix.
+    Вычисления идут только по ненулевым ячейкам строки (нули
+    пропускаются на уровне C через itertools.compress): tf, idf,
+    нормировка и округление делаются за один проход по строке,
+    без промежуточных tf и idf матриц.
+    Округляется только результат, а tf и idf перед умножением
+    не округляются, поэтому часть весов отличается от прежних
+    (посчитанных из округленных до 3 знаков tf и idf)
+    в последнем знаке
+
+    """
+
+    def __init__(self, feature_names: list, decimals: int = 3,
+                 norm: str = None, use_idf: bool = True,
+                 smooth_idf: bool = True,
+                 sublinear_tf: bool = False, dtype: str = None) -> None:
+        """
+        Инициализация
+
+        Args:
+            feature_names (list): Все уникальные слова из корпуса
+
+            decimals (int, optional): До скольки знаков округлять
+            результат. None - не округлять. Defaults to 3.
+
+            norm (str, optional): Нормировка строк tf-idf матрицы:
+            'l2' - на евклидову длину, 'l1' - на сумму модулей,
+            None - без нормировки, tf равен доле слова в тексте.
+            Defaults to None.
+
+            use_idf (bool, optional): Умножать ли tf на idf.
+            Defaults to True.
+
+            smooth_idf (bool, optional): Считать idf по сглаженной
+            формуле ln((1 + n) / (1 + df)) + 1, а не ln(n / df) + 1.
+            Defaults to True.
+
+            sublinear_tf (bool, optional): Заменять количество слова c
+            на 1 + ln(c). Defaults to False.
+
+            dtype (str, optional): Тип весов: 'float32' или 'float64'.
+            Строки плотной матрицы (и данные CSRMatrix) хранятся в array
+            с 4 или 8 байтами на ячейку. None - строки плотной матрицы
+            это списки float, а CSRMatrix хранит 'float64'.
+            Defaults to None.
+
+        Raises:
+            ValueError: Неправильное значение decimals
+            ValueError: Неправильное значение norm
+            ValueError: Неправильный тип данных для use_idf, smooth_idf
+            или sublinear_tf
+            ValueError: Неправильное значение dtype
+        """
+
+        self.feature_names = feature_names
+
+        if decimals is not None and type(decimals) is not int:
+            raise ValueError('decimals должен быть целым числом или None')
+
+        self.decimals = decimals
+
+        if norm not in ('l1', 'l2', None):
+            raise ValueError('norm должен быть "l1", "l2" или None')
+
+        self.norm = norm
+
+        for name, value in [('use_idf', use_idf), ('smooth_idf', smooth_idf),
+                            ('sublinear_tf', sublinear_tf)]:
+            if type(value) is not bool:
+                raise ValueError(f'Параметр {name} должен быть True '
+                                 'или False')
+
+        self.use_idf = use_idf
+        self.smooth_idf = smooth_idf
+        self.sublinear_tf = sublinear_tf
+
+        if dtype is not None and dtype not in FLOAT_DTYPES:
+            raise ValueError('dtype должен быть одним из '
+                             f'{", ".join(FLOAT_DTYPES)} или None')
+
+        self.dtype = dtype
+        self._typecode = FLOAT_DTYPES.get(dtype)
+
+        self.idf_ = None  # idf, посчитанные в fit
+
+        # в скольких текстах встречается каждое слово и сколько всего
+        # текстов: накапливаются в partial_fit, что бы пересчитывать idf
+        # без старых текстов
+        self.document_counts_ = array('q')
+        self.n_documents_ = 0
+
+    def _round(self, values: Iterable) -> list:
+        """
+        Округляет значения до self.decimals знаков, если это нужно
+
+        Args:
+            values (Iterable): Числа
+
+        Returns:
+            list: Округленные числа
+        """
+        if self.decimals is None:
+            return list(values)
+
+        return list(map(round, values, repeat(self.decimals)))
+
+    def _nonzero(self, t_count: list) -> tuple:
+        """
+        Ненулевые ячейки строки плотной матрицы
+
+        Args:
+            t_count (list): Строка матрицы
+
+        Returns:
+            tuple: (номера столбцов, значения)
+        """
+        indices = list(compress(range(len(t_count)), t_count))
+
+        return indices, list(map(t_count.__getitem__, indices))
+
+    def _to_dense(self, indices: list, values: list, n_cols: int) -> list:
+        """
+        Собирает строку плотной матрицы из ненулевых ячеек
+
+        Args:
+            indices (list): Номера столбцов
+            values (list): Значения
+            n_cols (int): Длина строки
+
+        Returns:
+            list: Строка матрицы (array, если задан dtype)
+        """
+        if self._typecode is None:
+            row = [0.0] * n_cols
+        else:
+            row = array(self._typecode,
+                        bytes(n_cols * array(self._typecode).itemsize))
+        for indx, value in zip(indices, values):
+            row[indx] = value
+
+        return row
+
+    def _document_counts(self, count_matrix: list) -> list:
+        """
+        Считает, в скольких текстах встречается каждое слово,
+        за один проход по матрице
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+
+        Returns:
+            list: Количество текстов для каждого столбца
+        """
+        if isinstance(count_matrix, CSRMatrix):
+            # в разреженной матрице номер столбца встречается в строке
+            # только если слово есть в тексте, поэтому достаточно
+            # посчитать номера столбцов
+            document_counts = [0] * count_matrix.n_cols
+            for indx in count_matrix.indices:
+                document_counts[indx] += 1
+
+            return document_counts
+
+        n_cols = len(count_matrix[0]) if count_matrix \
+            else len(self.feature_names)
+        document_counts = [0] * n_cols
+        columns = range(n_cols)
+        for t_count in count_matrix:
+            for indx in compress(columns, t_count):
+                document_counts[indx] += 1
+
+        return document_counts
+
+    def _idf(self, count_matrix: list) -> array:
+        """
+        Неокругленные idf по count_matrix
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+
+        Returns:
+            array: idf для каждого столбца
+        """
+        return self._idf_from_counts(self._document_counts(count_matrix),
+                                     len(count_matrix))
+
+    def _idf_from_counts(self, document_counts: list,
+                         n_documents: int) -> array:
+        """
+        Неокругленные idf: ln((1 + n) / (1 + df)) + 1 при smooth_idf,
+        иначе ln(n / df) + 1. Работает за O(размер словаря)
+
+        Args:
+            document_counts (list): В скольких текстах встречается
+            каждое слово
+            n_documents (int): Количество текстов
+
+        Returns:
+            array: idf для каждого столбца
+        """
+        smooth = int(self.smooth_idf)
+        n_documents += smooth
+
+        # без сглаживания слово, которого нет ни в одном тексте,
+        # считаем встреченным один раз, что бы не делить на ноль
+        return array('d', (math.log(n_documents /
+                                    max(document_count + smooth, 1)) + 1
+                           for document_count in document_counts))
+
+    def _weigh_row(self, indices: list, data: list, idf: array,
+                   norm: str) -> list:
+        """
+        Веса ненулевых ячеек одной строки за один проход:
+        tf (с sublinear_tf), умножение на idf, нормировка и округление.
+        Пустая строка дает пустой список, а не деление на ноль
+
+        Args:
+            indices (list): Номера столбцов
+            data (list): Количество слов
+            idf (array): idf для каждого столбца или None
+            norm (str): 'l1', 'l2' или None (доля слова в тексте)
+
+        Returns:
+            list: Веса ячеек
+        """
+        if self.sublinear_tf:
+            # знак нужен для счетчиков со знаком из HashingVectorizer
+            data = [math.copysign(1 + math.log(abs(count)), count)
+                    for count in data]
+
+        if idf is None:
+            weights = list(data)
+        else:
+            weights = list(map(mul, data, map(idf.__getitem__, indices)))
+
+        if norm is None:
+            denominator = sum(data)
+        elif norm == 'l1':
+            denominator = sum(map(abs, weights))
+        else:
+            denominator = math.sqrt(sum(map(mul, weights, weights)))
+
+        if not denominator:
+            return self._round(weights)
+
+        return self._round(map(truediv, weights, repeat(denominator)))
+
+    def _tfidf(self, count_matrix: list, idf: array, norm: str,
+               copy: bool = True) -> list:
+        """
+        Применяет _weigh_row к каждой строке матрицы
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+            idf (array): idf для каждого столбца или None
+            norm (str): 'l1', 'l2' или None
+            copy (bool, optional): Если False, то строки плотной матрицы
+            заменяются на месте, а CSRMatrix результата использует те же
+            indptr и indices, что и count_matrix. Defaults to True.
+
+        Returns:
+            list: Матрица весов (CSRMatrix, если на вход пришла CSRMatrix)
+        """
+        if isinstance(count_matrix, CSRMatrix):
+            tfidf_matrix = CSRMatrix(n_cols=count_matrix.n_cols,
+                                     typecode=self._typecode or 'd')
+            if not copy:
+                # структура матрицы не меняется, новый только массив весов
+                tfidf_matrix.indptr = count_matrix.indptr
+                tfidf_matrix.indices = count_matrix.indices
+
+            for indices, data in count_matrix:
+                weights = self._weigh_row(indices, data, idf, norm)
+                if copy:
+                    tfidf_matrix.append_row(indices, weights)
+                else:
+                    tfidf_matrix.data.extend(weights)
+
+            return tfidf_matrix
+
+        tfidf_matrix = [] if copy else count_matrix
+
+        for i, t_count in enumerate(count_matrix):
+            indices, data = self._nonzero(t_count)
+            row = self._to_dense(
+                indices, self._weigh_row(indices, data, idf, norm),
+                len(t_count))
+            if copy:
+                tfidf_matrix.append(row)
+            else:
+                tfidf_matrix[i] = row
+
+        return tfidf_matrix
+
+    def tf_transform(self, count_matrix: list) -> list:
+        """
+        Выводит tf матрицу по count_matrix
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+
+        Returns:
+            list: tf matrix (CSRMatrix, если на вход пришла CSRMatrix)
+        """
+
+        return self._tfidf(count_matrix, idf=None, norm=None)
+
+    def idf_transform(self, count_matrix: list) -> list:
+        """
+        Выводит idf матрицу по count_matrix
+
+        Args:
+            count_matrix (list): матрица-счетчик слов
+
+        Returns:
+            list: idf matrix
+        """
+
+        return self._round(self._idf(count_matrix))
+
+    def fit(self, count_matrix: list) -> None:
+        """
+        Считает и запоминает idf по обучающей count_matrix
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+        """
+
+        self.document_counts_ = array('q', self._document_counts(
+            count_matrix))
+        self.n_documents_ = len(count_matrix)
+        self.idf_ = self._idf_from_counts(self.document_counts_,
+                                          self.n_documents_)
+
+    def partial_fit(self, count_matrix: list) -> None:
+        """
+        Дообучение на новых текстах: их частоты добавляются к накопленным,
+        а idf пересчитываются за O(размер словаря), без старых текстов.
+        В count_matrix может быть больше столбцов, чем раньше (словарь
+        CountVectorizer.partial_fit растет), новые слова получают
+        свои idf
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов новых текстов
+        """
+        document_counts = self.document_counts_
+
+        batch_counts = self._document_counts(count_matrix)
+        missing = len(batch_counts) - len(document_counts)
+        if missing > 0:
+            document_counts.extend([0] * missing)
+
+        for indx, count in enumerate(batch_counts):
+            if count:
+                document_counts[indx] += count
+
+        self.n_documents_ += len(count_matrix)
+        self.idf_ = self._idf_from_counts(document_counts,
+                                          self.n_documents_)
+
+    def transform(self, count_matrix: list, copy: bool = True) -> list:
+        """
+        Считает tf-idf матрицу для новых текстов по idf из fit.
+        Для CSRMatrix работает за O(количество ненулевых ячеек)
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+            copy (bool, optional): Если False, то результат пишется
+            поверх строк count_matrix (для CSRMatrix переиспользуются
+            indptr и indices). Defaults to True.
+
+        Raises:
+            RuntimeError: Метод вызван до fit
+            ValueError: Количество столбцов не совпадает с idf
+
+        Returns:
+            list: tf-idf matrix (CSRMatrix, если на вход пришла CSRMatrix)
+        """
+
+        if self.idf_ is None:
+            raise RuntimeError('Метод transform можно вызывать только после '
+                               'вызова метода fit.')
+
+        if isinstance(count_matrix, CSRMatrix):
+            n_cols = count_matrix.n_cols
+        else:
+            n_cols = len(count_matrix[0]) if count_matrix else len(self.idf_)
+        if n_cols != len(self.idf_):
+            raise ValueError(f'В count_matrix {n_cols} столбцов, '
+                             f'а fit был на {len(self.idf_)}')
+
+        idf = self.idf_ if self.use_idf else None
+
+        return self._tfidf(count_matrix, idf, self.norm, copy=copy)
+
+    def fit_transform(self, count_matrix: list, copy: bool = True) -> list:
+        """
+        Совмещает fit и transform
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов
+            copy (bool, optional): См. transform. Defaults to True.
+
+        Returns:
+            list: tf-idf matrix (CSRMatrix, если на вход пришла CSRMatrix)
+        """
+
+        self.fit(count_matrix)
+
+        return self.transform(count_matrix, copy=copy)
+
+    def _params(self) -> dict:
+        """
+        Параметры __init__ кроме feature_names
+
+        Returns:
+            dict: Параметры, которые можно записать в JSON
+        """
+        return {'decimals': self.decimals, 'norm': self.norm,
+                'use_idf': self.use_idf, 'smooth_idf': self.smooth_idf,
+                'sublinear_tf': self.sublinear_tf, 'dtype': self.dtype}
+
+    def _load_idf(self, model_file: _ModelFile) -> None:
+        """
+        Копирует idf и частоты для partial_fit из файла модели,
+        если они там есть
+        """
+        # копия одним блоком, что бы трансформер можно было
+        # передать в другой процесс
+        if 'idf' in model_file:
+            self.idf_ = array('d')
+            self.idf_.frombytes(model_file.section('idf').cast('B'))
+        if 'df' in model_file:
+            self.document_counts_.frombytes(
+                model_file.section('df').cast('B'))
+            self.n_documents_ = model_file.header['idf_n_documents']
+
+    def save(self, path: str) -> None:
+        """
+        Сохраняет трансформер в тот же бинарный формат,
+        что и CountVectorizer.save
+
+        Args:
+            path (str): Путь к файлу
+        """
+        sections = _index_sections('vocabulary', self.feature_names,
+                                   _MappedIndex.encode)
+        if self.idf_ is not None:
+            sections['idf'] = array('d', self.idf_)
+        sections['df'] = self.document_counts_
+
+        _write_model(path, {'class': type(self).__name__,
+                            'params': self._params(),
+                            'idf_n_documents': self.n_documents_},
+                     sections)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        Загружает трансформер, сохраненный через save.
+        feature_names читаются из файла через mmap
+
+        Args:
+            path (str): Путь к файлу
+
+        Raises:
+            ValueError: В файле модель другого класса
+
+        Returns:
+            TfidfTransformer: Трансформер
+        """
+        model_file = _ModelFile(path)
+        if model_file.header['class'] != cls.__name__:
+            raise ValueError(f'В файле сохранен {model_file.header["class"]}'
+                             f', а не {cls.__name__}')
+
+        transformer = cls(feature_names=_MappedKeys(
+            _MappedIndex(model_file, 'vocabulary')),
+            **model_file.header['params'])
+        transformer._load_idf(model_file)
+
+        return transformer
 
 
 class TfidfVectorizer(CountVectorizer):
@@ -277,29 +2145,325 @@ class TfidfVectorizer(CountVectorizer):
         CountVectorizer (_type_): Класс позволяющий считать count_matrix
     """
 
-    def __init__(self):
+    def __init__(self, lowercase: bool = True, stop_words: list = None,
+                 sort: str = 'original', sparse: bool = False,
+                 n_jobs: int = 1, token_pattern: str = None,
+                 tokenizer=None, ngram_range: tuple = (1, 1),
+                 min_df=1, max_df=1.0, max_features: int = None,
+                 cache_size: int = None, norm: str = None,
+                 use_idf: bool = True, smooth_idf: bool = True,
+                 sublinear_tf: bool = False, decimals: int = 3,
+                 dtype: str = None) -> None:
         """
         Инициализация с наследованием от CountVectorizer,
-        а также используем экземпляр TfidfTransformer
+        а также используем экземпляр TfidfTransformer.
+        Параметры norm, use_idf, smooth_idf, sublinear_tf, decimals и
+        dtype передаются в TfidfTransformer, остальные - в CountVectorizer
         """
-        super().__init__()
+        super().__init__(lowercase=lowercase, stop_words=stop_words,
+                         sort=sort, sparse=sparse, n_jobs=n_jobs,
+                         token_pattern=token_pattern, tokenizer=tokenizer,
+                         ngram_range=ngram_range, min_df=min_df,
+                         max_df=max_df, max_features=max_features,
+                         cache_size=cache_size)
         self.tf_idf_transformer = TfidfTransformer(
-            feature_names=self.feature_names)
+            feature_names=self.feature_names, decimals=decimals, norm=norm,
+            use_idf=use_idf, smooth_idf=smooth_idf,
+            sublinear_tf=sublinear_tf, dtype=dtype)
+
+    @property
+    def idf_(self) -> array:
+        """
+        idf, посчитанные в fit
+
+        Returns:
+            array: idf для каждого слова из get_feature_names
+        """
+        return self.tf_idf_transformer.idf_
 
-    def fit_transform(self, corpus: list) -> list:
+    def fit(self, corpus: Iterable) -> None:
+        """
+        Строит словарь и считает idf по корпусу
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+        """
+
+        self.tf_idf_transformer.fit(super().fit_transform(corpus))
+
+    def partial_fit(self, corpus: Iterable) -> None:
+        """
+        Дообучение на новой порции текстов: словарь пополняется как в
+        CountVectorizer.partial_fit, а idf пересчитываются по накопленным
+        частотам, без старых текстов
+
+        Args:
+            corpus (Iterable): Новые тексты
+        """
+        counts = self._collect_counts(corpus)
+        self.fitted = True
+
+        # для частот трансформеру нужны только номера столбцов,
+        # поэтому матрица всегда разреженная и без сортировки
+        count_matrix = CSRMatrix(n_cols=len(self.feature_names))
+        for text_count in counts:
+            count_matrix.append_row(text_count, text_count.values())
+
+        self.tf_idf_transformer.partial_fit(count_matrix)
+
+    def transform(self, corpus: Iterable) -> list:
+        """
+        Считает tf-idf для новых текстов по словарю и idf из fit,
+        не пересчитывая ничего по обучающему корпусу
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+
+        Returns:
+            list: tf-ifd matrix (CSRMatrix, если sparse=True)
+        """
+
+        return self.tf_idf_transformer.transform(super().transform(corpus),
+                                                 copy=False)
+
+    def transform_iter(self, corpus: Iterable,
+                       chunk_size: int = None) -> Iterator:
+        """
+        Лениво считает tf-idf для новых текстов, как transform.
+        Строки и куски те же, что у CountVectorizer.transform_iter,
+        но вместо счетчиков в них веса
+
+        Args:
+            corpus (Iterable): Тексты корпуса
+            chunk_size (int, optional): Если указан, то отдаются куски
+            tf-idf матрицы по chunk_size строк. Иначе отдаются отдельные
+            строки: список весов или пара (номера столбцов, веса), если
+            sparse=True. Defaults to None.
+
+        Yields:
+            list | tuple | CSRMatrix: Строка или кусок tf-idf matrix
+        """
+        transformer = self.tf_idf_transformer
+
+        for item in super().transform_iter(corpus, chunk_size):
+            if chunk_size is not None:
+                yield transformer.transform(item, copy=False)
+            elif self.sparse:
+                # строка - это матрица из одной строки
+                row = CSRMatrix(n_cols=len(self.feature_names))
+                row.append_row(*item)
+                yield transformer.transform(row, copy=False).getrow(0)
+            else:
+                yield transformer.transform([item], copy=False)[0]
+
+    def fit_transform(self, corpus: Iterable) -> list:
         """
         Совмещает fit и transform
 
         Args:
-            corpus (list): Список текстов
+            corpus (Iterable): Тексты корпуса
 
         Returns:
-            list: tf-ifd matrix
+            list: tf-ifd matrix (CSRMatrix, если sparse=True)
         """
 
         count_matrix = super().fit_transform(corpus)
 
-        return self.tf_idf_transformer.fit_transform(count_matrix)
+        return self.tf_idf_transformer.fit_transform(count_matrix,
+                                                     copy=False)
+
+    def _params(self) -> dict:
+        """
+        Параметры __init__: параметры CountVectorizer и TfidfTransformer
+        """
+        return {**super()._params(), **self.tf_idf_transformer._params()}
+
+    def _header(self) -> dict:
+        """
+        Заголовок как у CountVectorizer и количество текстов для idf
+        """
+        return dict(super()._header(),
+                    idf_n_documents=self.tf_idf_transformer.n_documents_)
+
+    def _sections(self) -> dict:
+        """
+        Словарь как у CountVectorizer и idf
+        """
+        sections = super()._sections()
+        if self.idf_ is not None:
+            sections['idf'] = array('d', self.idf_)
+        sections['df'] = self.tf_idf_transformer.document_counts_
+
+        return sections
+
+    def _load_state(self, model_file: _ModelFile) -> None:
+        """
+        Состояние CountVectorizer и idf из файла модели
+        """
+        super()._load_state(model_file)
+        self.tf_idf_transformer.feature_names = self.feature_names
+        self.tf_idf_transformer._load_idf(model_file)
+
+    def _materialize(self) -> None:
+        """
+        Как у CountVectorizer, но трансформер тоже получает новый
+        feature_names
+        """
+        super()._materialize()
+        self.tf_idf_transformer.feature_names = self.feature_names
+
+
+class TfidfSearch:
+    """
+    Поиск k самых похожих по косинусу текстов с помощью обратного
+    индекса: для каждого слова хранится список (номер текста, вес).
+    Запрос сравнивается только с текстами, в которых есть хотя бы одно
+    его слово, поэтому время поиска зависит от длины списков слов
+    запроса, а не от размера корпуса.
+    Веса текстов и запросов не округляются (decimals векторайзера
+    влияет только на его transform): иначе у длинного текста все
+    веса округлились бы до нуля и он пропал бы из индекса
+    """
+
+    def __init__(self, vectorizer: TfidfVectorizer) -> None:
+        """
+        Инициализация
+
+        Args:
+            vectorizer (TfidfVectorizer): Векторайзер, которым считаются
+            веса текстов и запросов. Обучается в fit
+
+        Raises:
+            ValueError: Передан не TfidfVectorizer
+        """
+        if not isinstance(vectorizer, TfidfVectorizer):
+            raise ValueError('vectorizer должен быть TfidfVectorizer')
+
+        self.vectorizer = vectorizer
+
+        # для каждого столбца номера текстов и веса, деленные на длину
+        # вектора текста, что бы скалярное произведение было косинусом
+        self._postings_docs = []
+        self._postings_weights = []
+        self.n_documents = 0
+
+    @staticmethod
+    def _normalized(row) -> tuple:
+        """
+        Ненулевые ячейки строки tf-idf матрицы, деленные на ее
+        евклидову длину
+
+        Args:
+            row (list | tuple): Плотная строка или пара
+            (номера столбцов, веса)
+
+        Returns:
+            tuple: (номера столбцов, веса)
+        """
+        if isinstance(row, tuple):
+            indices, weights = row
+        else:
+            indices = list(compress(range(len(row)), row))
+            weights = list(compress(row, row))
+
+        length = math.sqrt(sum(map(mul, weights, weights)))
+        if not length:
+            return [], []
+
+        return indices, list(map(truediv, weights, repeat(length)))
+
+    def _weights(self, count_matrix: list) -> list:
+        """
+        tf-idf матрица без округления: копия трансформера векторайзера
+        с теми же idf и decimals=None
+
+        Args:
+            count_matrix (list): Матрица-счетчик слов, заменяется на месте
+
+        Returns:
+            list: tf-idf matrix
+        """
+        transformer = copy.copy(self.vectorizer.tf_idf_transformer)
+        transformer.decimals = None
+
+        return transformer.transform(count_matrix, copy=False)
+
+    def fit(self, corpus: Iterable) -> None:
+        """
+        Обучает векторайзер на корпусе и строит обратный индекс
+        за один проход по tf-idf матрице
+
+        Args:
+            corpus (Iterable): Тексты, среди которых идет поиск
+        """
+        vectorizer = self.vectorizer
+        # как TfidfVectorizer.fit_transform, но веса без округления
+        count_matrix = CountVectorizer.fit_transform(vectorizer, corpus)
+        vectorizer.tf_idf_transformer.fit(count_matrix)
+        matrix = self._weights(count_matrix)
+
+        postings_docs = [array('l') for _ in self.vectorizer.feature_names]
+        postings_weights = [array('d')
+                            for _ in self.vectorizer.feature_names]
+
+        for doc, row in enumerate(matrix):
+            for indx, weight in zip(*self._normalized(row)):
+                postings_docs[indx].append(doc)
+                postings_weights[indx].append(weight)
+
+        self._postings_docs = postings_docs
+        self._postings_weights = postings_weights
+        self.n_documents = len(matrix)
+
+    def search(self, query: str, k: int = 10) -> list:
+        """
+        k текстов, самых похожих на запрос. Тексты без общих
+        с запросом слов (косинус 0) не возвращаются
+
+        Args:
+            query (str): Текст запроса
+            k (int, optional): Сколько текстов вернуть. Defaults to 10.
+
+        Raises:
+            RuntimeError: Метод вызван до fit
+            RuntimeError: Словарь векторайзера изменился после fit
+            (например, из-за partial_fit)
+            ValueError: Неправильное значение k
+
+        Returns:
+            list: Пары (номер текста, косинус) по убыванию косинуса,
+            при равенстве - по возрастанию номера
+        """
+        if not self.vectorizer.fitted:
+            raise RuntimeError('Метод search можно вызывать только после '
+                               'вызова метода fit.')
+
+        if len(self.vectorizer.feature_names) != len(self._postings_docs):
+            raise RuntimeError('Словарь векторайзера изменился после '
+                               'построения индекса, вызовите fit заново.')
+
+        if type(k) is not int or k < 1:
+            raise ValueError('k должен быть натуральным числом')
+
+        vectorizer = self.vectorizer
+        text_count = vectorizer._count_words(vectorizer._tokenize(query),
+                                             vectorizer.vocabulary)
+        # вес запроса считается так же, как и у текстов корпуса
+        count_matrix = CSRMatrix(n_cols=len(vectorizer.feature_names))
+        indices = sorted(text_count)
+        count_matrix.append_row(indices, [text_count[i] for i in indices])
+        row = self._weights(count_matrix).getrow(0)
+
+        # скалярное произведение только по спискам слов запроса
+        scores = {}
+        for indx, query_weight in zip(*self._normalized(row)):
+            for doc, weight in zip(self._postings_docs[indx],
+                                   self._postings_weights[indx]):
+                scores[doc] = scores.get(doc, 0.0) + query_weight * weight
+
+        # куча на k элементов вместо сортировки всех найденных текстов
+        return heapq.nlargest(k, scores.items(),
+                              key=lambda item: (item[1], -item[0]))
 
 
 if __name__ == '__main__':
@@ -311,3 +2475,12 @@ if __name__ == '__main__':
     tfidf_matrix = vectorizer.fit_transform(corpus)
     print(vectorizer.get_feature_names())
     print(tfidf_matrix)
+
+    sparse_vectorizer = TfidfVectorizer(sparse=True)
+    print(sparse_vectorizer.fit_transform(corpus).toarray())
+
+    print(vectorizer.transform(['Fresh pasta with parmesan']))
+
+    search = TfidfSearch(TfidfVectorizer(sparse=True))
+    search.fit(corpus)
+    print(search.search('fresh pasta', k=1))
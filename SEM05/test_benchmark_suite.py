@@ -0,0 +1,38 @@
+from benchmark_suite import compare, make_corpus
+
+
+def result(seconds, peak_bytes):
+    return {'seconds': seconds, 'peak_bytes': peak_bytes,
+            'docs_per_second': 1 / seconds, 'tokens_per_second': 1 / seconds}
+
+
+def test_compare():
+    baseline = {'fit/1000': result(1.0, 1000),
+                'transform/1000': result(2.0, 2000),
+                'old/1000': result(1.0, 1000)}
+    results = {'fit/1000': result(1.2, 1300),
+               'transform/1000': result(1.0, 2400),
+               'new/1000': result(100.0, 10 ** 9)}
+
+    regressions = compare(results, baseline, tolerance=0.25)
+    assert len(regressions) == 1
+    assert regressions[0].startswith('fit/1000: peak_bytes')
+    assert '+30%' in regressions[0]
+
+    assert compare(results, baseline, tolerance=0.1) == [
+        'fit/1000: seconds 1 -> 1.2 (+20%)',
+        'fit/1000: peak_bytes 1000 -> 1300 (+30%)',
+        'transform/1000: peak_bytes 2000 -> 2400 (+20%)']
+    assert compare(results, baseline, tolerance=0.5) == []
+    assert compare(results, {}, tolerance=0.0) == []
+
+
+def test_make_corpus():
+    corpus = make_corpus(20, vocabulary_size=50, text_length=7)
+    assert len(corpus) == 20
+    assert all(len(text.split()) == 7 for text in corpus)
+    assert corpus == make_corpus(20, vocabulary_size=50, text_length=7)
+    # при zipf_s=0 все слова равновероятны
+    uniform = ' '.join(make_corpus(200, vocabulary_size=50,
+                                   zipf_s=0.0)).split()
+    assert uniform.count('w0') < 3 * uniform.count('w49')
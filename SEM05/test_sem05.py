@@ -0,0 +1,348 @@
+import math
+from sem05 import (CountVectorizer, TfidfSearch, TfidfTransformer,
+                   TfidfVectorizer)
+import pytest
+
+
+CORPUS = [
+    'Crock Pot Pasta Never boil pasta again',
+    'Pasta Pomodoro Fresh ingredients Parmesan to taste'
+]
+
+
+def test_tfidf_vectorizer_dense():
+    expected = [[0.201, 0.201, 0.286, 0.201, 0.201, 0.201,
+                 0.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+                [0.0, 0.0, 0.143, 0.0, 0.0, 0.0,
+                 0.201, 0.201, 0.201, 0.201, 0.201, 0.201]]
+    assert TfidfVectorizer().fit_transform(CORPUS) == expected
+
+
+def test_tfidf_transformer_sparse_matches_dense():
+    vectorizer = CountVectorizer()
+    dense = vectorizer.fit_transform(CORPUS)
+    sparse = CountVectorizer(sparse=True).fit_transform(CORPUS)
+    transformer = TfidfTransformer(vectorizer.get_feature_names())
+    assert transformer.idf_transform(sparse) == \
+        transformer.idf_transform(dense)
+    assert transformer.fit_transform(sparse).toarray() == \
+        transformer.fit_transform(dense)
+
+
+def test_tfidf_vectorizer_shares_feature_names():
+    vectorizer = TfidfVectorizer(sort='alphabetical')
+    vectorizer.fit_transform(CORPUS)
+    assert vectorizer.tf_idf_transformer.feature_names is \
+        vectorizer.get_feature_names()
+    assert vectorizer.get_feature_names()[0] == 'again'
+
+
+def reference_tfidf(count_matrix):
+    """
+    Эталон: tf = count / sum, idf = ln((1 + n) / (1 + df)) + 1
+    """
+    n = len(count_matrix)
+    n_cols = len(count_matrix[0])
+    idf = [math.log((n + 1) / (1 + sum(1 for row in count_matrix if row[j])))
+           + 1 for j in range(n_cols)]
+    return [[count / sum(row) * idf[j] for j, count in enumerate(row)]
+            for row in count_matrix]
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_without_rounding(sparse):
+    corpus = CORPUS + ['pasta pasta taste', 'boil water']
+    count_matrix = CountVectorizer().fit_transform(corpus)
+    vectorizer = CountVectorizer(sparse=sparse)
+    transformer = TfidfTransformer(vectorizer.get_feature_names(),
+                                   decimals=None)
+    result = transformer.fit_transform(vectorizer.fit_transform(corpus))
+    if sparse:
+        result = result.toarray()
+    expected = reference_tfidf(count_matrix)
+    for row, expected_row in zip(result, expected):
+        assert row == pytest.approx(expected_row)
+
+
+def test_tfidf_rounds_only_result():
+    # раньше tf и idf округлялись до умножения и здесь получалось
+    # round(0.667 * 1.288, 3) = 0.859, теперь округляется только
+    # результат: round(2 / 3 * 1.2877, 3) = 0.858
+    corpus = ['a b c', 'a a b', 'b d e f g']
+    count_matrix = CountVectorizer().fit_transform(corpus)
+    result = TfidfVectorizer().fit_transform(corpus)
+    assert result[1][0] == 0.858
+    expected = reference_tfidf(count_matrix)
+    assert result == [[round(value, 3) for value in row]
+                      for row in expected]
+
+
+def test_wrong_decimals():
+    with pytest.raises(ValueError):
+        TfidfTransformer([], decimals='3')
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_fit_then_transform(sparse):
+    vectorizer = TfidfVectorizer(sparse=sparse)
+    expected = vectorizer.fit_transform(CORPUS)
+    idf = list(vectorizer.idf_)
+
+    refitted = TfidfVectorizer(sparse=sparse)
+    refitted.fit(CORPUS)
+    assert list(refitted.idf_) == idf
+    result = refitted.transform(CORPUS)
+    # новый текст не меняет idf и словарь
+    new = refitted.transform(['Pasta with fresh basil'])
+    assert list(refitted.idf_) == idf
+    if sparse:
+        result, expected, new = \
+            result.toarray(), expected.toarray(), new.toarray()
+    assert result == expected
+    # tf считается по словам из словаря: pasta и fresh
+    assert new == [[0.0, 0.0, 0.5, 0.0, 0.0, 0.0,
+                    0.0, 0.703, 0.0, 0.0, 0.0, 0.0]]
+
+
+def test_tfidf_transformer_errors():
+    transformer = TfidfTransformer(['a', 'b'])
+    with pytest.raises(RuntimeError):
+        transformer.transform([[1, 0]])
+    transformer.fit([[1, 0], [1, 1]])
+    with pytest.raises(ValueError):
+        transformer.transform([[1, 0, 1]])
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_norms(sparse):
+    l2 = TfidfVectorizer(sparse=sparse, norm='l2', decimals=None)
+    l1 = TfidfVectorizer(sparse=sparse, norm='l1', decimals=None)
+    rows_l2 = l2.fit_transform(CORPUS)
+    rows_l1 = l1.fit_transform(CORPUS)
+    if sparse:
+        rows_l2, rows_l1 = rows_l2.toarray(), rows_l1.toarray()
+    for row in rows_l2:
+        assert math.isclose(sum(value ** 2 for value in row), 1.0)
+    for row in rows_l1:
+        assert math.isclose(sum(map(abs, row)), 1.0)
+
+
+def test_tfidf_sublinear_and_idf_options():
+    count_matrix = [[3, 1, 0], [1, 0, 0]]
+    transformer = TfidfTransformer(['a', 'b', 'c'], decimals=None,
+                                   norm='l1', use_idf=False,
+                                   sublinear_tf=True)
+    first = 1 + math.log(3)
+    assert transformer.fit_transform(count_matrix) == \
+        [[first / (first + 1), 1 / (first + 1), 0.0], [1.0, 0.0, 0.0]]
+
+    transformer = TfidfTransformer(['a', 'b', 'c'], decimals=None,
+                                   smooth_idf=False)
+    transformer.fit(count_matrix)
+    assert list(transformer.idf_) == [1.0, math.log(2) + 1,
+                                      math.log(2) + 1]
+
+
+@pytest.mark.parametrize('norm', [None, 'l1', 'l2'])
+def test_tfidf_empty_rows(norm):
+    transformer = TfidfTransformer(['a', 'b'], norm=norm)
+    assert transformer.fit_transform([[0, 0], [1, 2]])[0] == [0.0, 0.0]
+    sparse = CountVectorizer(sparse=True).fit_transform(['', 'a b'])
+    result = transformer.fit_transform(sparse)
+    assert list(result.getrow(0)[1]) == []
+    assert result.shape == (2, 2)
+
+
+def test_tfidf_transform_in_place():
+    vectorizer = CountVectorizer(sparse=True)
+    count_matrix = vectorizer.fit_transform(CORPUS)
+    transformer = TfidfTransformer(vectorizer.get_feature_names(),
+                                   norm='l2')
+    expected = transformer.fit_transform(count_matrix).toarray()
+    result = transformer.transform(count_matrix, copy=False)
+    assert result.indices is count_matrix.indices
+    assert result.toarray() == expected
+
+    dense = count_matrix.toarray()
+    assert transformer.transform(dense, copy=False) is dense
+    assert dense == expected
+
+
+def test_wrong_tfidf_options():
+    with pytest.raises(ValueError):
+        TfidfTransformer(['a'], norm='l3')
+    with pytest.raises(ValueError):
+        TfidfTransformer(['a'], sublinear_tf=1)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_save_load(tmp_path, sparse):
+    path = tmp_path / 'model.bin'
+    new_texts = ['Fresh pasta with parmesan']
+    vectorizer = TfidfVectorizer(sparse=sparse, norm='l2',
+                                 sublinear_tf=True)
+    vectorizer.fit(CORPUS)
+    vectorizer.save(path)
+
+    loaded = TfidfVectorizer.load(path)
+    assert loaded.tf_idf_transformer.norm == 'l2'
+    assert list(loaded.idf_) == list(vectorizer.idf_)
+    result, expected = loaded.transform(new_texts), \
+        vectorizer.transform(new_texts)
+    if sparse:
+        result, expected = result.toarray(), expected.toarray()
+    assert result == expected
+
+    loaded.fit(CORPUS + ['new words'])
+    assert loaded.tf_idf_transformer.feature_names is \
+        loaded.get_feature_names()
+
+
+def test_tfidf_transformer_save_load(tmp_path):
+    path = tmp_path / 'model.bin'
+    vectorizer = CountVectorizer()
+    count_matrix = vectorizer.fit_transform(CORPUS)
+    transformer = TfidfTransformer(vectorizer.get_feature_names(),
+                                   decimals=None)
+    expected = transformer.fit_transform(count_matrix)
+    transformer.save(path)
+
+    loaded = TfidfTransformer.load(path)
+    assert list(loaded.feature_names) == vectorizer.get_feature_names()
+    assert loaded.transform(count_matrix) == expected
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_partial_fit(sparse):
+    corpus = CORPUS + ['pasta never boil, fresh basil']
+    vectorizer = TfidfVectorizer(sparse=sparse)
+    for text in corpus:
+        vectorizer.partial_fit([text])
+
+    full = TfidfVectorizer(sparse=sparse)
+    expected = full.fit_transform(corpus)
+    assert list(vectorizer.idf_) == list(full.idf_)
+    assert vectorizer.tf_idf_transformer.n_documents_ == 3
+    result = vectorizer.transform(corpus)
+    if sparse:
+        result, expected = result.toarray(), expected.toarray()
+    assert result == expected
+
+
+def test_tfidf_transformer_partial_fit_new_columns(tmp_path):
+    transformer = TfidfTransformer(['a', 'b', 'c'], decimals=None)
+    transformer.partial_fit([[1, 1]])
+    assert len(transformer.idf_) == 2
+    transformer.partial_fit([[0, 1, 2], [1, 0, 1]])
+    full = TfidfTransformer(['a', 'b', 'c'], decimals=None)
+    full.fit([[1, 1, 0], [0, 1, 2], [1, 0, 1]])
+    assert list(transformer.idf_) == list(full.idf_)
+
+    # частоты сохраняются, и после load можно продолжить
+    path = tmp_path / 'model.bin'
+    transformer.save(path)
+    loaded = TfidfTransformer.load(path)
+    loaded.partial_fit([[0, 0, 1]])
+    full.fit([[1, 1, 0], [0, 1, 2], [1, 0, 1], [0, 0, 1]])
+    assert list(loaded.idf_) == list(full.idf_)
+
+
+def brute_force_search(matrix, query_row, k):
+    def cosine(a, b):
+        dot = sum(x * y for x, y in zip(a, b))
+        length = math.sqrt(sum(x * x for x in a) * sum(y * y for y in b))
+        return dot / length if length else 0.0
+
+    scores = [(doc, cosine(row, query_row)) for doc, row in enumerate(matrix)]
+    scores = [item for item in scores if item[1] > 0]
+    return sorted(scores, key=lambda item: (-item[1], item[0]))[:k]
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_search_matches_brute_force(sparse):
+    corpus = CORPUS + ['pasta never boil, fresh basil', 'basil pesto',
+                       'fresh fresh pasta', '', 'pot roast']
+    search = TfidfSearch(TfidfVectorizer(sparse=sparse, decimals=None))
+    search.fit(corpus)
+    matrix = TfidfVectorizer(decimals=None).fit_transform(corpus)
+
+    for query in ['fresh pasta', 'basil', 'crock pot pasta again',
+                  'pasta pasta pasta', 'unknown words']:
+        query_row = search.vectorizer.transform([query])
+        if sparse:
+            query_row = query_row.toarray()
+        result = search.search(query, k=3)
+        expected = brute_force_search(matrix, query_row[0], 3)
+        assert [doc for doc, _ in result] == [doc for doc, _ in expected]
+        for (_, score), (_, expected_score) in zip(result, expected):
+            assert math.isclose(score, expected_score)
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_search_default_vectorizer(sparse):
+    # при decimals=3 все веса длинного текста округлились бы до нуля
+    corpus = [' '.join(['hay'] * 5000 + ['needle']), 'hay stack']
+    search = TfidfSearch(TfidfVectorizer(sparse=sparse))
+    search.fit(corpus)
+    unrounded = TfidfSearch(TfidfVectorizer(sparse=sparse, decimals=None))
+    unrounded.fit(corpus)
+
+    assert [doc for doc, _ in search.search('needle')] == [0]
+    assert search.search('needle hay') == unrounded.search('needle hay')
+    # округление векторайзера не меняется
+    assert search.vectorizer.tf_idf_transformer.decimals == 3
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_transform_iter(sparse):
+    vectorizer = TfidfVectorizer(sparse=sparse)
+    vectorizer.fit(CORPUS)
+    texts = ['pasta pasta taste', '', 'fresh crock pot', 'unknown']
+    expected = vectorizer.transform(texts)
+    if sparse:
+        expected = expected.toarray()
+        rows = [vectorizer.tf_idf_transformer._to_dense(
+            indices, data, len(vectorizer.feature_names))
+            for indices, data in vectorizer.transform_iter(texts)]
+    else:
+        rows = list(vectorizer.transform_iter(iter(texts)))
+    assert rows == expected
+
+    chunks = list(vectorizer.transform_iter(texts, chunk_size=3))
+    if sparse:
+        chunks = [chunk.toarray() for chunk in chunks]
+    assert [row for chunk in chunks for row in chunk] == expected
+
+
+def test_search_errors():
+    search = TfidfSearch(TfidfVectorizer())
+    with pytest.raises(RuntimeError):
+        search.search('pasta')
+    search.fit(CORPUS)
+    with pytest.raises(ValueError):
+        search.search('pasta', k=0)
+    search.vectorizer.partial_fit(['brand new words'])
+    with pytest.raises(RuntimeError):
+        search.search('pasta')
+    with pytest.raises(ValueError):
+        TfidfSearch(CountVectorizer())
+
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_tfidf_dtype(sparse):
+    expected = TfidfVectorizer(sparse=sparse).fit_transform(CORPUS)
+    result = TfidfVectorizer(sparse=sparse,
+                             dtype='float32').fit_transform(CORPUS)
+    if sparse:
+        assert result.data.typecode == 'f'
+        result, expected = result.toarray(), expected.toarray()
+    else:
+        assert all(row.typecode == 'f' for row in result)
+    for row, expected_row in zip(result, expected):
+        assert all(math.isclose(value, expected_value, rel_tol=1e-6)
+                   for value, expected_value in zip(row, expected_row))
+
+
+def test_wrong_tfidf_dtype():
+    with pytest.raises(ValueError):
+        TfidfTransformer(['a'], dtype='float16')